@@ -0,0 +1,79 @@
+"""Import-time budget check for the CLI entry point.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time [--budget-ms 150] [--runs 5]
+
+Measures the cumulative `-X importtime` cost of importing `src.cli` and the wall time of
+`codegen --help`, and fails if the import exceeds the budget or pulls in modules that must
+stay lazy (LangChain, provider SDKs, settings).
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Modules that must not be imported just to parse arguments
+FORBIDDEN_PREFIXES = ("langchain", "openai", "anthropic", "pydantic_settings", "src.chains", "src.generator")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def run_clean(args, **kwargs) -> subprocess.CompletedProcess:
+    # Missing API keys must not matter for imports or --help
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_API_KEY")}
+    return subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True, **kwargs)
+
+def measure_import(module: str):
+    """Return (cumulative microseconds for `module`, names of all modules imported)."""
+    result = run_clean(["-X", "importtime", "-c", f"import {module}"], check=True)
+    cumulative = None
+    imported = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.append(name)
+        if name == module:
+            cumulative = int(match.group(2))
+    return cumulative, imported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum cumulative import time of src.cli")
+    parser.add_argument("--runs", type=int, default=5, help="Measurements to take; the best one is reported")
+    args = parser.parse_args()
+
+    samples = []
+    imported = []
+    for _ in range(args.runs):
+        cumulative, imported = measure_import("src.cli")
+        samples.append(cumulative / 1000)
+    import_ms = min(samples)
+
+    help_samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        run_clean(["-m", "src.cli", "--help"], check=True)
+        help_samples.append((time.perf_counter() - start) * 1000)
+
+    forbidden = sorted({name for name in imported if name.startswith(FORBIDDEN_PREFIXES)})
+
+    print(f"import src.cli:  {import_ms:8.1f}ms (budget {args.budget_ms:.0f}ms)")
+    print(f"codegen --help:  {min(help_samples):8.1f}ms wall, including interpreter startup")
+
+    failed = False
+    if import_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {import_ms - args.budget_ms:.1f}ms")
+        failed = True
+    if forbidden:
+        print(f"FAIL: eagerly imported: {', '.join(forbidden)}")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Micro-benchmark for extracting the JSON code structure from LLM responses.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json_extract [--corpus DIR] [--repeat N]
+
+Every *.txt file in the corpus directory is treated as one raw LLM response. The bundled corpus
+is synthetic: hand-written responses, one per failure mode the extractor repairs, so its timings
+only compare the code paths. Point --corpus at captured responses to measure real output.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from src.utils.json_utils import extract_json, find_json_start
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+def time_call(func, text: str, repeat: int) -> float:
+    """Return the best wall time of `repeat` calls in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def strict_parse(text: str):
+    """Baseline: json.loads on the fenced or bare payload, which only works for valid JSON."""
+    start = find_json_start(text)
+    end = text.rfind("}") + 1
+    return json.loads(text[start:end])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of raw responses (defaults to the synthetic corpus)")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed repetitions per response")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.txt")))
+    if not paths:
+        raise SystemExit(f"No *.txt responses found in {args.corpus}")
+    if os.path.abspath(args.corpus) == DEFAULT_CORPUS:
+        print("Synthetic corpus (hand-written responses); use --corpus for captured ones\n")
+
+    print(f"{'response':<45} {'size':>9} {'files':>6} {'extract':>10} {'MB/s':>8} {'json.loads':>11}")
+    total_bytes = 0
+    total_time = 0.0
+    for path in paths:
+        text = open(path, "r", encoding="utf-8").read()
+        structure = extract_json(text)
+        elapsed = time_call(extract_json, text, args.repeat)
+
+        try:
+            baseline = f"{time_call(strict_parse, text, args.repeat) * 1000:9.3f}ms"
+        except json.JSONDecodeError:
+            baseline = "invalid"
+
+        size = len(text.encode("utf-8"))
+        total_bytes += size
+        total_time += elapsed
+        print(
+            f"{os.path.basename(path):<45} {size:>9} {len(structure.get('files', {})):>6} "
+            f"{elapsed * 1000:8.3f}ms {size / elapsed / 1e6:8.1f} {baseline:>11}"
+        )
+
+    print(f"\nTotal: {total_bytes} bytes in {total_time * 1000:.3f}ms ({total_bytes / total_time / 1e6:.1f} MB/s)")
+
+if __name__ == "__main__":
+    main()
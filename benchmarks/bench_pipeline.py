@@ -0,0 +1,155 @@
+"""End-to-end pipeline benchmark on the offline mock provider.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline [--projects 20] [--concurrency 4] [--latency 0]
+                                        [--sizes 10x1000,50x2000,200x4000] [--stream]
+                                        [--phase-mode fanout] [--output store]
+
+Each size is `FILESxBYTES` per phase. Every size runs in a fresh interpreter generating
+`--projects` full projects into a temporary directory, and reports projects per minute, total
+JSON parse and file write time (from trace spans), the peak RSS of that interpreter, and the
+disk space and inodes the projects (and, with `--output store`, the blob store) take.
+Set `--replay DIR` to replay recorded responses (e.g. benchmarks/corpus) instead of synthesizing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+def run_worker(args) -> dict:
+    """Generate the projects in this process; called in a child interpreter per size."""
+    from src.cli import get_model_provider
+    from src.generator import CodeGenerator, ProcessingMode
+    from src.utils.batch_utils import BatchJob, run_batch
+    from src.utils.trace_utils import Tracer
+
+    tracer = Tracer()
+
+    async def run_job(job: BatchJob):
+        generator = CodeGenerator(
+            get_model_provider("mock"),
+            quiet=True,
+            streaming=args.stream,
+            tracer=tracer,
+            use_scaffold=False
+        )
+        await generator.process_input(job.user_input, ProcessingMode.FULL)
+        return generator.project_dir
+
+    jobs = [BatchJob(index, f"Benchmark project {index}", "full", "mock") for index in range(args.projects)]
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(jobs, run_job, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    def total_ms(name: str) -> float:
+        return sum(span.duration_ms or 0.0 for span in tracer.spans if span.name == name)
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    return {
+        "projects": sum(result.success for result in results),
+        "failed": sum(not result.success for result in results),
+        "elapsed": elapsed,
+        "parse_ms": total_ms("parse_json"),
+        "write_ms": total_ms("write_files"),
+        "peak_rss_mb": peak_rss_mb,
+        "errors": sorted({result.error for result in results if result.error}),
+    }
+
+def disk_usage(directory: str):
+    """Allocated bytes and inodes under a directory, counting hardlinked files once."""
+    seen = set()
+    allocated = 0
+    for root, directories, names in os.walk(directory):
+        for name in directories + names:
+            info = os.lstat(os.path.join(root, name))
+            if (info.st_dev, info.st_ino) not in seen:
+                seen.add((info.st_dev, info.st_ino))
+                allocated += info.st_blocks * 512
+    return allocated, len(seen)
+
+def run_size(args, files: int, file_size: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="codegen-bench-") as output_dir:
+        result_path = os.path.join(output_dir, "result.json")
+        env = dict(
+            os.environ,
+            PROJECT_OUTPUT_DIR=os.path.join(output_dir, "projects"),
+            LLM_CACHE_MODE="off",
+            PYTHONWARNINGS="ignore",
+            MOCK_LATENCY=str(args.latency),
+            MOCK_FILES_PER_PHASE=str(files),
+            MOCK_FILE_SIZE=str(file_size),
+            PHASE_GENERATION_MODE=args.phase_mode,
+            OUTPUT_BACKEND=args.output,
+            BLOB_STORE_DIR=os.path.join(output_dir, "blobs"),
+        )
+        if args.replay:
+            env["MOCK_REPLAY_DIR"] = os.path.abspath(args.replay)
+        command = [
+            sys.executable, "-m", "benchmarks.bench_pipeline", "--worker", result_path,
+            "--projects", str(args.projects), "--concurrency", str(args.concurrency),
+        ] + (["--stream"] if args.stream else [])
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        with open(result_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        os.remove(result_path)
+        result["disk_bytes"], result["inodes"] = disk_usage(output_dir)
+        return result
+
+def parse_sizes(value: str):
+    sizes = []
+    for item in value.split(","):
+        files, _, file_size = item.partition("x")
+        sizes.append((int(files), int(file_size)))
+    return sizes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20, help="Projects generated per size")
+    parser.add_argument("--concurrency", type=int, default=4, help="Projects generated at once")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock seconds before the first token")
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("10x1000,50x2000,200x4000"),
+                        help="Comma-separated FILESxBYTES per phase")
+    parser.add_argument("--stream", action="store_true", help="Stream responses and write files as they arrive")
+    parser.add_argument("--phase-mode", choices=["single", "fanout"], default="single",
+                        help="Generate phases in one response or as a manifest plus per-file requests")
+    parser.add_argument("--output", choices=["files", "store", "archive"], default="files",
+                        help="Write projects as files, as links into a blob store, or as archives")
+    parser.add_argument("--replay", help="Directory of recorded responses to replay")
+    parser.add_argument("--worker", metavar="RESULT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args)
+        with open(args.worker, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    print(
+        f"{'size':>12} {'projects':>9} {'proj/min':>9} {'parse':>10} {'write':>10} {'peak RSS':>10} "
+        f"{'disk':>10} {'inodes':>8}"
+    )
+    for files, file_size in args.sizes:
+        result = run_size(args, files, file_size)
+        rate = result["projects"] / result["elapsed"] * 60 if result["elapsed"] else 0.0
+        failed = f" ({result['failed']} failed)" if result["failed"] else ""
+        print(
+            f"{f'{files}x{file_size}':>12} {result['projects']:>9} {rate:>9.1f} "
+            f"{result['parse_ms']:>8.1f}ms {result['write_ms']:>8.1f}ms {result['peak_rss_mb']:>8.1f}MB "
+            f"{result['disk_bytes'] / 1e6:>8.1f}MB {result['inodes']:>8}{failed}"
+        )
+        for error in result["errors"]:
+            print(f"{'':>12} error: {error}")
+        if args.replay:
+            # Replayed responses do not depend on the size
+            break
+
+if __name__ == "__main__":
+    main()
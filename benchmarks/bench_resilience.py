@@ -0,0 +1,104 @@
+"""Tail-latency benchmark of the resilient LLM call layer against the fault-injection server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_resilience [--projects 40] [--concurrency 8] [--slow-rate 0.05]
+                                          [--slow-delay 10] [--rate-429 0.1]
+
+Generates `--projects` code-mode projects (five LLM calls each) through the OpenAI provider
+pointed at benchmarks/fault_server.py, once per policy (retries only, retries with a per-attempt
+timeout, retries with hedging), and reports p50/p95/p99 project time and failures. The server is
+restarted with the same seed for every policy, so each one sees the same faults.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.fault_server import FaultConfig, start_server
+
+POLICIES = {
+    "retries": {},
+    "attempt timeout": {"LLM_ATTEMPT_TIMEOUT": "3"},
+    "hedged p90": {"LLM_HEDGE_PERCENTILE": "0.9", "LLM_HEDGE_MIN_SAMPLES": "5"},
+}
+
+def run_worker(args) -> dict:
+    from src.cli import get_model_provider
+    from src.generator import CodeGenerator, ProcessingMode
+    from src.utils.batch_utils import BatchJob, run_batch
+
+    async def run_job(job: BatchJob):
+        generator = CodeGenerator(get_model_provider("openai"), quiet=True)
+        await generator.process_input(job.user_input, ProcessingMode.CODE)
+
+    jobs = [BatchJob(index, f"Benchmark project {index}", "code", "openai") for index in range(args.projects)]
+    results = asyncio.run(run_batch(jobs, run_job, args.concurrency))
+    return {
+        "durations": sorted(result.duration for result in results if result.success),
+        "failed": sum(not result.success for result in results),
+    }
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return float("nan")
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="Server seconds per normal response")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of stuck requests")
+    parser.add_argument("--slow-delay", type=float, default=10.0, help="Seconds a stuck request takes")
+    parser.add_argument("--rate-429", type=float, default=0.1, help="Fraction of 429 responses")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--worker", metavar="RESULT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(args.worker, "w", encoding="utf-8") as f:
+            json.dump(run_worker(args), f)
+        return
+
+    print(f"{'policy':<18} {'ok':>4} {'failed':>7} {'p50':>8} {'p95':>8} {'p99':>8}  server")
+    for name, overrides in POLICIES.items():
+        config = FaultConfig(args.delay, args.slow_rate, args.slow_delay, args.rate_429, seed=args.seed)
+        server = start_server(config)
+        try:
+            with tempfile.TemporaryDirectory(prefix="codegen-bench-") as output_dir:
+                result_path = os.path.join(output_dir, "result.json")
+                env = dict(
+                    os.environ,
+                    OPENAI_BASE_URL=server.url,
+                    OPENAI_API_KEY="test",
+                    LLM_CACHE_MODE="off",
+                    LLM_BACKOFF_BASE="0.2",
+                    LLM_BACKOFF_MAX="2",
+                    # Measure the call layer, not the client-side rate limiter
+                    OPENAI_REQUESTS_PER_MINUTE="1000000",
+                    OPENAI_TOKENS_PER_MINUTE="1000000000",
+                    PYTHONWARNINGS="ignore",
+                    **overrides
+                )
+                command = [
+                    sys.executable, "-m", "benchmarks.bench_resilience", "--worker", result_path,
+                    "--projects", str(args.projects), "--concurrency", str(args.concurrency),
+                ]
+                subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                with open(result_path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+        finally:
+            server.shutdown()
+
+        durations = result["durations"]
+        print(
+            f"{name:<18} {len(durations):>4} {result['failed']:>7} {percentile(durations, 0.5):>7.2f}s "
+            f"{percentile(durations, 0.95):>7.2f}s {percentile(durations, 0.99):>7.2f}s  "
+            f"{config.stats['requests']} requests, {config.stats['rate_limited']} x 429, {config.stats['slow']} stuck"
+        )
+
+if __name__ == "__main__":
+    main()
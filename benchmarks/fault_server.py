@@ -0,0 +1,168 @@
+"""Local OpenAI-compatible stand-in server that injects latency, stuck calls and 429s.
+
+Run from the repository root:
+
+    python -m benchmarks.fault_server [--port 8787] [--delay 0.2] [--slow-rate 0.05]
+                                      [--slow-delay 20] [--rate-429 0.1]
+
+then point the generator at it:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=test codegen "Create a todo app" --mode code
+
+Responses come from the mock provider, so the whole pipeline works against it. `--seed` makes the
+injected faults reproducible.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from langchain_core.messages import HumanMessage
+from src.chains.mock_llm import MockChatModel
+
+class FaultConfig:
+    def __init__(
+        self,
+        delay: float = 0.2,
+        slow_rate: float = 0.0,
+        slow_delay: float = 20.0,
+        rate_429: float = 0.0,
+        retry_after: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        self.delay = delay
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "slow": 0}
+
+    def draw(self) -> str:
+        """Pick the fault for one request: "429", "slow" or "ok"."""
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            if roll < self.rate_429:
+                self.stats["rate_limited"] += 1
+                return "429"
+            if roll < self.rate_429 + self.slow_rate:
+                self.stats["slow"] += 1
+                return "slow"
+            return "ok"
+
+def make_handler(config: FaultConfig, model: MockChatModel):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            fault = config.draw()
+            if fault == "429":
+                headers = {"Retry-After": f"{config.retry_after:g}"} if config.retry_after is not None else {}
+                self.send_json(429, {"error": {"message": "Rate limit exceeded (injected)", "type": "rate_limit_error"}}, headers)
+                return
+            time.sleep(config.slow_delay if fault == "slow" else config.delay)
+
+            messages = [HumanMessage(content=str(m.get("content", ""))) for m in request.get("messages", [])]
+            text = model.respond(messages)
+            created = int(time.time())
+            if request.get("stream"):
+                self.stream(text, request.get("model", "mock"), created)
+                return
+            prompt_tokens = sum(len(m.content) // 4 for m in messages)
+            self.send_json(200, {
+                "id": f"chatcmpl-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(text) // 4,
+                    "total_tokens": prompt_tokens + len(text) // 4
+                }
+            })
+
+        def stream(self, text: str, model_name: str, created: int) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for start in range(0, len(text) + 1, 256):
+                delta = {"content": text[start:start + 256]} if start < len(text) else {}
+                chunk = {
+                    "id": f"chatcmpl-{created}",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model_name,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None if delta else "stop"}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+class FaultServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients abandoning stuck requests (timeouts, hedging) are expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+def start_server(config: FaultConfig, host: str = "127.0.0.1", port: int = 0, files: int = 10, file_size: int = 1000):
+    """Start the server in a background thread; return it (its URL is `server.url`)."""
+    model = MockChatModel(latency=0, files=files, file_size=file_size)
+    server = FaultServer((host, port), make_handler(config, model))
+    server.url = f"http://{host}:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds before a normal response")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of requests that get stuck")
+    parser.add_argument("--slow-delay", type=float, default=20.0, help="Seconds a stuck request takes")
+    parser.add_argument("--rate-429", type=float, default=0.1, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header sent with 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FaultConfig(args.delay, args.slow_rate, args.slow_delay, args.rate_429, args.retry_after, args.seed)
+    server = start_server(config, args.host, args.port)
+    print(f"Serving on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n{config.stats}")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
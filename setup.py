@@ -9,7 +9,7 @@ setup(
         "click",
         "rich",
         "langchain",
-        "langchain-anthropic",
+        "langchain-anthropic>=0.1.13,<0.2",
         "langchain-community",
         "openai",
         "anthropic",
@@ -1,41 +1,29 @@
-from langchain_community.chat_models import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 from langchain.chains import LLMChain
-from src.prompts.code_generation_prompts import code_generation_prompt
+from src.prompts.code_generation_prompts import (
+    code_generation_prompt,
+    code_manifest_prompt,
+    file_generation_prompt,
+    file_repair_prompt
+)
 from src.utils.memory_utils import create_memory
-from src.config.settings import settings
-from enum import Enum
+from src.chains.llm_registry import get_llm
+from src.config.providers import ModelProvider
+from src.config.settings import get_settings
+from langchain_core.caches import BaseCache
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ModelProvider(str, Enum):
-    OPENAI = "openai"
-    ANTHROPIC = "anthropic"
-
-def get_llm(provider: ModelProvider, streaming: bool = False):
-    """Create LLM based on provider choice."""
-    if provider == ModelProvider.OPENAI:
-        return ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-4-0125-preview",
-            api_key=settings.openai_api_key,
-            streaming=streaming
-        )
-    elif provider == ModelProvider.ANTHROPIC:
-        return ChatAnthropic(
-            temperature=0.7,
-            model="claude-3-sonnet-20240229",
-            anthropic_api_key=settings.anthropic_api_key,
-            streaming=streaming
-        )
-    else:
-        raise ValueError(f"Unsupported model provider: {provider}")
-
-def create_code_generation_chain(model_provider: ModelProvider = ModelProvider.OPENAI):
+def create_code_generation_chain(
+    model_provider: ModelProvider = ModelProvider.OPENAI,
+    cache: Optional[BaseCache] = None,
+    streaming: bool = False
+):
     """Create the code generation chain."""
     try:
-        llm = get_llm(model_provider)
+        settings = get_settings()
+        llm = get_llm(model_provider, streaming=streaming, cache=cache)
         logger.debug(f"Created LLM using provider: {model_provider}")
 
         code_gen_chain = LLMChain(
@@ -45,7 +33,8 @@ def create_code_generation_chain(model_provider: ModelProvider = ModelProvider.O
             verbose=True,
             memory=create_memory(
                 input_key="phase",
-                output_key="code_structure"
+                output_key="code_structure",
+                max_tokens=settings.code_generation_memory_max_tokens
             )
         )
 
@@ -53,4 +42,70 @@ def create_code_generation_chain(model_provider: ModelProvider = ModelProvider.O
         
     except Exception as e:
         logger.error(f"Error creating code generation chain: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def create_manifest_chain(
+    model_provider: ModelProvider = ModelProvider.OPENAI,
+    cache: Optional[BaseCache] = None
+):
+    """Create the chain that plans a phase as a file manifest (fan-out phase mode)."""
+    try:
+        settings = get_settings()
+        llm = get_llm(model_provider, cache=cache)
+
+        return LLMChain(
+            llm=llm,
+            prompt=code_manifest_prompt,
+            output_key="manifest",
+            verbose=True,
+            memory=create_memory(
+                input_key="phase",
+                output_key="manifest",
+                max_tokens=settings.code_generation_memory_max_tokens
+            )
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating manifest chain: {str(e)}")
+        raise
+
+def create_file_generation_chain(
+    model_provider: ModelProvider = ModelProvider.OPENAI,
+    cache: Optional[BaseCache] = None
+):
+    """Create the chain that writes a few manifest files (fan-out phase mode).
+
+    Its calls run concurrently, so it keeps no memory; the manifest gives each call its context.
+    """
+    try:
+        llm = get_llm(model_provider, cache=cache)
+
+        return LLMChain(
+            llm=llm,
+            prompt=file_generation_prompt,
+            output_key="file_contents",
+            verbose=True
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating file generation chain: {str(e)}")
+        raise
+
+def create_file_repair_chain(
+    model_provider: ModelProvider = ModelProvider.OPENAI,
+    cache: Optional[BaseCache] = None
+):
+    """Create the chain that rewrites files which failed validation."""
+    try:
+        llm = get_llm(model_provider, cache=cache)
+
+        return LLMChain(
+            llm=llm,
+            prompt=file_repair_prompt,
+            output_key="file_contents",
+            verbose=True
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating file repair chain: {str(e)}")
+        raise
@@ -0,0 +1,136 @@
+import threading
+import logging
+from typing import Any, Dict, Optional, Tuple
+from langchain_core.caches import BaseCache
+from src.config.providers import ModelProvider
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_llms: Dict[Tuple, Any] = {}
+_http_clients: Optional[Tuple[Any, Any]] = None
+
+def get_http_clients():
+    """Return the process-wide (sync, async) httpx clients with pooled keep-alive connections."""
+    global _http_clients
+    with _lock:
+        if _http_clients is None:
+            import httpx
+
+            settings = get_settings()
+            limits = httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry
+            )
+            timeout = httpx.Timeout(settings.http_timeout, connect=10.0)
+            _http_clients = (
+                httpx.Client(limits=limits, timeout=timeout),
+                httpx.AsyncClient(limits=limits, timeout=timeout)
+            )
+        return _http_clients
+
+def get_model_name(provider: ModelProvider) -> str:
+    """Return the configured model name for a provider."""
+    settings = get_settings()
+    if provider == ModelProvider.OPENAI:
+        return settings.openai_model
+    elif provider == ModelProvider.ANTHROPIC:
+        return settings.anthropic_model
+    elif provider == ModelProvider.MOCK:
+        return "mock"
+    raise ValueError(f"Unsupported model provider: {provider}")
+
+def _create_llm(provider: ModelProvider, model: str, temperature: float, streaming: bool, cache: Optional[BaseCache]):
+    settings = get_settings()
+    if provider == ModelProvider.MOCK:
+        from src.chains.mock_llm import MockChatModel
+        return MockChatModel(
+            latency=settings.mock_latency,
+            files=settings.mock_files_per_phase,
+            file_size=settings.mock_file_size,
+            replay_dir=settings.mock_replay_dir,
+            streaming=streaming,
+            cache=cache
+        )
+
+    api_key = settings.get_api_key(provider)
+    http_client, http_async_client = get_http_clients()
+
+    # Provider SDKs are imported only once a provider is chosen
+    if provider == ModelProvider.OPENAI:
+        import openai
+        from langchain_community.chat_models import ChatOpenAI
+        return ChatOpenAI(
+            temperature=temperature,
+            model_name=model,
+            api_key=api_key,
+            streaming=streaming,
+            cache=cache,
+            # Retries are handled by the resilient call layer, not by the SDK
+            client=openai.OpenAI(
+                api_key=api_key,
+                base_url=settings.openai_base_url,
+                http_client=http_client,
+                max_retries=0
+            ).chat.completions,
+            async_client=openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=settings.openai_base_url,
+                http_client=http_async_client,
+                max_retries=0
+            ).chat.completions
+        )
+    elif provider == ModelProvider.ANTHROPIC:
+        import anthropic
+        from langchain_anthropic import ChatAnthropic
+        llm = ChatAnthropic(
+            temperature=temperature,
+            model=model,
+            anthropic_api_key=api_key,
+            streaming=streaming,
+            cache=cache,
+            # Retries are handled by the resilient call layer, not by the SDK
+            max_retries=0,
+            default_request_timeout=settings.http_timeout
+        )
+        # ChatAnthropic takes no HTTP client, so the SDK clients it builds are swapped for ones
+        # backed by the shared pool. This relies on the private attributes of langchain-anthropic
+        # 0.1 (pinned in requirements.txt); with clients of any other shape it keeps its own.
+        if isinstance(getattr(llm, "_client", None), anthropic.Client):
+            object.__setattr__(llm, "_client", anthropic.Client(api_key=api_key, http_client=http_client, max_retries=0))
+            object.__setattr__(
+                llm,
+                "_async_client",
+                anthropic.AsyncClient(api_key=api_key, http_client=http_async_client, max_retries=0)
+            )
+        else:
+            logger.debug("ChatAnthropic clients not recognized; using its own connection pool")
+        return llm
+    else:
+        raise ValueError(f"Unsupported model provider: {provider}")
+
+def get_llm(
+    provider: ModelProvider,
+    streaming: bool = False,
+    cache: Optional[BaseCache] = None,
+    temperature: float = 0.7
+):
+    """Return the shared chat model for (provider, model, temperature, streaming).
+
+    Chat models hold no per-conversation state (memory lives on the chains), so one instance
+    and its pooled HTTP connections can serve every chain in the process. The cache is part of
+    the key because it is configured on the model.
+    """
+    provider = ModelProvider(provider)
+    model = get_model_name(provider)
+    key = (provider, model, temperature, streaming, id(cache) if cache is not None else None)
+    with _lock:
+        llm = _llms.get(key)
+    if llm is None:
+        llm = _create_llm(provider, model, temperature, streaming, cache)
+        logger.debug(f"Created shared LLM client: {key[:4]}")
+        with _lock:
+            llm = _llms.setdefault(key, llm)
+    return llm
@@ -0,0 +1,221 @@
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from src.utils.section_utils import find_section, parse_sections
+from src.utils.token_utils import estimate_tokens
+
+FUNCTIONAL_SECTIONS = [
+    "Introduction and Overview",
+    "User Stories",
+    "User Types",
+    "Functional Requirements",
+    "UI/UX Details",
+    "Database Details",
+]
+
+TECHNICAL_SECTIONS = [
+    "Technology Stack",
+    "Phase 1 - Database Implementation",
+    "Phase 2 - Backend API",
+    "Phase 3 - Frontend Implementation",
+]
+
+_PHASE = re.compile(r"Current Phase:\s*Phase\s*(\d+)")
+_FILE_TO_WRITE = re.compile(r"^- (\S+?): ", re.MULTILINE)
+_CURRENT_FILE = re.compile(r"^- (\S+) \(\d+ lines\)", re.MULTILINE)
+_CURRENT_DOCUMENT = re.compile(r"<current_(functional|technical)_requirements>\n(.*?)\n</current_\1_requirements>", re.DOTALL)
+
+def prompt_stage(prompt: str) -> str:
+    """Name the pipeline stage a prompt belongs to: functional, technical, phase<N>, in fan-out
+    phase mode manifest<N> and files<N>, and for updates update_functional, update_technical and
+    plan<N> (updated files are files<N>)."""
+    document = _CURRENT_DOCUMENT.search(prompt)
+    if document:
+        return f"update_{document.group(1)}"
+    match = _PHASE.search(prompt)
+    if match:
+        if "Files to write:" in prompt:
+            return f"files{match.group(1)}"
+        if "file manifest for this phase" in prompt:
+            return f"manifest{match.group(1)}"
+        if "Files currently in this phase:" in prompt:
+            return f"plan{match.group(1)}"
+        return f"phase{match.group(1)}"
+    if "technical architect" in prompt:
+        return "technical"
+    return "functional"
+
+def synthesize_document(sections: List[str], paragraph_chars: int, rng: random.Random) -> str:
+    words = ["entity", "record", "status", "table", "form", "report", "filter", "workflow", "list", "detail"]
+    parts = []
+    for number, title in enumerate(sections, start=1):
+        text = " ".join(rng.choice(words) for _ in range(max(paragraph_chars // 7, 1)))
+        parts.append(f"{number}. {title}:\n   - {text}\n")
+    return "\n".join(parts)
+
+def phase_area(phase: int) -> str:
+    return {1: "backend/db", 2: "backend/routes", 3: "frontend/src/components"}.get(phase, f"phase{phase}")
+
+def synthesize_file(phase: int, index: int, file_size: int, rng: random.Random) -> str:
+    line = "  const value = compute(input, options); // generated line\n"
+    body = "".join(line for _ in range(max(file_size // len(line), 1)))
+    return (
+        f"// Module {index} of phase {phase} ({rng.randrange(1 << 30):x})\n"
+        f"export function module{index}(input, options) {{\n{body}  return input;\n}}\n"
+    )
+
+def synthesize_code_structure(phase: int, files: int, file_size: int, rng: random.Random) -> str:
+    """A fenced `{folders, files, commands}` response with `files` files of about `file_size` chars."""
+    area = phase_area(phase)
+    structure = {
+        "folders": [area],
+        "files": {},
+        # Commands run before folders are created, so stay in the project root
+        "commands": [f"echo phase {phase} ready"],
+    }
+    for index in range(files):
+        structure["files"][f"{area}/module_{index}.js"] = synthesize_file(phase, index, file_size, rng)
+    return "```json\n" + json.dumps(structure, indent=2) + "\n```"
+
+def synthesize_manifest(phase: int, files: int) -> str:
+    """A fenced fan-out manifest listing the same files `synthesize_code_structure` would write."""
+    area = phase_area(phase)
+    structure = {
+        "folders": [area],
+        "files": [
+            {"path": f"{area}/module_{index}.js", "spec": f"Exports module{index}(input, options)."}
+            for index in range(files)
+        ],
+        "commands": [f"echo phase {phase} ready"],
+    }
+    return "```json\n" + json.dumps(structure, indent=2) + "\n```"
+
+def synthesize_revision(prompt: str, section: str, line: str) -> str:
+    """The current document of an update prompt with `line` appended to one of its sections."""
+    document = _CURRENT_DOCUMENT.search(prompt).group(2)
+    target = find_section(parse_sections(document), section)
+    if target is None:
+        return f"{document}\n{line}"
+    return document.replace(target.text, f"{target.text}\n   - {line}", 1)
+
+def synthesize_update_plan(phase: int, prompt: str) -> str:
+    """A fenced update plan that rewrites the first current file of the phase and adds one."""
+    current = _CURRENT_FILE.findall(prompt[prompt.index("Files currently in this phase:"):])
+    area = phase_area(phase)
+    files = [{"path": path, "spec": "Handle the updated requirements."} for path in current[:1]]
+    files.append({"path": f"{area}/feature_update.js", "spec": "Exports the updated feature."})
+    return "```json\n" + json.dumps({"folders": [], "files": files, "delete": [], "commands": []}, indent=2) + "\n```"
+
+def synthesize_files(phase: int, prompt: str, file_size: int, seed: int) -> str:
+    """A fenced `{files}` response writing each file listed under "Files to write:"."""
+    requested = _FILE_TO_WRITE.findall(prompt[prompt.index("Files to write:"):])
+    files = {}
+    for path in requested:
+        digits = re.findall(r"\d+", os.path.basename(path))
+        index = int(digits[-1]) if digits else 0
+        files[path] = synthesize_file(phase, index, file_size, random.Random(f"{seed}:{path}"))
+    return "```json\n" + json.dumps({"files": files}, indent=2) + "\n```"
+
+class MockChatModel(BaseChatModel):
+    """Offline chat model that replays recorded responses or synthesizes them.
+
+    Responses are looked up in `replay_dir` by stage (`functional*.txt`, `technical*.txt`,
+    `phase1*.txt`, `manifest1*.txt`, ...); stages without a recording get a deterministic synthetic response. Each
+    call waits `latency` seconds before the first token, then streams `chunk_chars` at a time.
+    """
+
+    latency: float = 0.5
+    files: int = 20
+    file_size: int = 2000
+    replay_dir: Optional[str] = None
+    streaming: bool = False
+    chunk_chars: int = 64
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_name": "mock",
+            "files": self.files,
+            "file_size": self.file_size,
+            "replay_dir": self.replay_dir,
+            "seed": self.seed,
+        }
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        stage = prompt_stage(prompt)
+        # Per-file fan-out requests differ call to call, so they are always synthesized
+        if self.replay_dir and not stage.startswith("files"):
+            recorded = sorted(glob.glob(os.path.join(self.replay_dir, f"{stage}*.txt")))
+            if recorded:
+                with open(recorded[0], "r", encoding="utf-8") as f:
+                    return f.read()
+
+        rng = random.Random(f"{self.seed}:{stage}")
+        if stage == "update_functional":
+            request = re.search(r"Updated User Input: (.*)", prompt)
+            return synthesize_revision(prompt, "Functional Requirements", request.group(1) if request else "Updated")
+        if stage == "update_technical":
+            return synthesize_revision(prompt, "Phase 2", "Implement the updated functional requirements")
+        if stage == "functional":
+            return synthesize_document(FUNCTIONAL_SECTIONS, 400, rng)
+        if stage == "technical":
+            return synthesize_document(TECHNICAL_SECTIONS, 600, rng)
+        phase = int(re.sub(r"\D", "", stage))
+        if stage.startswith("manifest"):
+            return synthesize_manifest(phase, self.files)
+        if stage.startswith("plan"):
+            return synthesize_update_plan(phase, prompt)
+        if stage.startswith("files"):
+            return synthesize_files(phase, prompt, self.file_size, self.seed)
+        return synthesize_code_structure(phase, self.files, self.file_size, rng)
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        completion_tokens = estimate_tokens(text)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={
+                "model_name": "mock",
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages, self.respond(messages))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        text = self.respond(messages)
+        if self.streaming and run_manager is not None:
+            for start in range(0, len(text), self.chunk_chars):
+                chunk = text[start:start + self.chunk_chars]
+                await run_manager.on_llm_new_token(chunk, chunk=ChatGenerationChunk(message=AIMessageChunk(content=chunk)))
+        return self._result(messages, text)
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        text = self.respond(messages)
+        for start in range(0, len(text), self.chunk_chars):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text[start:start + self.chunk_chars]))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
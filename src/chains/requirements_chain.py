@@ -1,60 +1,41 @@
-from langchain_community.chat_models import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 from langchain.chains import LLMChain, SequentialChain
 from src.prompts.requirements_prompts import (
     functional_requirements_prompt,
     technical_requirements_prompt
 )
 from src.utils.memory_utils import create_memory
-from src.config.settings import settings
-from enum import Enum
+from src.chains.llm_registry import get_llm
+from src.config.providers import ModelProvider
+from src.config.settings import get_settings
+from langchain_core.caches import BaseCache
+from typing import Optional
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class ModelProvider(str, Enum):
-    OPENAI = "openai"
-    ANTHROPIC = "anthropic"
-
-def get_llm(provider: ModelProvider, streaming: bool = False):
-    """Create LLM based on provider choice."""
-    if provider == ModelProvider.OPENAI:
-        return ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-4-0125-preview",
-            api_key=settings.openai_api_key,
-            streaming=streaming
-        )
-    elif provider == ModelProvider.ANTHROPIC:
-        return ChatAnthropic(
-            temperature=0.7,
-            model="claude-3-sonnet-20240229",
-            anthropic_api_key=settings.anthropic_api_key,
-            streaming=streaming
-        )
-    else:
-        raise ValueError(f"Unsupported model provider: {provider}")
-
-def create_requirements_chain(model_provider: ModelProvider = ModelProvider.OPENAI):
+def create_requirements_chain(model_provider: ModelProvider = ModelProvider.OPENAI, cache: Optional[BaseCache] = None):
     """Create the requirements generation chain."""
     try:
         # Create LLMs
-        functional_llm = get_llm(model_provider)
-        technical_llm = get_llm(model_provider)
+        functional_llm = get_llm(model_provider, cache=cache)
+        technical_llm = get_llm(model_provider, cache=cache)
         
         logger.debug(f"Created LLMs using provider: {model_provider}")
 
         # Create memory
+        settings = get_settings()
         functional_memory = create_memory(
             input_key="user_input",
-            output_key="functional_requirements"
+            output_key="functional_requirements",
+            max_tokens=settings.functional_memory_max_tokens
         )
 
         technical_memory = create_memory(
             input_key="functional_requirements",
-            output_key="technical_requirements"
+            output_key="technical_requirements",
+            max_tokens=settings.technical_memory_max_tokens
         )
 
         # Create chains
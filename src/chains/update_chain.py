@@ -0,0 +1,46 @@
+from langchain.chains import LLMChain
+from src.prompts.update_prompts import (
+    file_update_prompt,
+    functional_requirements_update_prompt,
+    technical_requirements_update_prompt,
+    update_plan_prompt
+)
+from src.chains.llm_registry import get_llm
+from src.config.providers import ModelProvider
+from langchain_core.caches import BaseCache
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Chain name -> (prompt, output key) of the chains used by `codegen update`
+UPDATE_CHAINS = {
+    "functional_update": (functional_requirements_update_prompt, "functional_requirements"),
+    "technical_update": (technical_requirements_update_prompt, "technical_requirements"),
+    "update_plan": (update_plan_prompt, "update_plan"),
+    "file_update": (file_update_prompt, "file_contents"),
+}
+
+def create_update_chain(
+    name: str,
+    model_provider: ModelProvider = ModelProvider.OPENAI,
+    cache: Optional[BaseCache] = None
+):
+    """Create one of the project update chains.
+
+    Each call carries the current state it revises in its prompt, so the chains keep no memory.
+    """
+    try:
+        prompt, output_key = UPDATE_CHAINS[name]
+        llm = get_llm(model_provider, cache=cache)
+        logger.debug(f"Created {name} LLM using provider: {model_provider}")
+
+        return LLMChain(
+            llm=llm,
+            prompt=prompt,
+            output_key=output_key
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating {name} chain: {str(e)}")
+        raise
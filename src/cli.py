@@ -1,98 +1,51 @@
 import click
 import asyncio
-from enum import Enum
+import time
 from typing import Optional
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from datetime import datetime
-import uuid
-import os
-from src.chains.requirements_chain import create_requirements_chain, ModelProvider
-from src.chains.code_generation_chain import create_code_generation_chain
-from src.utils.file_utils import process_code_structure
-from src.config.settings import settings
+from src.config.providers import ModelProvider
+
+# Pipeline, LangChain and settings imports are deferred to the commands that need them,
+# so `codegen --help` and argument errors stay fast and need no API keys.
 
 console = Console()
 
-class ProcessingMode(str, Enum):
-    REQUIREMENTS = "requirements"
-    CODE = "code"
-    FULL = "full"
-
-class CodeGenerator:
-    def __init__(self, model_provider: ModelProvider = ModelProvider.OPENAI):
-        self.requirements_chain = create_requirements_chain(model_provider)
-        self.code_gen_chain = create_code_generation_chain(model_provider)
-        self.project_dir = None
-
-    def create_project_directory(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        project_name = f"project_{timestamp}_{unique_id}"
-        
-        project_dir = os.path.join(settings.project_output_dir, project_name)
-        os.makedirs(project_dir, exist_ok=True)
-        
-        docs_dir = os.path.join(project_dir, "docs")
-        os.makedirs(docs_dir, exist_ok=True)
-        
-        return project_dir
-
-    async def process_input(self, user_input: str, mode: ProcessingMode):
-        try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
-                # Create project directory for full mode
-                if mode == ProcessingMode.FULL:
-                    self.project_dir = self.create_project_directory()
-                    progress.add_task("Created project directory", total=None)
-
-                # Generate Functional Requirements
-                task = progress.add_task("Generating functional requirements...", total=None)
-                functional_chain = self.requirements_chain.chains[0]
-                func_result = functional_chain.run(user_input=user_input)
-                progress.update(task, completed=True)
-                console.print("\n[green]✓[/green] Functional Requirements Generated")
-                console.print(func_result)
-
-                # Generate Technical Requirements
-                task = progress.add_task("Generating technical requirements...", total=None)
-                technical_chain = self.requirements_chain.chains[1]
-                tech_result = technical_chain.run(functional_requirements=func_result)
-                progress.update(task, completed=True)
-                console.print("\n[green]✓[/green] Technical Requirements Generated")
-                console.print(tech_result)
-
-                if mode in [ProcessingMode.CODE, ProcessingMode.FULL]:
-                    # Generate Code for each phase
-                    phases = ["Phase 1", "Phase 2", "Phase 3"]
-                    
-                    for phase in phases:
-                        task = progress.add_task(f"Generating code for {phase}...", total=None)
-                        code_result = self.code_gen_chain.invoke({
-                            "functional_requirements": func_result,
-                            "technical_requirements": tech_result,
-                            "phase": phase
-                        })
-                        progress.update(task, completed=True)
-                        console.print(f"\n[green]✓[/green] {phase} Code Generated")
-                        
-                        if mode == ProcessingMode.FULL:
-                            task = progress.add_task(f"Processing {phase} code files...", total=None)
-                            process_code_structure(code_result["code_structure"], base_path=self.project_dir)
-                            progress.update(task, completed=True)
-
-                if mode == ProcessingMode.FULL:
-                    console.print(f"\n[green]✓[/green] Project created at: {self.project_dir}")
-
-        except Exception as e:
-            console.print(f"\n[red]Error:[/red] {str(e)}")
-            raise
-
-@click.command()
+class DefaultCommandGroup(click.Group):
+    """Click group that treats unknown leading arguments as input to a default command."""
+
+    def __init__(self, *args, default_command: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if args and self.default_command and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+def get_model_provider(model: str) -> ModelProvider:
+    return ModelProvider(model)
+
+def recorded_model_provider(info: dict, project_dir: str) -> ModelProvider:
+    """The model provider a project's run file records, e.g. for `codegen resume`."""
+    if not info.get("model"):
+        raise ValueError(f"{project_dir} does not record the model it was generated with; its run file is incomplete")
+    return get_model_provider(info["model"])
+
+def print_cache_stats(llm_cache) -> None:
+    if llm_cache is not None:
+        console.print(f"LLM cache: {llm_cache.format_stats()}")
+
+def export_trace(tracer, path: Optional[str]) -> None:
+    if tracer is not None and path:
+        written = tracer.export(path)
+        totals = ", ".join(f"{key}={value:g}" for key, value in tracer.totals().items())
+        console.print(f"Trace written to: {', '.join(written)}" + (f" ({totals})" if totals else ""))
+
+@click.group(cls=DefaultCommandGroup, default_command='generate')
+def main():
+    """Generate code from natural language description."""
+
+@main.command()
 @click.argument('user_input', type=str)
 @click.option('--mode', 
     type=click.Choice(['requirements', 'code', 'full']), 
@@ -100,21 +53,538 @@ class CodeGenerator:
     help='Processing mode: requirements, code, or full project generation'
 )
 @click.option('--model', 
-    type=click.Choice(['openai', 'anthropic']), 
+    type=click.Choice(['openai', 'anthropic', 'mock']), 
     default='openai',
     help='Choose the AI model provider'
 )
-def main(user_input: str, mode: str, model: str):
+@click.option('--cache', 'cache_mode',
+    type=click.Choice(['off', 'read', 'write', 'readwrite']),
+    default=None,
+    help='LLM response cache mode (defaults to LLM_CACHE_MODE)'
+)
+@click.option('--stream', is_flag=True, help='Stream code generation, writing files as they arrive so a truncated response keeps its completed files')
+@click.option('--trace', 'trace_path',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help='Write per-stage timings and token counts as a Chrome trace (and JSONL next to it)'
+)
+@click.option('--scaffold/--no-scaffold', 'use_scaffold',
+    default=None,
+    help='Start full projects from the prebuilt scaffold (defaults to USE_SCAFFOLD)'
+)
+@click.option('--phase-mode',
+    type=click.Choice(['single', 'fanout']),
+    default=None,
+    help='Generate each phase in one response, or as a file manifest plus concurrent per-file requests (defaults to PHASE_GENERATION_MODE)'
+)
+@click.option('--validate/--no-validate', 'validate',
+    default=None,
+    help='Syntax-check generated files after each phase and regenerate failing ones (defaults to VALIDATE_GENERATED_FILES)'
+)
+@click.option('--output', 'output',
+    type=click.Choice(['files', 'store', 'archive']),
+    default=None,
+    help='Write full projects as files, as hardlinks into the shared blob store, or as a streamed .tar.gz (defaults to OUTPUT_BACKEND)'
+)
+@click.option('--reuse-requirements/--no-reuse-requirements', 'reuse_requirements',
+    default=None,
+    help='Reuse, or revise as a draft, the functional requirements of a similar earlier request (defaults to REUSE_REQUIREMENTS)'
+)
+def generate(
+    user_input: str,
+    mode: str,
+    model: str,
+    cache_mode: Optional[str],
+    stream: bool,
+    trace_path: Optional[str],
+    use_scaffold: Optional[bool],
+    phase_mode: Optional[str],
+    validate: Optional[bool],
+    output: Optional[str],
+    reuse_requirements: Optional[bool]
+):
     """Generate code from natural language description."""
-    model_provider = ModelProvider.OPENAI if model == 'openai' else ModelProvider.ANTHROPIC
+    from src.config.settings import get_settings
+    from src.generator import CodeGenerator, ProcessingMode
+    from src.utils.cache_utils import CacheMode
+    from src.utils.trace_utils import Tracer
+
+    model_provider = get_model_provider(model)
     processing_mode = ProcessingMode(mode)
     
-    console.print(f"[bold blue]Starting AI Code Generator[/bold blue]")
+    console.print("[bold blue]Starting AI Code Generator[/bold blue]")
     console.print(f"Mode: {mode}")
     console.print(f"Model: {model}\n")
 
-    generator = CodeGenerator(model_provider)
-    asyncio.run(generator.process_input(user_input, processing_mode))
+    try:
+        generator = CodeGenerator(
+            model_provider,
+            cache_mode=CacheMode(cache_mode or get_settings().llm_cache_mode),
+            streaming=stream,
+            tracer=Tracer() if trace_path else None,
+            use_scaffold=use_scaffold,
+            phase_mode=phase_mode,
+            validate=validate,
+            output=output,
+            reuse_requirements=reuse_requirements
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    try:
+        asyncio.run(generator.process_input(user_input, processing_mode))
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+    finally:
+        print_cache_stats(generator.llm_cache)
+        export_trace(generator.tracer, trace_path)
+
+@main.command()
+@click.argument('prompts_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--concurrency', 
+    type=click.IntRange(min=1), 
+    default=None,
+    help='Number of pipelines to run at once (defaults to BATCH_CONCURRENCY)'
+)
+@click.option('--mode', 
+    type=click.Choice(['requirements', 'code', 'full']), 
+    default='full',
+    help='Default processing mode for lines that do not set one'
+)
+@click.option('--model', 
+    type=click.Choice(['openai', 'anthropic', 'mock']), 
+    default='openai',
+    help='Default AI model provider for lines that do not set one'
+)
+@click.option('--cache', 'cache_mode',
+    type=click.Choice(['off', 'read', 'write', 'readwrite']),
+    default=None,
+    help='LLM response cache mode (defaults to LLM_CACHE_MODE)'
+)
+@click.option('--stream', is_flag=True, help='Stream code generation, writing files as they arrive so a truncated response keeps its completed files')
+@click.option('--trace', 'trace_path',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help='Write per-stage timings and token counts as a Chrome trace (and JSONL next to it)'
+)
+@click.option('--scaffold/--no-scaffold', 'use_scaffold',
+    default=None,
+    help='Start full projects from the prebuilt scaffold (defaults to USE_SCAFFOLD)'
+)
+@click.option('--phase-mode',
+    type=click.Choice(['single', 'fanout']),
+    default=None,
+    help='Generate each phase in one response, or as a file manifest plus concurrent per-file requests (defaults to PHASE_GENERATION_MODE)'
+)
+@click.option('--validate/--no-validate', 'validate',
+    default=None,
+    help='Syntax-check generated files after each phase and regenerate failing ones (defaults to VALIDATE_GENERATED_FILES)'
+)
+@click.option('--output', 'output',
+    type=click.Choice(['files', 'store', 'archive']),
+    default=None,
+    help='Write full projects as files, as hardlinks into the shared blob store, or as a streamed .tar.gz (defaults to OUTPUT_BACKEND)'
+)
+@click.option('--reuse-requirements/--no-reuse-requirements', 'reuse_requirements',
+    default=None,
+    help='Reuse, or revise as a draft, the functional requirements of a similar earlier request (defaults to REUSE_REQUIREMENTS)'
+)
+def batch(
+    prompts_file: str,
+    concurrency: Optional[int],
+    mode: str,
+    model: str,
+    cache_mode: Optional[str],
+    stream: bool,
+    trace_path: Optional[str],
+    use_scaffold: Optional[bool],
+    phase_mode: Optional[str],
+    validate: Optional[bool],
+    output: Optional[str],
+    reuse_requirements: Optional[bool]
+):
+    """Generate many projects concurrently from a JSONL prompts file."""
+    from src.config.settings import get_settings
+    from src.generator import CodeGenerator, ProcessingMode
+    from src.utils.batch_utils import BatchJob, load_batch_jobs, run_batch, print_batch_summary
+    from src.utils.cache_utils import CacheMode, get_llm_cache
+    from src.utils.trace_utils import Tracer
+
+    settings = get_settings()
+    try:
+        jobs = load_batch_jobs(prompts_file, default_mode=mode, default_model=model)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='PROMPTS_FILE')
+    concurrency = concurrency or settings.batch_concurrency
+
+    console.print("[bold blue]Starting AI Code Generator batch[/bold blue]")
+    console.print(f"Jobs: {len(jobs)}")
+    console.print(f"Concurrency: {concurrency}\n")
+
+    cache_mode = CacheMode(cache_mode or settings.llm_cache_mode)
+    # Each job records its own trace; all of them are exported to one file
+    tracer = Tracer() if trace_path else None
+
+    async def run_job(job: BatchJob) -> Optional[str]:
+        generator = CodeGenerator(
+            get_model_provider(job.model),
+            quiet=True,
+            cache_mode=cache_mode,
+            streaming=stream,
+            tracer=tracer,
+            use_scaffold=use_scaffold,
+            phase_mode=phase_mode,
+            validate=validate,
+            output=output,
+            reuse_requirements=reuse_requirements
+        )
+        await generator.process_input(job.user_input, ProcessingMode(job.mode))
+        return generator.project_dir
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(run_batch(jobs, run_job, concurrency))
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+    finally:
+        export_trace(tracer, trace_path)
+    print_batch_summary(results, time.perf_counter() - start)
+    print_cache_stats(get_llm_cache(cache_mode))
+
+    if any(not result.success for result in results):
+        raise SystemExit(1)
+
+@main.command()
+@click.argument('project_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--cache', 'cache_mode',
+    type=click.Choice(['off', 'read', 'write', 'readwrite']),
+    default=None,
+    help='LLM response cache mode (defaults to LLM_CACHE_MODE)'
+)
+@click.option('--trace', 'trace_path',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help='Write per-stage timings and token counts as a Chrome trace (and JSONL next to it)'
+)
+def resume(project_dir: str, cache_mode: Optional[str], trace_path: Optional[str]):
+    """Continue a full-mode project, re-running only stages without a valid checkpoint."""
+    from src.config.settings import get_settings
+    from src.generator import CodeGenerator
+    from src.utils.cache_utils import CacheMode
+    from src.utils.checkpoint_utils import load_run_info
+    from src.utils.trace_utils import Tracer
+
+    try:
+        info = load_run_info(project_dir)
+        generator = CodeGenerator(
+            recorded_model_provider(info, project_dir),
+            cache_mode=CacheMode(cache_mode or get_settings().llm_cache_mode),
+            streaming=info.get("streaming", False),
+            tracer=Tracer() if trace_path else None,
+            phase_mode=info.get("phase_mode", "single"),
+            validate=info.get("validate", False),
+            output=info.get("output", "files")
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    console.print(f"[bold blue]Resuming[/bold blue] {project_dir}")
+    try:
+        asyncio.run(generator.resume(project_dir))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+    finally:
+        print_cache_stats(generator.llm_cache)
+        export_trace(generator.tracer, trace_path)
+
+@main.command()
+@click.argument('project_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('user_input', type=str)
+@click.option('--cache', 'cache_mode',
+    type=click.Choice(['off', 'read', 'write', 'readwrite']),
+    default=None,
+    help='LLM response cache mode (defaults to LLM_CACHE_MODE)'
+)
+@click.option('--trace', 'trace_path',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help='Write per-stage timings and token counts as a Chrome trace (and JSONL next to it)'
+)
+def update(project_dir: str, user_input: str, cache_mode: Optional[str], trace_path: Optional[str]):
+    """Update a full-mode project for a changed description, regenerating only affected files."""
+    from src.config.settings import get_settings
+    from src.generator import CodeGenerator
+    from src.utils.cache_utils import CacheMode
+    from src.utils.checkpoint_utils import load_run_info
+    from src.utils.trace_utils import Tracer
+
+    try:
+        info = load_run_info(project_dir)
+        generator = CodeGenerator(
+            recorded_model_provider(info, project_dir),
+            cache_mode=CacheMode(cache_mode or get_settings().llm_cache_mode),
+            streaming=info.get("streaming", False),
+            tracer=Tracer() if trace_path else None,
+            phase_mode=info.get("phase_mode", "single"),
+            validate=info.get("validate", False),
+            output=info.get("output", "files")
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    console.print(f"[bold blue]Updating[/bold blue] {project_dir}")
+    try:
+        asyncio.run(generator.update(project_dir, user_input))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+    finally:
+        print_cache_stats(generator.llm_cache)
+        export_trace(generator.tracer, trace_path)
+
+@main.command()
+@click.argument('project_dir', type=click.Path(exists=True, file_okay=False))
+def validate(project_dir: str):
+    """Syntax-check the JSON, JS/JSX/TS and SQL files of a project."""
+    from src.utils.validation_utils import collect_project_files, validate_files
+
+    files = collect_project_files(project_dir)
+    start = time.perf_counter()
+    diagnostics = validate_files(files)
+    for found in diagnostics.values():
+        for diagnostic in found:
+            console.print(f"[red]{diagnostic}[/red]")
+    console.print(
+        f"Checked {len(files)} files in {time.perf_counter() - start:.2f}s: "
+        f"{len(diagnostics)} with errors"
+    )
+    if diagnostics:
+        raise SystemExit(1)
+
+@main.command()
+@click.option('--host', default=None, help='Address to listen on (defaults to SERVER_HOST)')
+@click.option('--port', type=int, default=None, help='Port to listen on (defaults to SERVER_PORT)')
+@click.option('--socket', 'socket_path',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Listen on a Unix socket instead of a TCP port (defaults to SERVER_SOCKET)'
+)
+@click.option('--workers',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Number of jobs run at once (defaults to SERVER_WORKERS)'
+)
+@click.option('--preload',
+    type=click.Choice(['openai', 'anthropic', 'mock']),
+    multiple=True,
+    help='Build generators for a model provider at startup (repeatable)'
+)
+def serve(host: Optional[str], port: Optional[int], socket_path: Optional[str], workers: Optional[int], preload: tuple):
+    """Run a local generation daemon that keeps chains warm and runs submitted jobs from a queue."""
+    from src.config.settings import get_settings
+    from src.server import serve as run_server
+
+    settings = get_settings()
+    try:
+        asyncio.run(run_server(
+            host or settings.server_host,
+            port or settings.server_port,
+            socket_path=socket_path or settings.server_socket,
+            workers=workers or settings.server_workers,
+            preload=list(preload)
+        ))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        console.print("Stopped")
+
+# Options of `codegen runs` commands that filter runs by a catalog field
+RUN_FILTERS = (
+    ('--provider', 'provider', 'Only runs of this model provider'),
+    ('--model-name', 'model', 'Only runs of this model name'),
+    ('--mode', 'mode', 'Only runs in this processing mode'),
+    ('--kind', 'kind', 'Only generate, resume or update runs'),
+    ('--status', 'status', 'Only succeeded, failed or cancelled runs'),
+    ('--template', 'template_version', 'Only runs of this template version (hash of the prompts used)'),
+    ('--prompt-hash', 'prompt_hash', 'Only runs of the user input with this hash'),
+    ('--phase-mode', 'phase_mode', 'Only runs in this phase mode'),
+    ('--output', 'output', 'Only runs with this output backend'),
+)
+
+def run_filter_options(command):
+    """Add the catalog filter options, `--prompt` and `--since` to a `codegen runs` command."""
+    for flag, name, help_text in reversed(RUN_FILTERS):
+        command = click.option(flag, name, default=None, help=help_text)(command)
+    command = click.option('--prompt', default=None, help='Only runs of this exact user input')(command)
+    command = click.option('--since', default=None, help='Only runs started within this age, e.g. 30m, 12h or 7d')(command)
+    return command
+
+def run_filters(options: dict) -> dict:
+    from src.utils.catalog_utils import prompt_hash
+
+    filters = {name: options.get(name) for _, name, _ in RUN_FILTERS}
+    if options.get('prompt'):
+        filters['prompt_hash'] = prompt_hash(options['prompt'])
+    return filters
+
+@main.group()
+def runs():
+    """Query the catalog of pipeline runs (RUN_CATALOG_PATH)."""
+
+@runs.command('query')
+@run_filter_options
+@click.option('--group-by', default=None, help='Aggregate runs per value of a field (e.g. provider, template_version, status)')
+@click.option('--limit', type=click.IntRange(min=1), default=20, help='Number of runs listed without --group-by')
+@click.option('--json', 'as_json', is_flag=True, help='Print JSON instead of a table')
+def runs_query(group_by: Optional[str], limit: int, as_json: bool, since: Optional[str], **options):
+    """List recent runs, or aggregate timings, tokens and file counts per field value."""
+    import json
+    from src.utils.catalog_utils import get_run_catalog, parse_since, print_aggregates, print_runs
+
+    catalog = get_run_catalog()
+    start = time.perf_counter()
+    try:
+        filters, started_after = run_filters(options), parse_since(since)
+        if group_by:
+            rows = catalog.aggregate(group_by, filters, started_after)
+        else:
+            rows = catalog.runs(filters, started_after, limit)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+        return
+    if group_by:
+        print_aggregates(group_by, rows)
+    else:
+        print_runs(rows)
+    console.print(f"[dim]Queried {catalog.path} in {elapsed_ms:.1f}ms[/dim]")
+
+@runs.command('compare')
+@click.argument('field')
+@click.argument('first')
+@click.argument('second')
+@run_filter_options
+@click.option('--json', 'as_json', is_flag=True, help='Print JSON instead of a table')
+def runs_compare(field: str, first: str, second: str, as_json: bool, since: Optional[str], **options):
+    """Compare runs with two values of FIELD, e.g. `codegen runs compare provider openai anthropic`."""
+    import json
+    from src.utils.catalog_utils import get_run_catalog, parse_since, print_comparison
+
+    catalog = get_run_catalog()
+    start = time.perf_counter()
+    try:
+        filters, started_after = run_filters(options), parse_since(since)
+        filters.pop(field, None)
+        groups = {
+            str(group["value"]): group
+            for group in catalog.aggregate(field, filters, started_after)
+            if str(group["value"]) in (first, second)
+        }
+        stages = catalog.stage_durations(field, [first, second], filters, started_after)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if as_json:
+        click.echo(json.dumps({"groups": groups, "stages": stages}, indent=2))
+        return
+    print_comparison(field, [first, second], groups, stages)
+    console.print(f"[dim]Queried {catalog.path} in {elapsed_ms:.1f}ms[/dim]")
+
+@main.group()
+def index():
+    """Inspect the similarity index of past user inputs (PROMPT_INDEX_PATH)."""
+
+@index.command('search')
+@click.argument('user_input', type=str)
+@click.option('--limit', type=click.IntRange(min=1), default=5, help='Number of matches to show')
+def index_search(user_input: str, limit: int):
+    """Show the stored inputs most similar to USER_INPUT, across all models and prompt versions."""
+    from src.utils.prompt_index_utils import get_prompt_index
+
+    matches = get_prompt_index().search(user_input, limit=limit)
+    if not matches:
+        console.print("No similar inputs indexed")
+    for match in matches:
+        console.print(f"{match.similarity:6.0%}  {match.user_input}" + (f"  [dim]{match.project_dir}[/dim]" if match.project_dir else ""))
+
+@index.command('stats')
+def index_stats():
+    """Show how many inputs are indexed."""
+    from src.utils.prompt_index_utils import get_prompt_index
+
+    prompt_index = get_prompt_index()
+    counts = prompt_index.stats()
+    console.print(f"Prompt index: {prompt_index.path}")
+    console.print(f"{counts['prompts']} inputs, {counts['shingles']} shingle entries")
+
+@index.command('clear')
+def index_clear():
+    """Delete every indexed input and its requirements."""
+    from src.utils.prompt_index_utils import get_prompt_index
+
+    console.print(f"Removed {get_prompt_index().clear()} indexed inputs")
+
+@main.group()
+def store():
+    """Manage the blob store shared by projects written with `--output store`."""
+
+@store.command('stats')
+def store_stats():
+    """Show how many blobs the store holds and how many project files link to them."""
+    from src.config.settings import get_settings
+    from src.utils.output_utils import BlobStore
+
+    root = get_settings().blob_store_dir
+    counts = BlobStore(root).stats()
+    console.print(f"Blob store: {root}")
+    console.print(
+        f"{counts['blobs']} blobs, {counts['bytes'] / 1e6:.1f} MB, "
+        f"{counts['links']} project file links, {counts['unreferenced']} unreferenced"
+    )
+
+@store.command('gc')
+def store_gc():
+    """Delete blobs no project links to any more."""
+    from src.config.settings import get_settings
+    from src.utils.output_utils import BlobStore
+
+    counts = BlobStore(get_settings().blob_store_dir).collect()
+    console.print(f"Removed {counts['blobs']} unreferenced blobs ({counts['bytes'] / 1e6:.1f} MB)")
+
+@store.command('detach')
+@click.argument('project_dir', type=click.Path(exists=True, file_okay=False))
+def store_detach(project_dir: str):
+    """Replace a project's links into the store with ordinary writable copies, e.g. before editing it."""
+    from src.utils.output_utils import detach_tree
+
+    console.print(f"Detached {detach_tree(project_dir)} files in {project_dir}")
+
+@main.group()
+def scaffold():
+    """Manage the prebuilt project scaffold."""
+
+@scaffold.command('build')
+@click.option('--force', is_flag=True, help='Rebuild even if the current scaffold version exists')
+def scaffold_build(force: bool):
+    """Write the scaffold files and install their dependencies into the scaffold store."""
+    from src.utils.scaffold_utils import build_scaffold
+
+    try:
+        build_scaffold(force=force)
+    except Exception as e:
+        raise click.ClickException(f"Scaffold build failed: {str(e)}")
+
+@scaffold.command('path')
+def scaffold_show_path():
+    """Print the store directory of the current scaffold version."""
+    from src.utils.scaffold_utils import is_scaffold_built, scaffold_path
+
+    path = scaffold_path()
+    click.echo(path if is_scaffold_built(path) else f"{path} (not built)")
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main() 
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class ModelProvider(str, Enum):
+    OPENAI = "openai"
+    ANTHROPIC = "anthropic"
+    # Offline model for benchmarks and tests; needs no network or API key
+    MOCK = "mock"
@@ -1,12 +1,139 @@
+from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings
 import os
 
 class Settings(BaseSettings):
-    openai_api_key: str
-    anthropic_api_key: str
+    # API keys are only required for the provider that is actually used
+    openai_api_key: Optional[str] = None
+    anthropic_api_key: Optional[str] = None
+    openai_model: str = "gpt-4-0125-preview"
+    anthropic_model: str = "claude-3-sonnet-20240229"
     project_output_dir: str = os.path.join(os.getcwd(), "generated_projects")
 
+    # Shared HTTP connection pool for LLM clients
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 900.0
+
+    # Resilient LLM calls: per-attempt timeout, retries with jittered exponential backoff on
+    # rate limits and transient errors, optional hedging once a call is slower than the given
+    # latency percentile of recent calls, and failover to another provider
+    llm_attempt_timeout: Optional[float] = None
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_hedge_percentile: Optional[float] = None
+    llm_hedge_min_samples: int = 20
+    llm_failover_provider: Optional[str] = None
+    # OpenAI-compatible endpoint override (e.g. the local fault-injection server)
+    openai_base_url: Optional[str] = None
+
+    # Per-stage timeouts in seconds
+    functional_requirements_timeout: float = 300.0
+    technical_requirements_timeout: float = 300.0
+    code_generation_timeout: float = 900.0
+
+    # Send each code generation phase only the requirements sections it declares
+    phase_section_filter: bool = True
+
+    # Phase generation: one response per phase (`single`), or a file manifest followed by
+    # concurrent requests for `fanout_files_per_request` files each (`fanout`)
+    phase_generation_mode: str = "single"
+    fanout_concurrency: int = 8
+    fanout_files_per_request: int = 1
+
+    # Syntax validation of generated files after each phase (JSON, JS/JSX/TS, SQL) in a process
+    # pool (defaults to one worker per CPU); failing files are regenerated up to the given rounds
+    validate_generated_files: bool = True
+    validation_workers: Optional[int] = None
+    validation_repair_rounds: int = 1
+
+    # Number of threads used to write generated files
+    file_writer_workers: int = 8
+
+    # Generated project output: plain files (`files`), hardlinks into a content-addressed blob
+    # store shared by all projects (`store`) or one streamed .tar.gz per project (`archive`)
+    output_backend: str = "files"
+    blob_store_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "codegen", "blobs")
+    archive_compression_level: int = 6
+
+    # Setup commands
+    command_jobs: int = 4
+    package_cache_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "codegen", "packages")
+
+    # Prebuilt project scaffold with installed dependencies (`codegen scaffold build`)
+    use_scaffold: bool = True
+    scaffold_store_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "codegen", "scaffolds")
+    scaffold_link_mode: str = "auto"
+
+    # Catalog of every pipeline run (`codegen runs query` / `codegen runs compare`)
+    run_catalog: bool = True
+    run_catalog_path: str = os.path.join(os.getcwd(), ".codegen_cache", "runs.sqlite")
+
+    # Similarity index of past user inputs and their functional requirements. With requirements
+    # reuse on, an input at least `requirements_reuse_threshold` similar (Jaccard of word shingles)
+    # to a stored one reuses its requirements as they are, and one at least
+    # `requirements_draft_threshold` similar revises them as a draft
+    prompt_index: bool = True
+    prompt_index_path: str = os.path.join(os.getcwd(), ".codegen_cache", "prompt_index.sqlite")
+    reuse_requirements: bool = False
+    requirements_reuse_threshold: float = 0.9
+    requirements_draft_threshold: float = 0.5
+
+    # LLM response cache
+    llm_cache_mode: str = "off"
+    llm_cache_path: str = os.path.join(os.getcwd(), ".codegen_cache", "llm_cache.sqlite")
+    llm_cache_max_size_mb: int = 512
+    llm_cache_max_age_days: float = 30.0
+
+    # Chain memory: token budget per chain, beyond which the oldest turns are dropped
+    functional_memory_max_tokens: int = 2000
+    technical_memory_max_tokens: int = 2000
+    code_generation_memory_max_tokens: int = 4000
+
+    # Batch mode
+    batch_concurrency: int = 4
+    openai_requests_per_minute: int = 500
+    openai_tokens_per_minute: int = 300000
+    anthropic_requests_per_minute: int = 50
+    anthropic_tokens_per_minute: int = 40000
+    mock_requests_per_minute: int = 1000000
+    mock_tokens_per_minute: int = 1000000000
+
+    # `codegen serve`: local daemon on a TCP port or a Unix socket, running queued jobs on warm
+    # generators with up to `server_workers` jobs at once
+    server_host: str = "127.0.0.1"
+    server_port: int = 8765
+    server_socket: Optional[str] = None
+    server_workers: int = 16
+    server_job_history: int = 1000
+
+    # Mock provider (`--model mock`): replayed or synthetic responses
+    mock_latency: float = 0.5
+    mock_files_per_phase: int = 20
+    mock_file_size: int = 2000
+    mock_replay_dir: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
-settings = Settings() 
\ No newline at end of file
+    def get_api_key(self, provider: str) -> str:
+        """Return the API key for a provider, failing with a clear message if it is missing."""
+        provider = getattr(provider, "value", provider)
+        api_key = getattr(self, f"{provider}_api_key", None)
+        if not api_key:
+            raise ValueError(f"{provider.upper()}_API_KEY is not set; add it to your environment or .env file")
+        return api_key
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Load settings on first use rather than at import time."""
+    return Settings()
+
+def __getattr__(name: str):
+    # Keeps `from src.config.settings import settings` working without loading at import time
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,1070 @@
+import asyncio
+import dataclasses
+import json
+import sqlite3
+import time
+from contextlib import nullcontext
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn
+from datetime import datetime
+import uuid
+import os
+from src.chains.requirements_chain import create_requirements_chain
+from src.chains.code_generation_chain import (
+    create_code_generation_chain,
+    create_file_generation_chain,
+    create_file_repair_chain,
+    create_manifest_chain
+)
+from src.chains.llm_registry import get_model_name
+from src.chains.update_chain import UPDATE_CHAINS, create_update_chain
+from src.config.providers import ModelProvider
+from src.config.settings import get_settings
+from src.prompts.code_generation_prompts import PHASES, PHASE_SECTIONS
+from src.utils.diff_utils import affected_phases, changed_sections, document_diff
+from src.utils.fanout_utils import format_manifest, group_files, merge_file_responses, parse_file_manifest
+from src.utils.file_utils import (
+    apply_code_structure,
+    parse_code_structure,
+    process_code_structure,
+    remove_files,
+    write_files
+)
+from src.utils.command_utils import CommandRunner
+from src.utils.stream_utils import IncrementalFilesParser, StreamedFilesWriter, StreamingFilesHandler
+from src.utils.cache_utils import CacheMode, get_llm_cache
+from src.utils.catalog_utils import get_run_catalog, prompt_hash, summarize_spans
+from src.utils.checkpoint_utils import (
+    CheckpointStore,
+    clear_pending_update,
+    hash_value,
+    load_pending_update,
+    load_run_info,
+    save_pending_update,
+    save_run_info
+)
+from src.utils.memory_utils import code_structure_manifest, reset_memory
+from src.utils.prompt_index_utils import PromptMatch, get_prompt_index
+from src.utils.output_utils import (
+    BlobStore,
+    OutputBackend,
+    ProjectArchive,
+    ProjectOutput,
+    attach_output,
+    detach_output
+)
+from src.utils.rate_limit_utils import get_rate_limiter
+from src.utils.resilience_utils import CallPolicy, call_with_resilience
+from src.utils.scheduler_utils import Stage, run_stages
+from src.utils.scaffold_utils import (
+    is_redundant_command,
+    is_scaffold_built,
+    materialize_scaffold,
+    scaffold_instructions,
+    scaffold_path
+)
+from src.utils.section_utils import select_sections
+from src.utils.token_utils import estimate_tokens
+from src.utils.trace_utils import LLMSpanHandler, Span, Tracer, current_span, trace_span
+from src.utils.validation_utils import validate_files
+
+class ProcessingMode(str, Enum):
+    REQUIREMENTS = "requirements"
+    CODE = "code"
+    FULL = "full"
+
+class PhaseMode(str, Enum):
+    SINGLE = "single"
+    FANOUT = "fanout"
+
+# Requirements stage -> document written into the project
+REQUIREMENTS_DOCS = {
+    "functional_requirements": "docs/functional_requirements.md",
+    "technical_requirements": "docs/technical_requirements.md"
+}
+
+def apply_repairs(generated: Any, validated: Optional[Dict[str, Any]]) -> Any:
+    """A phase's generated output with the files its validation repaired.
+
+    Validation only keeps its diagnostics and the files it changed, so the phase's files are
+    checkpointed once, by its generate stage.
+    """
+    repaired = (validated or {}).get("repaired")
+    if not repaired:
+        return generated
+    structure = dict(generated) if isinstance(generated, dict) else parse_code_structure(generated)
+    structure["files"] = {**structure.get("files", {}), **repaired}
+    if "update" in structure:
+        structure["update"] = {**structure["update"], "files": {**structure["update"].get("files", {}), **repaired}}
+    return structure
+
+class CodeGenerator:
+    def __init__(
+        self,
+        model_provider: ModelProvider = ModelProvider.OPENAI,
+        quiet: bool = False,
+        cache_mode: CacheMode = CacheMode.OFF,
+        streaming: bool = False,
+        tracer: Optional[Tracer] = None,
+        use_scaffold: Optional[bool] = None,
+        phase_mode: Optional[str] = None,
+        validate: Optional[bool] = None,
+        output: Optional[str] = None,
+        reuse_requirements: Optional[bool] = None
+    ):
+        self.llm_cache = get_llm_cache(cache_mode)
+        self.requirements_chain = create_requirements_chain(model_provider, cache=self.llm_cache)
+        self.code_gen_chain = create_code_generation_chain(model_provider, cache=self.llm_cache, streaming=streaming)
+        self.streaming = streaming
+        self.console = Console(quiet=quiet)
+        self.quiet = quiet
+        self.project_dir = None
+        self.command_runner = None
+        self.model_provider = ModelProvider(model_provider)
+        self.model_name = get_model_name(self.model_provider)
+        self.tracer = tracer
+        self.use_scaffold = get_settings().use_scaffold if use_scaffold is None else use_scaffold
+        self.scaffold = ""
+        self.phase_mode = PhaseMode(phase_mode or get_settings().phase_generation_mode)
+        self.validate = get_settings().validate_generated_files if validate is None else validate
+        self.output_backend = OutputBackend(output or get_settings().output_backend)
+        self.output: Optional[ProjectOutput] = None
+        self.output_run: Optional[str] = None
+        self.reuse_requirements = get_settings().reuse_requirements if reuse_requirements is None else reuse_requirements
+        # Receives (event, details) for each stage and the project directory, e.g. for `codegen serve`
+        self.on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+        # Writers of the files streamed by each phase of the current run
+        self.stream_writers: Dict[str, StreamedFilesWriter] = {}
+
+        self.call_policy = CallPolicy.from_settings()
+        self._chains: Dict[ModelProvider, Dict[str, Any]] = {
+            self.model_provider: {
+                "functional": self.requirements_chain.chains[0],
+                "technical": self.requirements_chain.chains[1],
+                "code": self.code_gen_chain
+            }
+        }
+        self.providers = [self.model_provider]
+        failover = self.call_policy.failover_provider
+        if failover and ModelProvider(failover) != self.model_provider:
+            try:
+                self.chains_for(ModelProvider(failover))
+                self.providers.append(ModelProvider(failover))
+            except ValueError as e:
+                self.console.print(f"[yellow]Failover to {failover} disabled:[/yellow] {str(e)}")
+
+    def chains_for(self, provider: ModelProvider) -> Dict[str, Any]:
+        """The functional, technical and code chains backed by a provider, created on first use."""
+        if provider not in self._chains:
+            requirements_chain = create_requirements_chain(provider, cache=self.llm_cache)
+            self._chains[provider] = {
+                "functional": requirements_chain.chains[0],
+                "technical": requirements_chain.chains[1],
+                "code": create_code_generation_chain(provider, cache=self.llm_cache, streaming=self.streaming)
+            }
+        return self._chains[provider]
+
+    def get_chain(self, provider: ModelProvider, name: str):
+        """A chain backed by a provider; fan-out and update chains are only created when first used."""
+        chains = self.chains_for(provider)
+        if name not in chains:
+            if name == "manifest":
+                chains[name] = create_manifest_chain(provider, cache=self.llm_cache)
+            elif name == "file":
+                chains[name] = create_file_generation_chain(provider, cache=self.llm_cache)
+            elif name == "file_repair":
+                chains[name] = create_file_repair_chain(provider, cache=self.llm_cache)
+            elif name in UPDATE_CHAINS:
+                chains[name] = create_update_chain(name, provider, cache=self.llm_cache)
+            else:
+                raise KeyError(f"Unknown chain: {name}")
+        return chains[name]
+
+    def create_project_directory(self) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_id = str(uuid.uuid4())[:8]
+        project_name = f"project_{timestamp}_{unique_id}"
+        
+        project_dir = os.path.join(get_settings().project_output_dir, project_name)
+        os.makedirs(project_dir, exist_ok=True)
+        
+        if self.output_backend != OutputBackend.ARCHIVE:
+            docs_dir = os.path.join(project_dir, "docs")
+            os.makedirs(docs_dir, exist_ok=True)
+        
+        return project_dir
+
+    def apply_scaffold(self) -> bool:
+        """Materialize the prebuilt scaffold into the project directory, if one has been built."""
+        source = scaffold_path()
+        if not is_scaffold_built(source):
+            self.console.print("[yellow]No prebuilt scaffold found; run `codegen scaffold build` to create one[/yellow]")
+            return False
+        with trace_span("scaffold", category="io") as span:
+            counts = materialize_scaffold(source, self.project_dir)
+            if span is not None:
+                span.attributes.update(counts)
+        summary = ", ".join(f"{count} {method}" for method, count in sorted(counts.items()))
+        self.console.print(f"[green]✓[/green] Scaffold materialized ({summary})")
+        return True
+
+    async def _call_chain(
+        self,
+        chain_name: str,
+        inputs: dict,
+        stage: str,
+        timeout: float,
+        callbacks_factory: Optional[Callable[[], list]] = None
+    ) -> str:
+        """Run a chain under the provider rate limit and a stage timeout, retrying, hedging and
+        failing over per the call policy. `callbacks_factory` gives each attempt fresh callbacks."""
+        with trace_span(stage, category="llm", provider=self.model_provider.value) as span:
+
+            async def attempt(provider: ModelProvider) -> str:
+                chain = self.get_chain(provider, chain_name)
+                rate_limiter = get_rate_limiter(provider)
+                prompt_inputs = {key: inputs[key] for key in chain.prompt.input_variables}
+                wait_start = time.perf_counter()
+                await rate_limiter.acquire(estimate_tokens(chain.prompt.format(**prompt_inputs)))
+                callbacks = callbacks_factory() if callbacks_factory else []
+                if span is not None:
+                    span.increment("rate_limit_wait_ms", (time.perf_counter() - wait_start) * 1000)
+                    callbacks.append(LLMSpanHandler(span))
+                result = await chain.ainvoke(inputs, config={"callbacks": callbacks})
+                output = result[chain.output_key]
+                rate_limiter.record(estimate_tokens(output))
+                return output
+
+            def on_event(event: str, details: dict) -> None:
+                if event == "retry":
+                    self.console.print(
+                        f"[yellow]{stage}: retrying in {details['delay_s']:.1f}s[/yellow] ({details['error']})"
+                    )
+                elif event == "failover":
+                    self.console.print(f"[yellow]{stage}: failing over to {details['provider']}[/yellow]")
+                if span is not None:
+                    span.increment({"retry": "retries", "hedge": "hedges", "failover": "failovers"}[event])
+
+            try:
+                return await asyncio.wait_for(
+                    call_with_resilience(
+                        attempt,
+                        self.providers,
+                        key=stage,
+                        policy=self.call_policy,
+                        # Concurrent copies of a streamed call would feed the same parser
+                        can_hedge=callbacks_factory is None,
+                        on_event=on_event
+                    ),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{stage} timed out after {timeout:g}s") from None
+
+    def build_stages(
+        self,
+        user_input: str,
+        mode: ProcessingMode,
+        progress: Progress,
+        previous: Optional[Dict[str, Any]] = None
+    ) -> List[Stage]:
+        """Declare the pipeline stages and the data each one depends on.
+
+        With `previous` stage outputs (`codegen update`), the requirements are revised instead of
+        rewritten and only the files of phases touched by the changes are regenerated.
+        """
+        console = self.console
+        settings = get_settings()
+        previous = previous or {}
+        # Streamed files of a phase are written once the previous phase has been applied, so
+        # phases still reach the project in order
+        write_gates = {phase: asyncio.Event() for phase in PHASES}
+        write_gates[PHASES[0]].set()
+        self.stream_writers = {}
+
+        async def generate_functional(inputs):
+            task = progress.add_task("Generating functional requirements...", total=None)
+            match = None
+            if "functional_requirements" in previous:
+                chain_name = "functional_update"
+                chain_inputs = {"current_document": previous["functional_requirements"], "user_input": user_input}
+            else:
+                chain_name, chain_inputs = "functional", {"user_input": user_input}
+                if self.reuse_requirements:
+                    match = await asyncio.to_thread(self.similar_requirements, user_input)
+            if match is not None and match.similarity >= settings.requirements_reuse_threshold:
+                func_result = match.functional_requirements
+                console.print(
+                    f"\n[green]✓[/green] Reusing the functional requirements of a {match.similarity:.0%} similar "
+                    f"request: {match.user_input}"
+                )
+            else:
+                if match is not None:
+                    # Revise the similar request's requirements instead of starting from scratch
+                    console.print(
+                        f"\n[green]✓[/green] Drafting from the functional requirements of a {match.similarity:.0%} "
+                        f"similar request: {match.user_input}"
+                    )
+                    chain_name = "functional_update"
+                    chain_inputs = {"current_document": match.functional_requirements, "user_input": user_input}
+                func_result = await self._call_chain(
+                    chain_name,
+                    chain_inputs,
+                    stage="Functional requirements",
+                    timeout=settings.functional_requirements_timeout
+                )
+                if settings.prompt_index:
+                    await asyncio.to_thread(self.index_requirements, user_input, func_result)
+            progress.update(task, completed=True)
+            console.print("\n[green]✓[/green] Functional Requirements Generated")
+            console.print(func_result)
+            if self.project_dir:
+                await asyncio.to_thread(write_files, {REQUIREMENTS_DOCS["functional_requirements"]: func_result}, self.project_dir)
+            return func_result
+
+        async def generate_technical(inputs):
+            task = progress.add_task("Generating technical requirements...", total=None)
+            functional = inputs["functional_requirements"]
+            if "technical_requirements" in previous:
+                chain_name = "technical_update"
+                chain_inputs = {
+                    "current_document": previous["technical_requirements"],
+                    "functional_requirements": functional,
+                    "requirements_changes": document_diff(
+                        previous.get("functional_requirements", ""), functional, "Functional Requirements"
+                    ) or "(none)"
+                }
+            else:
+                chain_name, chain_inputs = "technical", {"functional_requirements": functional}
+            tech_result = await self._call_chain(
+                chain_name,
+                chain_inputs,
+                stage="Technical requirements",
+                timeout=settings.technical_requirements_timeout
+            )
+            progress.update(task, completed=True)
+            console.print("\n[green]✓[/green] Technical Requirements Generated")
+            console.print(tech_result)
+            if self.project_dir:
+                await asyncio.to_thread(write_files, {REQUIREMENTS_DOCS["technical_requirements"]: tech_result}, self.project_dir)
+            return tech_result
+
+        def phase_context(phase: str, inputs) -> dict:
+            """Requirements sections the phase declares, with the input-token reduction reported."""
+            context = {key: inputs[key] for key in ("functional_requirements", "technical_requirements")}
+            if not settings.phase_section_filter:
+                return context
+            full_tokens = sum(estimate_tokens(text) for text in context.values())
+            for key, names in PHASE_SECTIONS.get(phase, {}).items():
+                context[key] = select_sections(context[key], names)
+            sent_tokens = sum(estimate_tokens(text) for text in context.values())
+
+            reduction = 1 - sent_tokens / full_tokens if full_tokens else 0.0
+            console.print(
+                f"[dim]{phase} requirements context: {full_tokens} -> {sent_tokens} tokens "
+                f"({reduction:.0%} smaller)[/dim]"
+            )
+            span = current_span()
+            if span is not None:
+                span.attributes.update(context_tokens_full=full_tokens, context_tokens_sent=sent_tokens)
+            return context
+
+        # Bounds the per-file requests of all fan-out phases together
+        file_slots = asyncio.Semaphore(max(settings.fanout_concurrency, 1))
+
+        async def generate_planned_files(
+            phase: str,
+            chain_name: str,
+            plan: dict,
+            inputs: dict,
+            group_inputs: Optional[Callable[[List[dict]], dict]] = None
+        ) -> dict:
+            """Write the files of a manifest or update plan with concurrent requests and merge them
+            into a code structure. `group_inputs` adds per-request prompt inputs."""
+            manifest_text = format_manifest(plan["files"])
+
+            async def write_group(group: List[dict]) -> str:
+                extra = group_inputs(group) if group_inputs else {}
+                async with file_slots:
+                    response = await self._call_chain(
+                        chain_name,
+                        {**inputs, **extra, "manifest": manifest_text, "files": format_manifest(group)},
+                        stage=f"{phase} files",
+                        timeout=settings.code_generation_timeout
+                    )
+                progress.advance(task)
+                return response
+
+            groups = group_files(plan["files"], settings.fanout_files_per_request)
+            task = progress.add_task(f"Writing {len(plan['files'])} {phase} files...", total=len(groups))
+            responses = await asyncio.gather(*(write_group(group) for group in groups))
+            structure, missing = merge_file_responses(plan, responses)
+
+            if missing:
+                # Ask once more for files a grouped response left out, one file per request
+                entries = [entry for entry in plan["files"] if entry["path"] in missing]
+                progress.update(task, total=len(groups) + len(entries))
+                responses += await asyncio.gather(*(write_group([entry]) for entry in entries))
+                structure, missing = merge_file_responses(plan, responses)
+            if missing:
+                console.print(f"[yellow]Warning:[/yellow] {phase} is missing {len(missing)} files: {', '.join(missing)}")
+
+            span = current_span()
+            if span is not None:
+                span.attributes.update(files=len(structure["files"]), requests=len(responses))
+            return structure
+
+        async def generate_phase_fanout(phase: str, context: dict) -> dict:
+            """Plan the phase as a file manifest, then write its files with concurrent requests."""
+            task = progress.add_task(f"Planning {phase} files...", total=None)
+            inputs = {**context, "phase": phase, "scaffold": self.scaffold}
+            manifest_result = await self._call_chain(
+                "manifest",
+                inputs,
+                stage=f"{phase} manifest",
+                timeout=settings.code_generation_timeout
+            )
+            manifest = parse_file_manifest(manifest_result)
+            progress.update(task, completed=True)
+            return await generate_planned_files(phase, "file", manifest, inputs)
+
+        async def update_phase(phase: str, inputs) -> dict:
+            """Regenerate only the files of an existing phase that the requirements changes touch."""
+            current = previous[f"generate:{phase}"]
+            structure = current if isinstance(current, dict) else parse_code_structure(current)
+            structure = {key: value for key, value in structure.items() if key != "update"}
+            files = structure.get("files", {})
+            keys = ("functional_requirements", "technical_requirements")
+            changes = {key: changed_sections(previous.get(key, ""), inputs[key]) for key in keys}
+            if not affected_phases(changes, PHASE_SECTIONS if settings.phase_section_filter else {}, [phase]):
+                console.print(f"\n[green]✓[/green] {phase} unaffected by the changes ({len(files)} files kept)")
+                return {**structure, "update": {}}
+
+            diffs = [document_diff(previous.get(key, ""), inputs[key], key.replace("_", " ").title()) for key in keys]
+            context = {
+                **phase_context(phase, inputs),
+                "phase": phase,
+                "scaffold": self.scaffold,
+                "requirements_changes": "\n\n".join(diff for diff in diffs if diff)
+            }
+            task = progress.add_task(f"Planning {phase} changes...", total=None)
+            plan_result = await self._call_chain(
+                "update_plan",
+                {**context, "current_files": code_structure_manifest(json.dumps({"files": files}))},
+                stage=f"{phase} update plan",
+                timeout=settings.code_generation_timeout
+            )
+            plan = parse_file_manifest(plan_result, allow_empty=True)
+            progress.update(task, completed=True)
+
+            def existing_files(group: List[dict]) -> dict:
+                # The files on disk, which may have been edited since they were generated
+                parts = []
+                for entry in group:
+                    full_path = os.path.join(self.project_dir, entry["path"])
+                    content = files.get(entry["path"])
+                    if os.path.isfile(full_path):
+                        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                            content = f.read()
+                    if content is not None:
+                        parts.append(f"--- {entry['path']}\n{content}")
+                return {"existing_files": "\n\n".join(parts) or "(none)"}
+
+            written = {}
+            if plan["files"]:
+                written = (await generate_planned_files(phase, "file_update", plan, context, existing_files))["files"]
+            deleted = [path for path in plan["delete"] if path in files]
+            commands = structure.get("commands", [])
+            # The phase output keeps the full structure for later updates, and the changes to apply
+            changes = {
+                "folders": plan["folders"],
+                "files": written,
+                "delete": deleted,
+                # Dependencies installed by earlier runs stay in place
+                "commands": [command for command in plan["commands"] if command not in commands]
+            }
+            kept = len([path for path in files if path not in written and path not in deleted])
+            console.print(
+                f"\n[green]✓[/green] {phase} updated: {len(written)} files written, "
+                f"{len(deleted)} removed, {kept} kept"
+            )
+            return {
+                "folders": list(dict.fromkeys(structure.get("folders", []) + plan["folders"])),
+                "files": {**{path: content for path, content in files.items() if path not in deleted}, **written},
+                "commands": commands + changes["commands"],
+                "update": changes
+            }
+
+        def generate_phase(phase: str):
+            async def run(inputs):
+                if f"generate:{phase}" in previous:
+                    return await update_phase(phase, inputs)
+                if self.phase_mode == PhaseMode.FANOUT:
+                    code_result = await generate_phase_fanout(phase, phase_context(phase, inputs))
+                    console.print(f"\n[green]✓[/green] {phase} Code Generated ({len(code_result['files'])} files)")
+                    return code_result
+
+                task = progress.add_task(f"Generating code for {phase}...", total=None)
+
+                # When streaming a full project, each file is written as soon as it closes in the
+                # stream (once the previous phase has been applied); the apply stage then runs the
+                # phase's commands and skips the files already written
+                parser = None
+                writer = None
+
+                def on_file(path: str, content: str) -> None:
+                    writer.add(path, content)
+                    progress.update(task, description=f"Generating code for {phase}... ({len(parser.files)} files)")
+
+                def stream_callbacks():
+                    # A retried attempt starts parsing its own stream from scratch
+                    nonlocal parser, writer
+                    parser = IncrementalFilesParser()
+                    if writer is None:
+                        writer = StreamedFilesWriter(
+                            lambda files: write_files(files, self.project_dir, quiet=True),
+                            write_gates[phase]
+                        )
+                        self.stream_writers[phase] = writer
+                    return [StreamingFilesHandler(parser, on_file)]
+
+                code_result = await self._call_chain(
+                    "code",
+                    {**phase_context(phase, inputs), "phase": phase, "scaffold": self.scaffold},
+                    stage=f"{phase} code generation",
+                    timeout=settings.code_generation_timeout,
+                    callbacks_factory=stream_callbacks if self.streaming and mode == ProcessingMode.FULL else None
+                )
+                if writer is not None:
+                    writer.close()
+                progress.update(task, completed=True)
+                console.print(f"\n[green]✓[/green] {phase} Code Generated")
+
+                if parser is None or not parser.started:
+                    if mode == ProcessingMode.FULL and self.output_backend == OutputBackend.STORE:
+                        # Checkpointed as its files, so their bodies share the project files' blobs
+                        return await asyncio.to_thread(parsed_response, code_result)
+                    # Not streamed (or served from the cache): apply the full response later
+                    return code_result
+                return await asyncio.to_thread(streamed_structure, phase, parser, code_result)
+            return run
+
+        def parsed_response(code_result: str) -> Any:
+            try:
+                return parse_code_structure(code_result)
+            except ValueError:
+                # Applying the raw response reports the parse error
+                return code_result
+
+        def streamed_structure(phase: str, parser: IncrementalFilesParser, code_result: str) -> Any:
+            """The code structure of a streamed response.
+
+            When the streamed document closed, the parser has seen all of it, so its structure is
+            used instead of parsing the response a second time. Otherwise (no files under the
+            expected keys, or a truncated response) the full response is parsed, and the streamed
+            files are kept if that fails too.
+            """
+            if parser.complete and parser.files:
+                return parser.structure()
+            try:
+                return parse_code_structure(code_result)
+            except ValueError:
+                if not parser.files:
+                    # Nothing salvageable; applying the raw response reports the parse error
+                    return code_result
+                console.print(
+                    f"[yellow]Warning:[/yellow] {phase} response was truncated; "
+                    f"kept {len(parser.files)} completed files and skipped its commands"
+                )
+                return {**parser.structure(), "commands": []}
+
+        def format_contents(files: Dict[str, str]) -> str:
+            return "\n\n".join(f"--- {path}\n{content}" for path, content in files.items()) or "(none)"
+
+        def validate_phase(phase: str):
+            async def run(inputs):
+                """Check the syntax of the phase's new files and regenerate only those that fail."""
+                code_result = inputs[f"generate:{phase}"]
+                structure = code_result if isinstance(code_result, dict) else parse_code_structure(code_result)
+                # Updates only need their rewritten files checked
+                files = dict(structure["update"].get("files", {}) if "update" in structure else structure.get("files", {}))
+
+                diagnostics = await asyncio.to_thread(validate_files, files)
+                failing = len(diagnostics)
+                repaired_paths = set()
+                for _ in range(settings.validation_repair_rounds):
+                    if not diagnostics:
+                        break
+                    plan = {
+                        "folders": [],
+                        "files": [
+                            {"path": path, "spec": "; ".join(f"line {d.line}: {d.message}" for d in found)}
+                            for path, found in diagnostics.items()
+                        ],
+                        "commands": []
+                    }
+                    rewritten = (await generate_planned_files(
+                        phase,
+                        "file_repair",
+                        plan,
+                        {"phase": phase},
+                        lambda group: {"existing_files": format_contents({e["path"]: files[e["path"]] for e in group})}
+                    ))["files"]
+                    remaining = await asyncio.to_thread(validate_files, rewritten)
+                    for path, content in rewritten.items():
+                        if path not in remaining:
+                            files[path] = content
+                            del diagnostics[path]
+                            repaired_paths.add(path)
+
+                # The checkpoint holds only the repaired files; apply merges them into the phase
+                result = {
+                    "repaired": {path: files[path] for path in sorted(repaired_paths)},
+                    "diagnostics": {path: [d.to_dict() for d in found] for path, found in diagnostics.items()}
+                }
+
+                console.print(
+                    f"\n[green]✓[/green] {phase} validated: {len(files)} files, {failing} failing"
+                    + (f", {len(repaired_paths)} repaired" if failing else "")
+                )
+                for found in diagnostics.values():
+                    for diagnostic in found:
+                        console.print(f"[yellow]Warning:[/yellow] {diagnostic}")
+                span = current_span()
+                if span is not None:
+                    span.attributes.update(failing=failing, repaired=len(repaired_paths))
+                return result
+            return run
+
+        def apply_phase(phase: str):
+            async def run(inputs):
+                task = progress.add_task(f"Processing {phase} code files...", total=None)
+                # The previous phase is applied (or restored) by now; finish writing streamed files
+                write_gates[phase].set()
+                writer = self.stream_writers.get(phase)
+                if writer is not None:
+                    try:
+                        await writer.wait()
+                    except Exception as e:
+                        console.print(f"[yellow]Streamed {phase} files not written early:[/yellow] {str(e)}")
+                code_result = apply_repairs(inputs[f"generate:{phase}"], inputs.get(f"validate:{phase}"))
+                if isinstance(code_result, dict) and "update" in code_result:
+                    # Updates only touch the files they rewrote or removed
+                    changes = code_result["update"]
+                    await asyncio.to_thread(apply_code_structure, changes, self.project_dir, self.command_runner)
+                    if changes.get("delete"):
+                        await asyncio.to_thread(remove_files, changes["delete"], self.project_dir)
+                elif isinstance(code_result, dict):
+                    # Streamed and fan-out phases are already parsed
+                    await asyncio.to_thread(apply_code_structure, code_result, self.project_dir, self.command_runner)
+                else:
+                    await asyncio.to_thread(
+                        process_code_structure,
+                        code_result,
+                        base_path=self.project_dir,
+                        command_runner=self.command_runner
+                    )
+                progress.update(task, completed=True)
+                index = PHASES.index(phase)
+                if index + 1 < len(PHASES):
+                    write_gates[PHASES[index + 1]].set()
+            return run
+
+        # Checkpoints are reused only if the model, prompt and stage-specific inputs are unchanged
+        functional_chain, technical_chain = self.requirements_chain.chains
+        stages = [
+            Stage("functional_requirements", generate_functional, fingerprint={
+                "user_input": user_input,
+                "model": self.model_name,
+                "prompt": hash_value(functional_chain.prompt.template)
+            }),
+            Stage("technical_requirements", generate_technical, ["functional_requirements"], fingerprint={
+                "model": self.model_name,
+                "prompt": hash_value(technical_chain.prompt.template)
+            }),
+        ]
+
+        if mode in [ProcessingMode.CODE, ProcessingMode.FULL]:
+            # Phases only depend on the requirements, so they are generated concurrently
+            previous_apply = []
+            for phase in PHASES:
+                stages.append(Stage(
+                    f"generate:{phase}",
+                    generate_phase(phase),
+                    ["functional_requirements", "technical_requirements"],
+                    fingerprint={
+                        "phase": phase,
+                        "model": self.model_name,
+                        "prompt": hash_value(self.code_gen_chain.prompt.template),
+                        "sections": PHASE_SECTIONS.get(phase) if settings.phase_section_filter else None,
+                        "scaffold": self.scaffold,
+                        "phase_mode": self.phase_mode.value,
+                        "fanout_prompts": [
+                            hash_value(self.get_chain(self.model_provider, name).prompt.template)
+                            for name in ("manifest", "file")
+                        ] if self.phase_mode == PhaseMode.FANOUT else None
+                    }
+                ))
+
+                applied = [f"generate:{phase}"]
+                if self.validate:
+                    stages.append(Stage(
+                        f"validate:{phase}",
+                        validate_phase(phase),
+                        [f"generate:{phase}"],
+                        fingerprint={
+                            "model": self.model_name,
+                            "prompt": hash_value(self.get_chain(self.model_provider, "file_repair").prompt.template),
+                            "rounds": settings.validation_repair_rounds
+                        }
+                    ))
+                    applied.append(f"validate:{phase}")
+
+                if mode == ProcessingMode.FULL:
+                    # Files and commands are still applied to disk in phase order. Every run
+                    # streams a new archive, so archived phases are applied again
+                    stages.append(Stage(
+                        f"apply:{phase}",
+                        apply_phase(phase),
+                        applied + previous_apply,
+                        fingerprint={"archive_run": self.output_run}
+                        if self.output is not None and self.output.archive is not None else None
+                    ))
+                    previous_apply = [f"apply:{phase}"]
+
+        return stages
+
+    def emit(self, event: str, **details: Any) -> None:
+        if self.on_event is not None:
+            self.on_event(event, details)
+
+    def observe_stage(self, stage: Stage) -> Stage:
+        """Wrap a stage so that its start, end and failure are reported through `on_event`."""
+        async def run(inputs):
+            self.emit("stage_started", stage=stage.name)
+            start = time.perf_counter()
+            try:
+                output = await stage.run(inputs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.emit("stage_failed", stage=stage.name, error=str(e))
+                raise
+            self.emit("stage_finished", stage=stage.name, duration_s=round(time.perf_counter() - start, 3))
+            return output
+        return dataclasses.replace(stage, run=run)
+
+    async def prepare_project(self, project_dir: Optional[str], progress: Progress) -> None:
+        """Create (or reopen, when resuming) the project directory and its command runner."""
+        if project_dir is None:
+            self.project_dir = self.create_project_directory()
+            progress.add_task("Created project directory", total=None)
+            # An archived project has no tree to materialize the scaffold into. Materializing
+            # copies or links thousands of files; keep the event loop serving meanwhile
+            use_scaffold = (
+                self.use_scaffold
+                and self.output_backend != OutputBackend.ARCHIVE
+                and await asyncio.to_thread(self.apply_scaffold)
+            )
+        else:
+            self.project_dir = project_dir
+            use_scaffold = load_run_info(project_dir).get("scaffold", False)
+
+        if use_scaffold:
+            # The model builds on the scaffold, and installs it already has are skipped
+            self.scaffold = scaffold_instructions()
+            project_dir = self.project_dir
+            self.command_runner = CommandRunner(
+                self.project_dir,
+                skip=lambda command, files: is_redundant_command(command, files, project_dir)
+            )
+        else:
+            self.command_runner = CommandRunner(self.project_dir)
+        self.open_output()
+        self.emit("project", project_dir=self.project_dir)
+
+    def open_output(self) -> None:
+        """Route the project's files to its output backend: the blob store (linked once the run
+        has finished), or a new
+        streamed archive (rebuilt from the checkpoints when a run is resumed)."""
+        settings = get_settings()
+        if self.output_backend == OutputBackend.STORE:
+            self.output = ProjectOutput(self.output_backend, store=BlobStore(settings.blob_store_dir))
+        elif self.output_backend == OutputBackend.ARCHIVE:
+            name = os.path.basename(os.path.normpath(self.project_dir))
+            archive = ProjectArchive(
+                os.path.join(self.project_dir, f"{name}.tar.gz"),
+                prefix=name,
+                compresslevel=settings.archive_compression_level
+            )
+            self.output = ProjectOutput(self.output_backend, archive=archive)
+        else:
+            return
+        self.output_run = uuid.uuid4().hex
+        attach_output(self.project_dir, self.output)
+
+    def close_output(self, complete: bool) -> None:
+        """Detach the output backend, finishing the archive if there is one."""
+        output, self.output = self.output, None
+        if output is None:
+            return
+        detach_output(self.project_dir)
+        if output.archive is not None:
+            path = output.archive.close(complete)
+            if complete:
+                self.console.print(f"[green]✓[/green] Project archived to: {path}")
+            else:
+                self.console.print(f"[yellow]Partial archive kept at:[/yellow] {path}")
+
+    def deduplicate_output(self) -> None:
+        """Link the project tree (installed dependencies included) to the blob store.
+
+        This runs only once every phase's commands have finished, since installs rewrite files
+        in place; package-manager metadata is never linked, so later installs stay safe too.
+        """
+        with trace_span("deduplicate", category="io") as span:
+            counts = self.output.store.deduplicate_tree(self.project_dir)
+            if span is not None:
+                span.attributes.update(counts)
+        self.console.print(
+            f"[green]✓[/green] Linked {counts['linked']} of {counts['files']} files to the blob store "
+            f"({counts['bytes_saved'] / 1e6:.1f} MB already stored)"
+        )
+
+    async def process_input(
+        self,
+        user_input: str,
+        mode: ProcessingMode,
+        project_dir: Optional[str] = None,
+        previous: Optional[Dict[str, Any]] = None
+    ):
+        """Run the pipeline; with `project_dir`, continue that project from its checkpoints, and
+        with `previous` stage outputs, update it for a changed `user_input`."""
+        console = self.console
+        # The run catalog is filled from trace spans, so runs without `--trace` get a private tracer
+        tracer = self.tracer or (Tracer() if get_settings().run_catalog else None)
+        # A shared tracer also holds other runs' spans; only those recorded since this one started are summarized
+        first_span = len(tracer.spans) if tracer else 0
+        pipeline = None
+        started_at = time.time()
+        status, error = "failed", None
+        try:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=console,
+                disable=self.quiet
+            ) as progress:
+                # Every project starts from an empty conversation history and no project state
+                # (generators are reused across jobs by `codegen serve`)
+                reset_memory(*(chain for chains in self._chains.values() for chain in chains.values()))
+                self.project_dir = None
+                self.command_runner = None
+                self.scaffold = ""
+
+                pipeline_span = tracer.span(
+                    "pipeline",
+                    category="pipeline",
+                    mode=mode.value,
+                    provider=self.model_provider.value
+                ) if tracer else nullcontext()
+                with pipeline_span as span:
+                    pipeline = span
+                    checkpoints = None
+                    # Create project directory for full mode
+                    if mode == ProcessingMode.FULL:
+                        resuming = project_dir is not None
+                        await self.prepare_project(project_dir, progress)
+                        if span is not None:
+                            span.attributes["project_dir"] = self.project_dir
+                        if not resuming or previous is not None:
+                            save_run_info(self.project_dir, {
+                                "user_input": user_input,
+                                "mode": mode.value,
+                                "model": self.model_provider.value,
+                                "streaming": self.streaming,
+                                "scaffold": bool(self.scaffold),
+                                "phase_mode": self.phase_mode.value,
+                                "validate": self.validate,
+                                "output": self.output_backend.value
+                            })
+                        # Stored and archived projects keep checkpointed file bodies out of the
+                        # JSON: linked to the blob store, or compressed like the archive
+                        checkpoints = CheckpointStore(
+                            self.project_dir,
+                            external_bodies=self.output_backend != OutputBackend.FILES,
+                            store=self.output.store if self.output is not None else None
+                        )
+
+                    def on_restore(name: str, output: Any) -> None:
+                        console.print(f"[green]✓[/green] {name} restored from checkpoint")
+                        self.emit("stage_restored", stage=name)
+                        if name in REQUIREMENTS_DOCS and self.output is not None and self.output.archive is not None:
+                            # The new archive still needs the documents written by the first run
+                            write_files({REQUIREMENTS_DOCS[name]: output}, self.project_dir)
+
+                    complete = False
+                    try:
+                        stages = self.build_stages(user_input, mode, progress, previous)
+                        if self.on_event is not None:
+                            stages = [self.observe_stage(stage) for stage in stages]
+                        await run_stages(
+                            stages,
+                            checkpoints=checkpoints,
+                            on_restore=on_restore
+                        )
+                        if self.output is not None and self.output.store is not None:
+                            await asyncio.to_thread(self.deduplicate_output)
+                        complete = True
+                    finally:
+                        for writer in self.stream_writers.values():
+                            writer.cancel()
+                        self.close_output(complete)
+
+                if previous is not None:
+                    console.print(f"\n[green]✓[/green] Project updated at: {self.project_dir}")
+                elif mode == ProcessingMode.FULL:
+                    console.print(f"\n[green]✓[/green] Project created at: {self.project_dir}")
+            status = "succeeded"
+
+        except asyncio.CancelledError:
+            status = "cancelled"
+            console.print("\n[yellow]Cancelled[/yellow]")
+            raise
+        except Exception as e:
+            error = str(e)
+            console.print(f"\n[red]Error:[/red] {str(e)}")
+            if self.project_dir and mode == ProcessingMode.FULL:
+                console.print(f"Completed stages are checkpointed; continue with: codegen resume {self.project_dir}")
+            raise
+        finally:
+            if pipeline is not None and get_settings().run_catalog:
+                self.record_run(pipeline, tracer.spans[first_span:], {
+                    "id": uuid.uuid4().hex[:12],
+                    "started_at": started_at,
+                    "duration_s": round(time.time() - started_at, 3),
+                    "status": status,
+                    "error": error,
+                    "kind": "update" if previous is not None else "resume" if project_dir is not None else "generate",
+                    "mode": mode.value,
+                    "provider": self.model_provider.value,
+                    "model": self.model_name,
+                    "template_version": self.template_version(update=previous is not None),
+                    "prompt_hash": prompt_hash(user_input),
+                    "user_input": user_input,
+                    "phase_mode": self.phase_mode.value,
+                    "validate": int(self.validate),
+                    "output": self.output_backend.value,
+                    "scaffold": int(bool(self.scaffold)),
+                    "project_dir": self.project_dir
+                })
+
+    def requirements_template(self) -> str:
+        """Prompt index scope: requirements are only shared by runs of the same functional prompt."""
+        return hash_value(self.requirements_chain.chains[0].prompt.template)
+
+    def similar_requirements(self, user_input: str) -> Optional[PromptMatch]:
+        """The stored functional requirements of the input most similar to `user_input`, if it is
+        at least REQUIREMENTS_DRAFT_THRESHOLD similar."""
+        settings = get_settings()
+        with trace_span("prompt_index", category="index") as span:
+            try:
+                matches = get_prompt_index().search(user_input, model=self.model_name, template=self.requirements_template(), limit=1)
+            except sqlite3.Error as e:
+                self.console.print(f"[yellow]Prompt index not searched:[/yellow] {str(e)}")
+                return None
+            match = matches[0] if matches and matches[0].similarity >= settings.requirements_draft_threshold else None
+            if span is not None:
+                span.attributes["similarity"] = round(matches[0].similarity, 3) if matches else 0.0
+                span.attributes["matched"] = match is not None
+            return match
+
+    def index_requirements(self, user_input: str, functional_requirements: str) -> None:
+        """Add freshly generated functional requirements to the prompt index."""
+        try:
+            get_prompt_index().add(
+                user_input,
+                functional_requirements,
+                model=self.model_name,
+                template=self.requirements_template(),
+                project_dir=self.project_dir
+            )
+        except sqlite3.Error as e:
+            # Like the run catalog, the index never fails a run
+            self.console.print(f"[yellow]Requirements not indexed:[/yellow] {str(e)}")
+
+    def template_version(self, update: bool = False) -> str:
+        """Short hash of the prompt templates (and scaffold) a run of this generator is built from."""
+        names = ["functional", "technical", "code"]
+        if self.phase_mode == PhaseMode.FANOUT:
+            names += ["manifest", "file"]
+        if self.validate:
+            names.append("file_repair")
+        if update:
+            names += list(UPDATE_CHAINS)
+        elif self.reuse_requirements:
+            names.append("functional_update")
+        templates = {name: self.get_chain(self.model_provider, name).prompt.template for name in names}
+        return hash_value({"templates": templates, "scaffold": self.scaffold})[:12]
+
+    def record_run(self, pipeline: Span, spans: List[Span], run: Dict[str, Any]) -> None:
+        """Append a finished run with its stage timings, token and file counts to the run catalog."""
+        totals, stages = summarize_spans(spans, pipeline)
+        try:
+            get_run_catalog().record({**run, **totals}, stages)
+        except sqlite3.Error as e:
+            # The catalog is bookkeeping; a locked or unwritable database never fails a run
+            self.console.print(f"[yellow]Run not recorded in the catalog:[/yellow] {str(e)}")
+
+    async def resume(self, project_dir: str):
+        """Continue a project from its checkpoints, re-running only stages that did not finish."""
+        pending = load_pending_update(project_dir)
+        if pending is not None:
+            await self.update(project_dir, pending["user_input"])
+            return
+        info = load_run_info(project_dir)
+        missing = [key for key in ("user_input", "mode") if not info.get(key)]
+        if missing:
+            raise ValueError(f"{project_dir} does not record its {' and '.join(missing)}; its run file is incomplete")
+        await self.process_input(info["user_input"], ProcessingMode(info["mode"]), project_dir=project_dir)
+
+    async def update(self, project_dir: str, user_input: str):
+        """Update a full-mode project for a changed request: revise its requirements, then
+        regenerate only the files of the phases the requirements changes touch."""
+        info = load_run_info(project_dir)
+        if info.get("mode") != ProcessingMode.FULL.value:
+            raise ValueError(f"{project_dir} was generated in {info.get('mode')} mode; only full-mode projects can be updated")
+        if info.get("output") == OutputBackend.ARCHIVE.value:
+            raise ValueError(f"{project_dir} is a streamed archive; only projects written as files can be updated")
+
+        checkpoints = CheckpointStore(project_dir)
+        previous = {}
+        for stage in ["functional_requirements", "technical_requirements"] + [f"generate:{phase}" for phase in PHASES]:
+            checkpoint = checkpoints.load_latest(stage)
+            if checkpoint is not None:
+                previous[stage] = checkpoint.output
+        for phase in PHASES:
+            # Files repaired after generation are part of the phase the update starts from
+            checkpoint = checkpoints.load_latest(f"validate:{phase}")
+            if checkpoint is not None and f"generate:{phase}" in previous:
+                previous[f"generate:{phase}"] = apply_repairs(previous[f"generate:{phase}"], checkpoint.output)
+        if "functional_requirements" not in previous:
+            raise ValueError(f"{project_dir} has no requirements checkpoint to update from; use `codegen resume`")
+
+        # The requirements are diffed against the ones the update started from, even if it is
+        # interrupted after new requirements were checkpointed
+        pending = load_pending_update(project_dir)
+        if pending is None:
+            pending = {
+                "user_input": user_input,
+                "previous_user_input": info.get("user_input"),
+                "requirements": {key: previous[key] for key in ("functional_requirements", "technical_requirements") if key in previous}
+            }
+        pending["user_input"] = user_input
+        save_pending_update(project_dir, pending)
+        previous.update(pending["requirements"])
+
+        await self.process_input(user_input, ProcessingMode.FULL, project_dir=project_dir, previous=previous)
+        clear_pending_update(project_dir)
@@ -1,5 +1,25 @@
 from langchain.prompts import PromptTemplate
 
+# Code generation phases, in the order their output is applied to disk
+PHASES = ["Phase 1", "Phase 2", "Phase 3"]
+
+# Requirements sections each phase is prompted with, matched by title against the numbered
+# sections of the functional and technical requirements documents
+PHASE_SECTIONS = {
+    "Phase 1": {
+        "functional_requirements": ["Introduction", "Functional Requirements", "Database Details"],
+        "technical_requirements": ["Technology Stack", "Phase 1"],
+    },
+    "Phase 2": {
+        "functional_requirements": ["Introduction", "User Stories", "Functional Requirements", "Database Details"],
+        "technical_requirements": ["Technology Stack", "Phase 1", "Phase 2"],
+    },
+    "Phase 3": {
+        "functional_requirements": ["Introduction", "User Stories", "User Types", "Functional Requirements", "UI/UX Details"],
+        "technical_requirements": ["Technology Stack", "Phase 2", "Phase 3"],
+    },
+}
+
 CODE_GENERATION_TEMPLATE = """
 You are the world's best software developer, proficient in React development and backend in Node.js, tasked with creating the code implementation details for a project based on the output of functional and implementation requirements documents.
 
@@ -11,13 +31,14 @@ Technical Requirements:
 {technical_requirements}
 
 Current Phase: {phase}
+{scaffold}
 
 Your task is to create a JSON output with the following structure:
-{
+{{
     "folders": [], // List of folders to create
-    "files": {}, // Dictionary of file paths and their content
+    "files": {{}}, // Dictionary of file paths and their content
     "commands": [] // List of setup commands to run
-}
+}}
 
 Phase-Specific Instructions:
 
@@ -61,6 +82,107 @@ Common Requirements:
 """
 
 code_generation_prompt = PromptTemplate(
-    input_variables=["functional_requirements", "technical_requirements", "phase"],
+    input_variables=["functional_requirements", "technical_requirements", "phase", "scaffold"],
     template=CODE_GENERATION_TEMPLATE
-) 
\ No newline at end of file
+)
+
+# Fan-out phase mode: a compact file manifest first, then the contents of a few files per request
+
+CODE_MANIFEST_TEMPLATE = """
+You are the world's best software developer, proficient in React development and backend in Node.js, planning the code implementation for one phase of a project based on the functional and technical requirements documents.
+
+Input Parameters:
+Functional Requirements:
+{functional_requirements}
+
+Technical Requirements:
+{technical_requirements}
+
+Current Phase: {phase}
+{scaffold}
+
+Do not write any file contents yet. Create the file manifest for this phase as a JSON output with the following structure:
+{{
+    "folders": [], // List of folders to create
+    "files": [ // Every file of this phase, in dependency order
+        {{"path": "backend/db/schema.js", "spec": "What the file contains: its exports, the modules it imports and the functions, routes or components it defines"}}
+    ],
+    "commands": [] // List of setup commands to run
+}}
+
+Phase 1 - Database Setup: database configuration, table schemas, dummy data and database utility functions under backend/.
+Phase 2 - Backend API: routes, controllers, business logic, error handling and CORS, using the Phase 1 database functions.
+Phase 3 - Frontend: React application with components, pages, routing, state management and Material UI, calling the backend APIs.
+
+Keep each spec to one or two sentences, but name every export and import so files written separately fit together.
+"""
+
+FILE_GENERATION_TEMPLATE = """
+You are the world's best software developer, proficient in React development and backend in Node.js, writing files of a project based on the functional and technical requirements documents.
+
+Input Parameters:
+Functional Requirements:
+{functional_requirements}
+
+Technical Requirements:
+{technical_requirements}
+
+Current Phase: {phase}
+{scaffold}
+
+File manifest of this phase (other files are written separately and must be used exactly as specified):
+{manifest}
+
+Files to write:
+{files}
+
+Write the complete contents of only the files to write, as a JSON output with the following structure:
+{{
+    "files": {{}} // Dictionary of file paths and their content
+}}
+
+Implementation Guidelines:
+- Write clean, modular code
+- Include proper error handling
+- Add helpful comments
+- Follow best practices
+- Make UI visually appealing
+- Use proper typing and validation
+- No authentication/authorization
+- Follow RESTful API patterns
+"""
+
+code_manifest_prompt = PromptTemplate(
+    input_variables=["functional_requirements", "technical_requirements", "phase", "scaffold"],
+    template=CODE_MANIFEST_TEMPLATE
+)
+
+file_generation_prompt = PromptTemplate(
+    input_variables=["functional_requirements", "technical_requirements", "phase", "scaffold", "manifest", "files"],
+    template=FILE_GENERATION_TEMPLATE
+)
+
+FILE_REPAIR_TEMPLATE = """
+You are the world's best software developer, proficient in React development and backend in Node.js, fixing generated files of a project that failed a syntax check.
+
+Current Phase: {phase}
+
+Files of this phase with the problems found:
+{manifest}
+
+Files to write:
+{files}
+
+Current contents of the files to write:
+{existing_files}
+
+Fix the reported problems (and any other syntax errors) while keeping the code's behavior, and return the complete corrected contents of only the files to write as a JSON output with the following structure:
+{{
+    "files": {{}} // Dictionary of file paths and their content
+}}
+"""
+
+file_repair_prompt = PromptTemplate(
+    input_variables=["phase", "manifest", "files", "existing_files"],
+    template=FILE_REPAIR_TEMPLATE
+)
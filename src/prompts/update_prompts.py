@@ -0,0 +1,115 @@
+from langchain.prompts import PromptTemplate
+
+# Prompts for `codegen update`: revise the stored requirements for a changed request, then plan and
+# rewrite only the files of each affected phase
+
+FUNCTIONAL_REQUIREMENTS_UPDATE_TEMPLATE = """
+You are a world-renowned product manager who maintains highly efficient product documents with minimal margin of error. The application described by the current requirements document has been requested again with a changed description.
+
+<current_functional_requirements>
+{current_document}
+</current_functional_requirements>
+
+Updated User Input: {user_input}
+
+Return the complete updated requirements document. Keep the same numbered sections and structure, change only what the updated input requires, and copy every unaffected section word for word so that unchanged parts of the application are not rebuilt.
+"""
+
+TECHNICAL_REQUIREMENTS_UPDATE_TEMPLATE = """
+You are a senior technical architect maintaining the technical specification of an application whose functional requirements have changed.
+
+<current_technical_requirements>
+{current_document}
+</current_technical_requirements>
+
+Updated Functional Requirements:
+{functional_requirements}
+
+Changes to the functional requirements:
+{requirements_changes}
+
+Return the complete updated technical requirements document. Keep the same numbered sections and structure, change only what the functional changes require, and copy every unaffected section word for word so that unchanged parts of the application are not rebuilt.
+"""
+
+UPDATE_PLAN_TEMPLATE = """
+You are the world's best software developer, proficient in React development and backend in Node.js, updating an existing project after its requirements changed.
+
+Current Phase: {phase}
+{scaffold}
+
+Changes to the requirements:
+{requirements_changes}
+
+Files currently in this phase:
+{current_files}
+
+Decide which files of this phase must change to implement the requirements changes. Leave every other file alone. Return a JSON output with the following structure:
+{{
+    "folders": [], // New folders to create
+    "files": [ // Only files to modify or add
+        {{"path": "backend/routes/tasks.js", "spec": "What changes in the file, naming the exports and imports involved"}}
+    ],
+    "delete": [], // Existing files that are no longer needed
+    "commands": [] // Only setup commands for new dependencies
+}}
+"""
+
+FILE_UPDATE_TEMPLATE = """
+You are the world's best software developer, proficient in React development and backend in Node.js, updating files of an existing project after its requirements changed.
+
+Input Parameters:
+Functional Requirements:
+{functional_requirements}
+
+Technical Requirements:
+{technical_requirements}
+
+Current Phase: {phase}
+{scaffold}
+
+Changes to the requirements:
+{requirements_changes}
+
+Planned changes in this phase (other files are updated separately and must be used exactly as specified):
+{manifest}
+
+Files to write:
+{files}
+
+Current contents of the files to write (new files have none):
+{existing_files}
+
+Write the complete updated contents of only the files to write, keeping everything the changes do not touch, as a JSON output with the following structure:
+{{
+    "files": {{}} // Dictionary of file paths and their content
+}}
+"""
+
+functional_requirements_update_prompt = PromptTemplate(
+    input_variables=["current_document", "user_input"],
+    template=FUNCTIONAL_REQUIREMENTS_UPDATE_TEMPLATE
+)
+
+technical_requirements_update_prompt = PromptTemplate(
+    input_variables=["current_document", "functional_requirements", "requirements_changes"],
+    template=TECHNICAL_REQUIREMENTS_UPDATE_TEMPLATE
+)
+
+update_plan_prompt = PromptTemplate(
+    input_variables=["phase", "scaffold", "requirements_changes", "current_files"],
+    template=UPDATE_PLAN_TEMPLATE
+)
+
+file_update_prompt = PromptTemplate(
+    input_variables=[
+        "functional_requirements",
+        "technical_requirements",
+        "phase",
+        "scaffold",
+        "requirements_changes",
+        "manifest",
+        "files",
+        "existing_files"
+    ],
+    template=FILE_UPDATE_TEMPLATE
+)
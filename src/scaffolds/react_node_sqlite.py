@@ -0,0 +1,155 @@
+"""Prebuilt React + Node.js/Express + SQLite/Knex scaffold shared by every generated project.
+
+Bump SCAFFOLD_VERSION whenever FILES change so existing stores are rebuilt instead of reused.
+"""
+import json
+
+SCAFFOLD_VERSION = "react-node-sqlite-1"
+
+# Directories whose dependencies are installed once into the store
+INSTALL_DIRS = ["backend", "frontend"]
+
+BACKEND_PACKAGE = {
+    "name": "backend",
+    "version": "1.0.0",
+    "private": True,
+    "main": "server.js",
+    "scripts": {
+        "start": "node server.js",
+        "migrate": "knex migrate:latest --knexfile db/knexfile.js",
+        "seed": "knex seed:run --knexfile db/knexfile.js"
+    },
+    "dependencies": {
+        "body-parser": "^1.20.2",
+        "cors": "^2.8.5",
+        "express": "^4.18.2",
+        "knex": "^3.1.0",
+        "sqlite3": "^5.1.7"
+    }
+}
+
+FRONTEND_PACKAGE = {
+    "name": "frontend",
+    "version": "0.1.0",
+    "private": True,
+    "proxy": "http://localhost:5000",
+    "scripts": {
+        "start": "react-scripts start",
+        "build": "react-scripts build"
+    },
+    "dependencies": {
+        "@emotion/react": "^11.11.3",
+        "@emotion/styled": "^11.11.0",
+        "@mui/icons-material": "^5.15.6",
+        "@mui/material": "^5.15.6",
+        "axios": "^1.6.7",
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0",
+        "react-router-dom": "^6.22.0",
+        "react-scripts": "5.0.1"
+    },
+    "browserslist": {
+        "production": [">0.2%", "not dead", "not op_mini all"],
+        "development": ["last 1 chrome version", "last 1 firefox version", "last 1 safari version"]
+    }
+}
+
+SERVER_JS = """const express = require('express');
+const cors = require('cors');
+const bodyParser = require('body-parser');
+const routes = require('./routes');
+
+const app = express();
+const PORT = process.env.PORT || 5000;
+
+app.use(cors());
+app.use(bodyParser.json());
+app.use('/api', routes);
+
+app.use((err, req, res, next) => {
+  console.error(err);
+  res.status(err.status || 500).json({ error: err.message || 'Internal server error' });
+});
+
+app.listen(PORT, () => {
+  console.log(`Server listening on port ${PORT}`);
+});
+"""
+
+KNEXFILE_JS = """const path = require('path');
+
+module.exports = {
+  client: 'sqlite3',
+  connection: {
+    filename: path.join(__dirname, 'app.sqlite3')
+  },
+  useNullAsDefault: true,
+  migrations: {
+    directory: path.join(__dirname, 'migrations')
+  },
+  seeds: {
+    directory: path.join(__dirname, 'seeds')
+  }
+};
+"""
+
+DB_JS = """const knex = require('knex');
+const config = require('./knexfile');
+
+module.exports = knex(config);
+"""
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <title>App</title>
+  </head>
+  <body>
+    <div id="root"></div>
+  </body>
+</html>
+"""
+
+INDEX_JS = """import React from 'react';
+import ReactDOM from 'react-dom/client';
+import { BrowserRouter } from 'react-router-dom';
+import CssBaseline from '@mui/material/CssBaseline';
+import App from './App';
+
+const root = ReactDOM.createRoot(document.getElementById('root'));
+root.render(
+  <React.StrictMode>
+    <BrowserRouter>
+      <CssBaseline />
+      <App />
+    </BrowserRouter>
+  </React.StrictMode>
+);
+"""
+
+API_JS = """import axios from 'axios';
+
+const api = axios.create({ baseURL: '/api' });
+
+export default api;
+"""
+
+FILES = {
+    "backend/package.json": json.dumps(BACKEND_PACKAGE, indent=2) + "\n",
+    "backend/server.js": SERVER_JS,
+    "backend/db/knexfile.js": KNEXFILE_JS,
+    "backend/db/db.js": DB_JS,
+    "frontend/package.json": json.dumps(FRONTEND_PACKAGE, indent=2) + "\n",
+    "frontend/public/index.html": INDEX_HTML,
+    "frontend/src/index.js": INDEX_JS,
+    "frontend/src/services/api.js": API_JS,
+}
+
+# What the model must still provide on top of the scaffold
+APP_SPECIFIC_FILES = [
+    "backend/routes/index.js (an Express router; server.js mounts it at /api)",
+    "backend/db/migrations/* and backend/db/seeds/* (knex migrations and seed data)",
+    "frontend/src/App.js (the root component; index.js already wraps it in BrowserRouter)",
+]
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import signal
+import time
+import logging
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from rich.console import Console
+from src.config.providers import ModelProvider
+from src.config.settings import get_settings
+from src.generator import CodeGenerator, PhaseMode, ProcessingMode
+from src.utils.cache_utils import CacheMode
+from src.utils.job_utils import GENERATOR_OPTIONS, Job, JobQueue, JobStatus
+from src.utils.output_utils import OutputBackend
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1024 * 1024
+
+class RequestError(Exception):
+    """A request the server rejects with a 4xx status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def job_options(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Generator options of a submitted job, with unset ones filled from the settings.
+
+    Raises RequestError for unknown values.
+    """
+    settings = get_settings()
+    try:
+        return {
+            "model": ModelProvider(request.get("model") or "openai").value,
+            "cache_mode": CacheMode(request.get("cache") or settings.llm_cache_mode).value,
+            "streaming": bool(request.get("stream", False)),
+            "phase_mode": PhaseMode(request.get("phase_mode") or settings.phase_generation_mode).value,
+            "validate": bool(request.get("validate", settings.validate_generated_files)),
+            "output": OutputBackend(request.get("output") or settings.output_backend).value,
+            "use_scaffold": bool(request.get("scaffold", settings.use_scaffold)),
+            "reuse_requirements": bool(request.get("reuse_requirements", settings.reuse_requirements))
+        }
+    except ValueError as e:
+        raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+
+class GeneratorPool:
+    """Idle generators per option set. A generator runs one job at a time (its chains keep the
+    job's conversation memory), and is kept with its chains and clients for the next job."""
+
+    def __init__(self):
+        self._idle: Dict[tuple, List[CodeGenerator]] = {}
+
+    @staticmethod
+    def create(options: Dict[str, Any]) -> CodeGenerator:
+        return CodeGenerator(
+            ModelProvider(options["model"]),
+            quiet=True,
+            cache_mode=CacheMode(options["cache_mode"]),
+            streaming=options["streaming"],
+            use_scaffold=options["use_scaffold"],
+            phase_mode=options["phase_mode"],
+            validate=options["validate"],
+            output=options["output"],
+            reuse_requirements=options["reuse_requirements"]
+        )
+
+    async def acquire(self, options: Dict[str, Any]) -> CodeGenerator:
+        idle = self._idle.get(_key(options))
+        if idle:
+            return idle.pop()
+        # Building chains is synchronous; keep the event loop serving meanwhile
+        return await asyncio.to_thread(self.create, options)
+
+    def release(self, options: Dict[str, Any], generator: CodeGenerator) -> None:
+        generator.on_event = None
+        self._idle.setdefault(_key(options), []).append(generator)
+
+    async def preload(self, options: Dict[str, Any], count: int) -> None:
+        generators = await asyncio.gather(*(asyncio.to_thread(self.create, options) for _ in range(count)))
+        for generator in generators:
+            self.release(options, generator)
+
+    def idle(self) -> int:
+        return sum(len(generators) for generators in self._idle.values())
+
+def _key(options: Dict[str, Any]) -> tuple:
+    return tuple(options.get(name) for name in GENERATOR_OPTIONS)
+
+class GenerationServer:
+    """Job queue, workers and HTTP API of `codegen serve`.
+
+    POST /jobs submits a job and returns at once; GET /jobs/<id>/events streams its progress
+    events as JSON lines until it finishes.
+    """
+
+    def __init__(self, workers: int, history: int):
+        self.workers = workers
+        self.queue = JobQueue(history)
+        self.pool = GeneratorPool()
+        self.started_at = time.time()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self.worker(index), name=f"worker-{index}") for index in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs are cancelled and keep their checkpoints."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def worker(self, index: int) -> None:
+        while True:
+            job = await self.queue.next()
+            job.set_status(JobStatus.RUNNING, worker=index)
+            generator = None
+            try:
+                generator = await self.pool.acquire(job.options)
+                if job.cancel_requested:
+                    raise asyncio.CancelledError
+                generator.on_event = lambda event, details: self.record_event(job, event, details)
+                job.task = asyncio.create_task(generator.process_input(job.user_input, ProcessingMode(job.mode)))
+                await job.task
+                job.project_dir = generator.project_dir
+                job.set_status(JobStatus.SUCCEEDED, project_dir=job.project_dir, duration_s=round(time.time() - job.started_at, 3))
+                console.print(f"[green]✓[/green] [{job.id}] done in {job.finished_at - job.started_at:.1f}s")
+            except asyncio.CancelledError:
+                job.set_status(JobStatus.CANCELLED)
+                console.print(f"[yellow]Cancelled[/yellow] [{job.id}]")
+                if self._stopping:
+                    raise
+            except Exception as e:
+                job.error = str(e)
+                job.set_status(JobStatus.FAILED, error=job.error)
+                console.print(f"[red]✗[/red] [{job.id}] {job.error}")
+            finally:
+                job.task = None
+                if generator is not None:
+                    self.pool.release(job.options, generator)
+
+    def record_event(self, job: Job, event: str, details: Dict[str, Any]) -> None:
+        if event == "project":
+            job.project_dir = details["project_dir"]
+        job.add_event(event, **details)
+
+    def submit(self, request: Dict[str, Any]) -> Job:
+        user_input = request.get("user_input") or request.get("prompt")
+        if not isinstance(user_input, str) or not user_input.strip():
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Missing 'user_input'")
+        try:
+            mode = ProcessingMode(request.get("mode") or ProcessingMode.FULL.value).value
+            priority = int(request.get("priority", 0))
+        except (TypeError, ValueError) as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+        return self.queue.submit(Job(user_input, mode=mode, priority=priority, options=job_options(request)))
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "jobs": self.queue.counts(),
+            "idle_generators": self.pool.idle(),
+            "uptime_s": round(time.time() - self.started_at, 1)
+        }
+
+    def find(self, job_id: str) -> Job:
+        job = self.queue.get(job_id)
+        if job is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown job: {job_id}")
+        return job
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP/1.1 request per connection."""
+        try:
+            try:
+                method, path, query, body = await read_request(reader)
+                await self.route(method, path, query, body, writer)
+            except RequestError as e:
+                await send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception("Error handling request")
+            try:
+                await send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, query: Dict[str, str], body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"] and method == "GET":
+            await send_json(writer, HTTPStatus.OK, self.health())
+        elif parts == ["jobs"] and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {str(e)}")
+            if not isinstance(request, dict):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object")
+            await send_json(writer, HTTPStatus.ACCEPTED, self.submit(request).to_dict())
+        elif parts == ["jobs"] and method == "GET":
+            status = query.get("status")
+            jobs = [job.to_dict() for job in self.queue.jobs.values() if status is None or job.status.value == status]
+            await send_json(writer, HTTPStatus.OK, {"jobs": jobs})
+        elif len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, self.find(parts[1]).to_dict())
+        elif len(parts) == 2 and parts[0] == "jobs" and method == "DELETE":
+            job = self.find(parts[1])
+            self.queue.cancel(job.id)
+            await send_json(writer, HTTPStatus.ACCEPTED, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events" and method == "GET":
+            job = self.find(parts[1])
+            await stream_events(writer, job, start=int(query.get("from", 0)), follow=query.get("follow", "1") != "0")
+        else:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    """Read the method, path, query parameters and body of an HTTP request."""
+    request_line = await reader.readline()
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request bodies are limited to {MAX_BODY_SIZE} bytes")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    return method.upper(), url.path, query, body
+
+def _headers(status: HTTPStatus, content_type: str, length: Optional[int] = None) -> bytes:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}", "Connection: close"]
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+async def send_json(writer: asyncio.StreamWriter, status: HTTPStatus, body: Any) -> None:
+    payload = json.dumps(body).encode("utf-8")
+    writer.write(_headers(status, "application/json", len(payload)) + payload)
+    await writer.drain()
+
+async def stream_events(writer: asyncio.StreamWriter, job: Job, start: int = 0, follow: bool = True) -> None:
+    """Write a job's events as JSON lines, following new ones until the job finishes; the
+    response ends when the connection closes."""
+    writer.write(_headers(HTTPStatus.OK, "application/x-ndjson"))
+    if not follow:
+        writer.write(b"".join(json.dumps(event).encode("utf-8") + b"\n" for event in job.events[start:]))
+        await writer.drain()
+        return
+    async for event in job.follow(start):
+        writer.write(json.dumps(event).encode("utf-8") + b"\n")
+        await writer.drain()
+
+async def serve(
+    host: str,
+    port: int,
+    socket_path: Optional[str] = None,
+    workers: int = 16,
+    preload: Optional[List[str]] = None
+) -> None:
+    """Run the generation daemon until cancelled."""
+    server = GenerationServer(workers, get_settings().server_job_history)
+    for model in preload or []:
+        # Jobs that only set the model reuse these generators
+        await server.pool.preload(job_options({"model": model}), workers)
+        console.print(f"Preloaded {workers} {model} generators")
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+        os.chmod(socket_path, 0o600)
+        address = f"unix:{socket_path}"
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        address = f"http://{host}:{port}"
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, stopped.set)
+        except (NotImplementedError, RuntimeError):
+            # Not supported on this platform; Ctrl+C still stops the loop
+            pass
+
+    server.start()
+    console.print(f"[bold blue]Serving[/bold blue] on {address} with {workers} workers")
+    try:
+        async with listener:
+            await stopped.wait()
+        console.print("Stopping; running jobs are cancelled and can be resumed from their checkpoints")
+    finally:
+        await server.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
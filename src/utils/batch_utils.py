@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchJob:
+    index: int
+    user_input: str
+    mode: str
+    model: str
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    success: bool
+    duration: float
+    project_dir: Optional[str] = None
+    error: Optional[str] = None
+
+def load_batch_jobs(path: str, default_mode: str, default_model: str) -> List[BatchJob]:
+    """Load generation jobs from a JSONL file with one prompt per line."""
+    jobs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {str(e)}")
+
+            if isinstance(entry, str):
+                entry = {"user_input": entry}
+            user_input = entry.get("user_input") or entry.get("prompt")
+            if not user_input:
+                raise ValueError(f"Missing 'user_input' on line {line_number} of {path}")
+
+            jobs.append(BatchJob(
+                index=len(jobs),
+                user_input=user_input,
+                mode=entry.get("mode", default_mode),
+                model=entry.get("model", default_model)
+            ))
+    return jobs
+
+async def run_batch(
+    jobs: List[BatchJob],
+    run_job: Callable[[BatchJob], Awaitable[Optional[str]]],
+    concurrency: int
+) -> List[BatchResult]:
+    """Run jobs through a bounded pool of workers sharing one event loop."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    results: List[BatchResult] = []
+
+    async def worker(worker_id: int) -> None:
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            start = time.perf_counter()
+            try:
+                project_dir = await run_job(job)
+                result = BatchResult(job, True, time.perf_counter() - start, project_dir=project_dir)
+                console.print(f"[green]✓[/green] [{job.index}] done in {result.duration:.1f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = BatchResult(job, False, time.perf_counter() - start, error=str(e))
+                console.print(f"[red]✗[/red] [{job.index}] failed: {str(e)}")
+                logger.debug(f"Worker {worker_id} failed job {job.index}", exc_info=True)
+            results.append(result)
+
+    workers = [asyncio.create_task(worker(i)) for i in range(max(1, min(concurrency, len(jobs))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    return sorted(results, key=lambda r: r.job.index)
+
+def print_batch_summary(results: List[BatchResult], elapsed: float) -> None:
+    """Print throughput and failure statistics for a finished batch."""
+    succeeded = [r for r in results if r.success]
+    failed = [r for r in results if not r.success]
+    durations = sorted(r.duration for r in results)
+
+    table = Table(title="Batch Summary")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Jobs", str(len(results)))
+    table.add_row("Succeeded", f"[green]{len(succeeded)}[/green]")
+    table.add_row("Failed", f"[red]{len(failed)}[/red]" if failed else "0")
+    table.add_row("Wall time", f"{elapsed:.1f}s")
+    if elapsed > 0:
+        table.add_row("Projects/min", f"{len(succeeded) * 60 / elapsed:.2f}")
+    if durations:
+        table.add_row("Mean job time", f"{sum(durations) / len(durations):.1f}s")
+        table.add_row("p50 job time", f"{durations[len(durations) // 2]:.1f}s")
+        table.add_row("Max job time", f"{durations[-1]:.1f}s")
+    console.print(table)
+
+    for result in failed:
+        console.print(f"[red]Failed[/red] [{result.job.index}] {result.job.user_input[:60]!r}: {result.error}")
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from enum import Enum
+from typing import Dict, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from src.config.settings import get_settings
+from src.utils.trace_utils import current_span
+
+logger = logging.getLogger(__name__)
+
+class CacheMode(str, Enum):
+    OFF = "off"
+    READ = "read"
+    WRITE = "write"
+    READWRITE = "readwrite"
+
+    @property
+    def can_read(self) -> bool:
+        return self in (CacheMode.READ, CacheMode.READWRITE)
+
+    @property
+    def can_write(self) -> bool:
+        return self in (CacheMode.WRITE, CacheMode.READWRITE)
+
+class SQLiteLLMCache(BaseCache):
+    """Content-addressed LLM response cache in SQLite with size and age based LRU eviction.
+
+    Entries are keyed by a hash of the rendered prompt and the LangChain llm_string, which
+    carries the provider type, model name, temperature and other call parameters.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: CacheMode = CacheMode.READWRITE,
+        max_size_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None
+    ):
+        self.path = path
+        self.mode = mode
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return cached generations for the prompt, or None on a miss."""
+        if not self.mode.can_read:
+            return None
+
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+
+        span = current_span()
+        if span is not None:
+            span.increment("cache_hits")
+        logger.debug(f"LLM cache hit: {key[:12]}")
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for the prompt and evict entries over the size or age limits."""
+        if not self.mode.can_write:
+            return
+
+        key = self.make_key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self.stats["writes"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.max_age_seconds is not None:
+            cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+            self.stats["evictions"] += cursor.rowcount
+
+        if self.max_size_bytes is None:
+            return
+        total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        # Drop least recently used entries until the store fits again
+        expired_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if total_size <= self.max_size_bytes:
+                break
+            expired_keys.append((key,))
+            total_size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", expired_keys)
+        self.stats["evictions"] += len(expired_keys)
+
+    def clear(self, **kwargs) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def format_stats(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups * 100 if lookups else 0.0
+        return (
+            f"{self.stats['hits']} hits, {self.stats['misses']} misses ({hit_rate:.0f}% hit rate), "
+            f"{self.stats['writes']} writes, {self.stats['evictions']} evictions"
+        )
+
+_caches: Dict[str, SQLiteLLMCache] = {}
+
+def get_llm_cache(mode: CacheMode) -> Optional[SQLiteLLMCache]:
+    """Return the process-wide LLM cache for a mode, or None when caching is off."""
+    mode = CacheMode(mode)
+    if mode == CacheMode.OFF:
+        return None
+    if mode.value not in _caches:
+        settings = get_settings()
+        _caches[mode.value] = SQLiteLLMCache(
+            settings.llm_cache_path,
+            mode=mode,
+            max_size_bytes=settings.llm_cache_max_size_mb * 1024 * 1024,
+            max_age_seconds=settings.llm_cache_max_age_days * 24 * 60 * 60
+        )
+    return _caches[mode.value]
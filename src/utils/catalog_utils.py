@@ -0,0 +1,328 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+# Run columns that queries may filter, group and compare by
+RUN_FIELDS = (
+    "provider", "model", "mode", "kind", "status", "template_version", "prompt_hash",
+    "phase_mode", "output", "validate", "scaffold"
+)
+
+# Aggregates of `codegen runs query --group-by` and `codegen runs compare`, as (label, SQL)
+RUN_METRICS = (
+    ("runs", "COUNT(*)"),
+    ("success_rate", "AVG(status = 'succeeded')"),
+    ("avg_duration_s", "AVG(duration_s)"),
+    ("max_duration_s", "MAX(duration_s)"),
+    ("avg_tokens", "AVG(prompt_tokens + completion_tokens)"),
+    ("avg_prompt_tokens", "AVG(prompt_tokens)"),
+    ("avg_completion_tokens", "AVG(completion_tokens)"),
+    ("avg_cost_usd", "AVG(cost_usd)"),
+    ("avg_llm_calls", "AVG(llm_calls)"),
+    ("avg_retries", "AVG(retries)"),
+    ("avg_files_written", "AVG(files_written)"),
+    ("avg_files_failing", "AVG(files_failing)"),
+    ("avg_files_repaired", "AVG(files_repaired)"),
+)
+
+# RUN_METRICS shown in `codegen runs query --group-by` tables (`--json` has all of them)
+TABLE_METRICS = ("runs", "success_rate", "avg_duration_s", "avg_tokens", "avg_cost_usd", "avg_llm_calls", "avg_files_written", "avg_files_failing")
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY,
+        started_at REAL NOT NULL,
+        duration_s REAL,
+        status TEXT NOT NULL,
+        error TEXT,
+        kind TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        provider TEXT NOT NULL,
+        model TEXT,
+        template_version TEXT,
+        prompt_hash TEXT NOT NULL,
+        user_input TEXT NOT NULL,
+        phase_mode TEXT,
+        validate INTEGER,
+        output TEXT,
+        scaffold INTEGER,
+        project_dir TEXT,
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        completion_tokens INTEGER NOT NULL DEFAULT 0,
+        cost_usd REAL NOT NULL DEFAULT 0,
+        llm_calls INTEGER NOT NULL DEFAULT 0,
+        retries INTEGER NOT NULL DEFAULT 0,
+        stages_restored INTEGER NOT NULL DEFAULT 0,
+        files_written INTEGER NOT NULL DEFAULT 0,
+        files_validated INTEGER NOT NULL DEFAULT 0,
+        files_failing INTEGER NOT NULL DEFAULT 0,
+        files_repaired INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS stages (
+        run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+        stage TEXT NOT NULL,
+        duration_s REAL,
+        restored INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL,
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        completion_tokens INTEGER NOT NULL DEFAULT 0,
+        llm_calls INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (run_id, stage)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_runs_prompt_hash ON runs (prompt_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_provider ON runs (provider, started_at)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_template_version ON runs (template_version, started_at)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, started_at)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at)",
+)
+
+def prompt_hash(user_input: str) -> str:
+    """Catalog key of a user input, ignoring surrounding whitespace."""
+    return hashlib.sha256(user_input.strip().encode("utf-8")).hexdigest()[:16]
+
+def summarize_spans(spans: Sequence[Any], root: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Run totals and per-stage rows from the trace spans recorded under a pipeline span.
+
+    Stages are the direct children of `root`; LLM calls, file writes and validations nested
+    anywhere below a stage are counted towards it.
+    """
+    by_id = {span.span_id: span for span in spans if span.trace_id == root.trace_id}
+    stages: Dict[str, Dict[str, Any]] = {}
+    totals = {
+        "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "llm_calls": 0, "retries": 0,
+        "stages_restored": 0, "files_written": 0, "files_validated": 0, "files_failing": 0, "files_repaired": 0
+    }
+
+    def stage_of(span):
+        while span.parent_id is not None and span.parent_id != root.span_id:
+            span = by_id.get(span.parent_id)
+            if span is None:
+                return None
+        return span if span.parent_id == root.span_id else None
+
+    for span in by_id.values():
+        stage = stage_of(span)
+        if stage is None:
+            continue
+        row = stages.setdefault(stage.span_id, {
+            "stage": stage.name,
+            "duration_s": stage.duration_ms / 1000 if stage.duration_ms is not None else None,
+            "restored": int(bool(stage.attributes.get("restored"))),
+            "status": stage.status,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "llm_calls": 0
+        })
+        attributes = span.attributes
+        if span.category == "llm":
+            row["llm_calls"] += 1
+            row["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+            row["completion_tokens"] += attributes.get("completion_tokens", 0)
+            totals["cost_usd"] += attributes.get("cost_usd", 0.0)
+            totals["retries"] += attributes.get("retries", 0)
+        elif span.name == "write_files":
+            totals["files_written"] += attributes.get("written", 0)
+        elif span.name == "validate":
+            totals["files_validated"] += attributes.get("files", 0)
+        if span is stage and span.name.startswith("validate:"):
+            totals["files_failing"] += attributes.get("failing", 0)
+            totals["files_repaired"] += attributes.get("repaired", 0)
+
+    rows = list(stages.values())
+    for row in rows:
+        totals["prompt_tokens"] += row["prompt_tokens"]
+        totals["completion_tokens"] += row["completion_tokens"]
+        totals["llm_calls"] += row["llm_calls"]
+        totals["stages_restored"] += row["restored"]
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals, rows
+
+class RunCatalog:
+    """SQLite catalog of pipeline runs, shared by every process that writes to the same path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Concurrent processes (batches, the daemon, single runs) wait for each other's writes
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def record(self, run: Dict[str, Any], stages: List[Dict[str, Any]]) -> None:
+        """Insert a run and its stage rows."""
+        columns = list(run)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [run[column] for column in columns]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stages (run_id, stage, duration_s, restored, status, prompt_tokens, "
+                "completion_tokens, llm_calls) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run["id"], row["stage"], row["duration_s"], row["restored"], row["status"],
+                     row["prompt_tokens"], row["completion_tokens"], row["llm_calls"])
+                    for row in stages
+                ]
+            )
+
+    @staticmethod
+    def where(filters: Dict[str, Any], since: Optional[float] = None, table: str = "runs") -> Tuple[str, List[Any]]:
+        """SQL condition and parameters for equality filters on run fields."""
+        clauses, parameters = [], []
+        for name, value in filters.items():
+            if name not in RUN_FIELDS:
+                raise ValueError(f"Unknown run field: {name}")
+            if value is not None:
+                clauses.append(f"{table}.{name} = ?")
+                parameters.append(value)
+        if since is not None:
+            clauses.append(f"{table}.started_at >= ?")
+            parameters.append(since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", parameters
+
+    def _rows(self, sql: str, parameters: Sequence[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, parameters)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def runs(self, filters: Dict[str, Any], since: Optional[float] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """The most recent runs matching the filters."""
+        condition, parameters = self.where(filters, since)
+        return self._rows(
+            f"SELECT * FROM runs{condition} ORDER BY started_at DESC LIMIT ?",
+            parameters + [limit]
+        )
+
+    def aggregate(self, group_by: str, filters: Dict[str, Any], since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """RUN_METRICS per distinct value of a run field."""
+        if group_by not in RUN_FIELDS:
+            raise ValueError(f"Unknown run field: {group_by}")
+        condition, parameters = self.where(filters, since)
+        metrics = ", ".join(f"{sql} AS {label}" for label, sql in RUN_METRICS)
+        return self._rows(
+            f"SELECT {group_by} AS value, {metrics} FROM runs{condition} GROUP BY {group_by} ORDER BY runs DESC",
+            parameters
+        )
+
+    def stage_durations(self, group_by: str, values: Sequence[Any], filters: Dict[str, Any], since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Average duration of each stage that ran (was not restored) per value of a run field."""
+        if group_by not in RUN_FIELDS:
+            raise ValueError(f"Unknown run field: {group_by}")
+        condition, parameters = self.where(filters, since)
+        condition += (" AND " if condition else " WHERE ") + f"runs.{group_by} IN ({', '.join('?' for _ in values)})"
+        return self._rows(
+            f"SELECT runs.{group_by} AS value, stages.stage AS stage, AVG(stages.duration_s) AS avg_duration_s, "
+            f"AVG(stages.prompt_tokens + stages.completion_tokens) AS avg_tokens, COUNT(*) AS runs "
+            f"FROM stages JOIN runs ON runs.id = stages.run_id{condition} AND stages.restored = 0 "
+            f"GROUP BY runs.{group_by}, stages.stage ORDER BY stages.stage",
+            parameters + list(values)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_catalogs: Dict[str, RunCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_run_catalog(path: Optional[str] = None) -> RunCatalog:
+    """The catalog at `path` (RUN_CATALOG_PATH by default), opened once per process."""
+    from src.config.settings import get_settings
+
+    path = os.path.abspath(path or get_settings().run_catalog_path)
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = RunCatalog(path)
+        return _catalogs[path]
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """Epoch time of a relative age such as `30m`, `12h` or `7d` before now."""
+    if not value:
+        return None
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    unit = value[-1].lower()
+    try:
+        amount = float(value[:-1]) if unit in units else float(value)
+    except ValueError:
+        raise ValueError(f"Invalid age {value!r}; use e.g. 30m, 12h or 7d")
+    return time.time() - amount * units.get(unit, 1)
+
+def format_metric(label: str, value: Any) -> str:
+    if value is None:
+        return "-"
+    if label == "success_rate":
+        return f"{value:.0%}"
+    if label.endswith("_s"):
+        return f"{value:.1f}s"
+    if label.endswith("_usd"):
+        return f"${value:.4f}"
+    if isinstance(value, float):
+        return f"{value:,.1f}"
+    return f"{value:,}" if isinstance(value, int) else str(value)
+
+def print_runs(runs: List[Dict[str, Any]]) -> None:
+    """Print the latest runs, one row each."""
+    table = Table(title="Runs")
+    for column in ("id", "started", "provider", "template", "status", "duration", "tokens", "files", "failing"):
+        table.add_column(column, justify="right" if column in ("duration", "tokens", "files", "failing") else "left")
+    for run in runs:
+        status = run["status"]
+        table.add_row(
+            run["id"],
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started_at"])),
+            run["provider"],
+            run["template_version"] or "-",
+            f"[green]{status}[/green]" if status == "succeeded" else f"[red]{status}[/red]",
+            format_metric("duration_s", run["duration_s"]),
+            format_metric("tokens", run["prompt_tokens"] + run["completion_tokens"]),
+            format_metric("files", run["files_written"]),
+            format_metric("files", run["files_failing"])
+        )
+    console.print(table)
+
+def print_aggregates(group_by: str, groups: List[Dict[str, Any]]) -> None:
+    """Print the TABLE_METRICS of each group."""
+    table = Table(title=f"Runs by {group_by}")
+    table.add_column(group_by)
+    for label in TABLE_METRICS:
+        table.add_column(label.replace("avg_", "").replace("_", " "), justify="right")
+    for group in groups:
+        table.add_row(str(group["value"]), *(format_metric(label, group[label]) for label in TABLE_METRICS))
+    console.print(table)
+
+def print_comparison(field: str, values: Sequence[str], groups: Dict[str, Dict[str, Any]], stages: List[Dict[str, Any]]) -> None:
+    """Print RUN_METRICS and average stage durations side by side for two values of a run field."""
+    first, second = values
+    table = Table(title=f"{field}: {first} vs {second}")
+    table.add_column("metric")
+    table.add_column(str(first), justify="right")
+    table.add_column(str(second), justify="right")
+    table.add_column("change", justify="right")
+
+    def add_row(label: str, a: Any, b: Any) -> None:
+        change = f"{(b - a) / a:+.0%}" if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a else "-"
+        table.add_row(label, format_metric(label, a), format_metric(label, b), change)
+
+    for label, _ in RUN_METRICS:
+        add_row(label, groups.get(first, {}).get(label), groups.get(second, {}).get(label))
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    for row in stages:
+        by_stage.setdefault(row["stage"], {})[str(row["value"])] = row["avg_duration_s"]
+    for stage, durations in sorted(by_stage.items()):
+        add_row(f"{stage} avg_s", durations.get(str(first)), durations.get(str(second)))
+    console.print(table)
@@ -0,0 +1,175 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from src.utils.file_utils import atomic_write
+from src.utils.output_utils import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# Pipeline state kept inside each project directory
+STATE_DIR = ".codegen"
+CHECKPOINT_DIR = os.path.join(STATE_DIR, "checkpoints")
+RUN_FILE = os.path.join(STATE_DIR, "run.json")
+UPDATE_FILE = os.path.join(STATE_DIR, "update.json")
+BODY_DIR = os.path.join(STATE_DIR, "blobs")
+
+# Strings at least this long (file contents, documents, responses) are stored outside the JSON
+# when checkpoint bodies are external
+BODY_MIN_CHARS = 256
+
+def hash_value(value: Any) -> str:
+    """Stable hash of a JSON-serializable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+@dataclass
+class Checkpoint:
+    stage: str
+    input_hash: str
+    output_hash: str
+    output: Any
+
+class CheckpointStore:
+    """Stage outputs saved in a project directory, keyed by a hash of everything they depend on.
+
+    With `external_bodies`, large outputs are saved by content hash under `.codegen/blobs/` and
+    the JSON keeps `{"$blob": <sha256>}` in their place. Given a blob `store`, each long string
+    (a file's contents) is a hardlink to the store, sharing the blob of the identical project
+    file; otherwise the whole output is one gzip-compressed body. Checkpoints are read back
+    whichever way they were saved.
+    """
+
+    def __init__(self, project_dir: str, external_bodies: bool = False, store: Optional[BlobStore] = None):
+        self.project_dir = project_dir
+        self.directory = os.path.join(project_dir, CHECKPOINT_DIR)
+        self.body_directory = os.path.join(project_dir, BODY_DIR)
+        self.external_bodies = external_bodies
+        self.store = store
+
+    def path(self, stage: str) -> str:
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in stage)
+        return os.path.join(self.directory, f"{safe_name}.json")
+
+    def body_path(self, digest: str) -> str:
+        return os.path.join(self.body_directory, digest[:2], digest)
+
+    def _save_body(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.body_path(digest)
+        if os.path.exists(path) or os.path.exists(path + ".gz"):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.store is not None:
+            try:
+                if self.store.link(self.store.put(data, digest=digest), path):
+                    return digest
+            except FileNotFoundError:
+                # Collected between storing and linking; keep a compressed copy instead
+                pass
+        tmp_path = f"{path}.gz.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6))
+        os.replace(tmp_path, path + ".gz")
+        return digest
+
+    def _load_body(self, digest: str) -> str:
+        path = self.body_path(digest)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read().decode("utf-8")
+        with gzip.open(path + ".gz", 'rb') as f:
+            return f.read().decode("utf-8")
+
+    def _externalize(self, value: Any) -> Any:
+        if self.store is None:
+            serialized = json.dumps(value)
+            return {"$blob": self._save_body(serialized), "$json": True} if len(serialized) >= BODY_MIN_CHARS else value
+        return self._externalize_strings(value)
+
+    def _externalize_strings(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return {"$blob": self._save_body(value)} if len(value) >= BODY_MIN_CHARS else value
+        if isinstance(value, dict):
+            return {key: self._externalize_strings(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._externalize_strings(item) for item in value]
+        return value
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if isinstance(value.get("$blob"), str) and set(value) <= {"$blob", "$json"}:
+                body = self._load_body(value["$blob"])
+                return json.loads(body) if value.get("$json") else body
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    def load_latest(self, stage: str) -> Optional[Checkpoint]:
+        """Return the stage's last saved checkpoint, whatever inputs it was produced from."""
+        path = self.path(stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            output = self._resolve(data["output"])
+        except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {str(e)}")
+            return None
+        return Checkpoint(stage, data["input_hash"], data["output_hash"], output)
+
+    def load(self, stage: str, input_hash: str) -> Optional[Checkpoint]:
+        """Return the stage's checkpoint if it was produced from the same inputs."""
+        checkpoint = self.load_latest(stage)
+        if checkpoint is not None and checkpoint.input_hash != input_hash:
+            logger.debug(f"Checkpoint for {stage} is stale")
+            return None
+        return checkpoint
+
+    def save(self, stage: str, input_hash: str, output: Any) -> str:
+        """Persist a stage output; return its hash."""
+        output_hash = hash_value(output)
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(self.path(stage), json.dumps({
+            "stage": stage,
+            "input_hash": input_hash,
+            "output_hash": output_hash,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "output": self._externalize(output) if self.external_bodies else output
+        }, indent=2))
+        return output_hash
+
+def save_run_info(project_dir: str, info: Dict[str, Any]) -> None:
+    """Record how a project was generated, so it can be resumed."""
+    os.makedirs(os.path.join(project_dir, STATE_DIR), exist_ok=True)
+    atomic_write(os.path.join(project_dir, RUN_FILE), json.dumps(info, indent=2))
+
+def load_run_info(project_dir: str) -> Dict[str, Any]:
+    path = os.path.join(project_dir, RUN_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"{project_dir} has no {RUN_FILE}; it was not generated with checkpoints")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_pending_update(project_dir: str, update: Dict[str, Any]) -> None:
+    """Record an update in progress with the requirements it started from, until it completes."""
+    os.makedirs(os.path.join(project_dir, STATE_DIR), exist_ok=True)
+    atomic_write(os.path.join(project_dir, UPDATE_FILE), json.dumps(update, indent=2))
+
+def load_pending_update(project_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(project_dir, UPDATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def clear_pending_update(project_dir: str) -> None:
+    path = os.path.join(project_dir, UPDATE_FILE)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,218 @@
+import os
+import re
+import hashlib
+import contextvars
+import shlex
+import subprocess
+import threading
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from rich.console import Console
+from rich.markup import escape
+from src.config.settings import get_settings
+from src.utils.trace_utils import trace_span
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+# Working-directory key for commands that run in the project root
+ROOT = "."
+
+_CD_PREFIX = re.compile(r'^cd\s+("[^"]+"|\'[^\']+\'|\S+)\s*&&\s*')
+
+def normalize_command(command: str) -> str:
+    """Collapse whitespace and strip trailing separators so equivalent commands compare equal."""
+    return " ".join(command.split()).rstrip(";").strip()
+
+# Installs that take their packages from the directory's package.json
+_BARE_INSTALLS = (["npm", "install"], ["npm", "i"], ["npm", "ci"], ["yarn"], ["yarn", "install"], ["pnpm", "install"], ["pnpm", "i"])
+
+def install_manifest(command: str) -> Optional[str]:
+    """The project-relative package.json a bare install (no package names) installs from, if it is one."""
+    directory, rest = split_directory(command)
+    try:
+        words = [word for word in shlex.split(rest) if not word.startswith("-")]
+    except ValueError:
+        return None
+    if words not in _BARE_INSTALLS:
+        return None
+    return os.path.normpath(os.path.join(directory, "package.json"))
+
+def split_directory(command: str) -> Tuple[str, str]:
+    """Split leading `cd X &&` hops off a command; return (relative directory, remaining command)."""
+    directory = ""
+    rest = command
+    while True:
+        match = _CD_PREFIX.match(rest)
+        if match is None:
+            break
+        target = shlex.split(match.group(1))[0]
+        directory = os.path.normpath(os.path.join(directory, target))
+        rest = rest[match.end():]
+    return directory or ".", rest
+
+def command_directory(command: str) -> str:
+    """Return the top-level project directory a command runs in, based on leading `cd X &&` hops."""
+    directory, _ = split_directory(command)
+    if directory == "." or directory.startswith(".."):
+        return ROOT
+    return directory.split(os.sep)[0]
+
+def package_manager_env(cache_dir: Optional[str] = None) -> Dict[str, str]:
+    """Environment pointing npm, yarn, pnpm and pip at a cache shared across projects."""
+    env = dict(os.environ)
+    cache_dir = cache_dir or get_settings().package_cache_dir
+    if not cache_dir:
+        return env
+    os.makedirs(cache_dir, exist_ok=True)
+    env.setdefault("npm_config_cache", os.path.join(cache_dir, "npm"))
+    env.setdefault("npm_config_prefer_offline", "true")
+    env.setdefault("npm_config_store_dir", os.path.join(cache_dir, "pnpm"))
+    env.setdefault("YARN_CACHE_FOLDER", os.path.join(cache_dir, "yarn"))
+    env.setdefault("PIP_CACHE_DIR", os.path.join(cache_dir, "pip"))
+    return env
+
+def plan_command_waves(commands: List[str]) -> List[Dict[str, List[str]]]:
+    """Group commands into waves that run one after another.
+
+    Within a wave, commands are grouped by the top-level directory they `cd` into; groups run
+    concurrently and the commands of a group run in order. A command in the project root may
+    create or change any directory, so it always runs alone in its own wave.
+    """
+    waves: List[Dict[str, List[str]]] = []
+    current: Dict[str, List[str]] = OrderedDict()
+    for command in commands:
+        directory = command_directory(command)
+        if directory == ROOT:
+            if current:
+                waves.append(current)
+                current = OrderedDict()
+            waves.append(OrderedDict([(ROOT, [command])]))
+        else:
+            current.setdefault(directory, []).append(command)
+    if current:
+        waves.append(current)
+    return waves
+
+class CommandRunner:
+    """Runs a project's setup commands: deduplicated across phases, concurrent and streamed."""
+
+    def __init__(
+        self,
+        working_dir: str = ".",
+        max_jobs: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        skip: Optional[Callable[[str, Dict[str, str]], bool]] = None
+    ):
+        self.working_dir = working_dir
+        self.skip = skip
+        self.max_jobs = max_jobs or get_settings().command_jobs
+        self.env = package_manager_env(cache_dir)
+        self.completed: List[str] = []
+        self._seen = set()
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def dedup_key(self, command: str, files: Dict[str, str]) -> str:
+        """Key under which a command counts as already run: its normalized form, plus the content
+        of the package.json a bare install reads, so it runs again once that file changes."""
+        normalized = normalize_command(command)
+        manifest = install_manifest(command)
+        if manifest is None:
+            return normalized
+        content = files.get(manifest)
+        if content is None:
+            try:
+                with open(os.path.join(self.working_dir, manifest), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except OSError:
+                content = ""
+        return f"{normalized}\0{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+    def run(self, commands: List[str], files: Optional[Dict[str, str]] = None) -> None:
+        """Run commands that have not been run for this project yet.
+
+        `skip(command, files)` is also given the files the same structure writes after its
+        commands, so it can tell what the project will contain.
+        """
+        with self._lock:
+            pending = []
+            skipped = 0
+            for command in commands:
+                # Normalized forms only decide what is a duplicate; the command runs as generated
+                command = command.strip()
+                key = self.dedup_key(command, files or {})
+                if not key or key in self._seen:
+                    logger.debug(f"Skipping duplicate command: {command}")
+                    skipped += 1
+                    continue
+                self._seen.add(key)
+                if self.skip is not None and self.skip(normalize_command(command), files or {}):
+                    console.print(f"[yellow]Skipping command already satisfied:[/yellow] {escape(command)}")
+                    continue
+                self._keys[command] = key
+                pending.append(command)
+
+        if skipped:
+            console.print(f"[yellow]Skipping {skipped} duplicate commands[/yellow]")
+
+        with trace_span("commands", commands=len(pending), duplicates=skipped):
+            for wave in plan_command_waves(pending):
+                groups = list(wave.values())
+                if len(groups) == 1:
+                    self._run_group(groups[0])
+                    continue
+                with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+                    # Copy the context so command spans nest under the current trace
+                    futures = [
+                        executor.submit(contextvars.copy_context().run, self._run_group, group)
+                        for group in groups
+                    ]
+                    errors = [future.exception() for future in futures if future.exception() is not None]
+                if errors:
+                    raise errors[0]
+
+    def _run_group(self, commands: List[str]) -> None:
+        for command in commands:
+            self._run_one(command)
+
+    def _run_one(self, command: str) -> None:
+        with trace_span("command", command=command):
+            self._execute(command)
+
+    def _execute(self, command: str) -> None:
+        label = command_directory(command)
+        console.print(f"[yellow]Running command:[/yellow] {escape(command)}")
+        try:
+            process = subprocess.Popen(
+                command,
+                shell=True,
+                cwd=self.working_dir,
+                env=self.env,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=1
+            )
+            tail = deque(maxlen=50)
+            for line in process.stdout:
+                line = line.rstrip()
+                tail.append(line)
+                console.print(f"[dim]\\[{escape(label)}][/dim] {escape(line)}", highlight=False)
+            returncode = process.wait()
+        except Exception as e:
+            console.print(f"[red]Unexpected error running command {escape(command)}:[/red] {str(e)}")
+            raise
+
+        if returncode != 0:
+            with self._lock:
+                # Allow a later phase or a retry to run the command again
+                self._seen.discard(self._keys.get(command, normalize_command(command)))
+            console.print(f"[red]Error running command {escape(command)}[/red]")
+            raise subprocess.CalledProcessError(returncode, command, output="\n".join(tail))
+
+        with self._lock:
+            self.completed.append(command)
+        console.print("[green]Command completed successfully[/green]")
@@ -0,0 +1,68 @@
+import difflib
+from typing import Dict, List, Optional
+from src.utils.section_utils import Section, find_section, parse_sections
+
+def changed_sections(old_document: str, new_document: str) -> Optional[List[str]]:
+    """Titles of the numbered sections added, removed or edited between two documents.
+
+    Returns None when either document has no recognizable sections, meaning any part may have
+    changed; returns an empty list when the documents are identical.
+    """
+    if old_document.strip() == new_document.strip():
+        return []
+    old_sections = parse_sections(old_document)
+    new_sections = parse_sections(new_document)
+    if not old_sections or not new_sections:
+        return None
+
+    old_by_title = {section.title.lower(): section for section in old_sections}
+    new_by_title = {section.title.lower(): section for section in new_sections}
+    changed = []
+    for section in new_sections:
+        old = old_by_title.get(section.title.lower())
+        if old is None or _body(old.text) != _body(section.text):
+            changed.append(section.title)
+    changed.extend(section.title for section in old_sections if section.title.lower() not in new_by_title)
+    return changed
+
+def _body(text: str) -> List[str]:
+    # Sections are compared without their heading line (renumbering is not a change) or blank lines
+    return [line.rstrip() for line in text.splitlines()[1:] if line.strip()]
+
+def document_diff(old_document: str, new_document: str, name: str) -> str:
+    """Unified diff of two versions of a document, empty when they are the same."""
+    lines = difflib.unified_diff(
+        old_document.splitlines(),
+        new_document.splitlines(),
+        fromfile=f"{name} (current)",
+        tofile=f"{name} (updated)",
+        lineterm="",
+        n=1
+    )
+    return "\n".join(lines)
+
+def affected_phases(
+    changes: Dict[str, Optional[List[str]]],
+    phase_sections: Dict[str, Dict[str, List[str]]],
+    phases: List[str]
+) -> List[str]:
+    """Phases whose declared requirements sections include a changed one.
+
+    `changes` maps a document key (e.g. functional_requirements) to `changed_sections` of it. A
+    document with unknown changes (None) affects every phase, as does a phase without a section
+    list for that document.
+    """
+    affected = []
+    for phase in phases:
+        for key, titles in changes.items():
+            if titles == []:
+                continue
+            names = phase_sections.get(phase, {}).get(key)
+            if titles is None or names is None or _matches(titles, names):
+                affected.append(phase)
+                break
+    return affected
+
+def _matches(titles: List[str], names: List[str]) -> bool:
+    sections = [Section(0, title, "") for title in titles]
+    return any(find_section(sections, name) is not None for name in names)
@@ -0,0 +1,79 @@
+import os
+import logging
+from typing import Dict, List, Tuple
+from src.utils.file_utils import parse_code_structure
+
+logger = logging.getLogger(__name__)
+
+def parse_file_manifest(text: str, allow_empty: bool = False) -> Dict:
+    """Parse a manifest response into `{folders, files: [{path, spec}], delete, commands}`.
+
+    Also accepts `files` given as a path -> spec dictionary or a plain list of paths. `delete`
+    (files to remove) is only used by update plans.
+    """
+    structure = parse_code_structure(text)
+    if not isinstance(structure, dict):
+        raise ValueError("File manifest is not a JSON object")
+
+    raw_files = structure.get("files", [])
+    if isinstance(raw_files, dict):
+        raw_files = [{"path": path, "spec": spec} for path, spec in raw_files.items()]
+
+    entries = []
+    seen = set()
+    for entry in raw_files:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        path = str(entry.get("path", "")).strip() if isinstance(entry, dict) else ""
+        if not path or path in seen:
+            continue
+        seen.add(path)
+        entries.append({"path": path, "spec": str(entry.get("spec", "")).strip()})
+
+    if not entries and not allow_empty:
+        raise ValueError("File manifest lists no files")
+    return {
+        "folders": structure.get("folders", []),
+        "files": entries,
+        "delete": [str(path) for path in structure.get("delete", []) if str(path) not in seen],
+        "commands": structure.get("commands", [])
+    }
+
+def format_manifest(entries: List[Dict[str, str]]) -> str:
+    return "\n".join(f"- {entry['path']}: {entry['spec'] or 'see requirements'}" for entry in entries)
+
+def group_files(entries: List[Dict[str, str]], files_per_request: int) -> List[List[Dict[str, str]]]:
+    """Split manifest entries into request-sized groups, keeping neighbouring files together."""
+    size = max(files_per_request, 1)
+    return [entries[start:start + size] for start in range(0, len(entries), size)]
+
+def merge_file_responses(manifest: Dict, responses: List[str]) -> Tuple[Dict, List[str]]:
+    """Merge per-group file responses into a `{folders, files, commands}` code structure.
+
+    Only files listed in the manifest are kept; returns the structure and the manifest paths
+    that no response contained.
+    """
+    wanted = [entry["path"] for entry in manifest["files"]]
+    # Responses may spell a path slightly differently ("./backend/x.js")
+    by_normalized = {os.path.normpath(path): path for path in wanted}
+    written: Dict[str, str] = {}
+    for response in responses:
+        files = parse_code_structure(response).get("files", {})
+        if not isinstance(files, dict):
+            continue
+        for response_path, content in files.items():
+            path = by_normalized.get(os.path.normpath(response_path))
+            if path is None:
+                logger.debug(f"Ignoring file outside the manifest: {response_path}")
+                continue
+            if path in written:
+                continue
+            written[path] = content if isinstance(content, str) else str(content)
+
+    missing = [path for path in wanted if path not in written]
+    structure = {
+        "folders": manifest["folders"],
+        "files": {path: written[path] for path in wanted if path in written},
+        "commands": manifest["commands"]
+    }
+    return structure, missing
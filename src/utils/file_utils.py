@@ -1,146 +1,234 @@
 import os
 import json
-import subprocess
+import stat
+import hashlib
+import tempfile
+import threading
 import logging
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
 from rich.console import Console
+from src.utils.json_utils import extract_json
+from src.utils.command_utils import CommandRunner, install_manifest
+from src.utils.output_utils import OutputBackend, ProjectArchive, get_output
+from src.utils.trace_utils import trace_span
+from src.config.settings import get_settings
 
 console = Console()
 logger = logging.getLogger(__name__)
 
+# Content-hash manifest kept in each project directory
+MANIFEST_FILE = ".codegen_manifest.json"
+
+_manifest_locks: Dict[str, threading.Lock] = {}
+
+# Process umask, read once at import (setting it is the only way to read it, and is not thread-safe)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def make_directories(directories: Iterable[str]) -> int:
+    """Create each distinct directory once, skipping those implied by a deeper one."""
+    unique = sorted({os.path.normpath(d) for d in directories if d}, reverse=True)
+    created = 0
+    previous = None
+    for directory in unique:
+        # Reverse sorting puts "a/b/c" right before "a/b", so parents already covered are skipped
+        if previous is not None and previous.startswith(directory + os.sep):
+            continue
+        os.makedirs(directory, exist_ok=True)
+        previous = directory
+        created += 1
+    return created
+
 def create_folder_structure(folders: List[str], base_path: str = ".") -> None:
     """Create the folder structure based on the provided list."""
-    for folder in folders:
-        folder_path = os.path.join(base_path, folder)
-        try:
-            os.makedirs(folder_path, exist_ok=True)
-            console.print(f"[green]Created folder:[/green] {folder_path}")
-        except Exception as e:
-            console.print(f"[red]Error creating folder {folder_path}:[/red] {str(e)}")
-            raise
-
-def write_files(files: Dict[str, str], base_path: str = ".") -> None:
-    """Write the provided files with their content."""
-    for file_path, content in files.items():
-        full_path = os.path.join(base_path, file_path)
-        try:
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            console.print(f"[green]Created file:[/green] {full_path}")
-            
-        except Exception as e:
-            console.print(f"[red]Error creating file {full_path}:[/red] {str(e)}")
-            raise
-
-def run_commands(commands: List[str], working_dir: str = ".") -> None:
-    """Run the provided shell commands."""
-    for command in commands:
-        try:
-            console.print(f"[yellow]Running command:[/yellow] {command}")
-            result = subprocess.run(
-                command,
-                shell=True,
-                check=True,
-                cwd=working_dir,
-                text=True,
-                capture_output=True
-            )
-            console.print(f"[green]Command completed successfully[/green]")
-            
-        except subprocess.CalledProcessError as e:
-            console.print(f"[red]Error running command {command}[/red]")
-            console.print(f"Error output: {e.stderr}")
-            raise
-        except Exception as e:
-            console.print(f"[red]Unexpected error running command {command}:[/red] {str(e)}")
-            raise
-
-def clean_json_string(json_str: str) -> str:
-    """Clean and format JSON string to ensure proper quotes and formatting."""
     try:
-        # Try parsing as-is first
-        try:
-            json.loads(json_str)
-            return json_str
-        except json.JSONDecodeError:
-            pass
-
-        # Remove any leading/trailing whitespace
-        json_str = json_str.strip()
-        
-        # Handle common formatting issues
-        cleaned_lines = []
-        in_string = False
-        
-        for line in json_str.split('\n'):
-            line = line.strip()
-            
-            # Skip empty lines and comments
-            if not line or line.startswith('//'):
-                continue
-                
-            if ':' in line and not in_string:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                if not (key.startswith('"') and key.endswith('"')):
-                    key = f'"{key.strip()}"'
-                cleaned_lines.append(f"{key}:{value}")
-            else:
-                cleaned_lines.append(line)
-                
-            quotes = line.count('"') - line.count('\\"')
-            if quotes % 2 == 1:
-                in_string = not in_string
-        
-        cleaned_json = '\n'.join(cleaned_lines)
-        
-        # Validate the cleaned JSON
-        json.loads(cleaned_json)
-        return cleaned_json
-                
+        output = get_output(base_path)
+        if output is not None and output.backend == OutputBackend.ARCHIVE:
+            output.archive.add_directories(folders)
+        else:
+            make_directories(os.path.join(base_path, folder) for folder in folders)
+        console.print(f"[green]Created {len(folders)} folders in[/green] {base_path}")
     except Exception as e:
-        console.print(f"[red]Error cleaning JSON string:[/red] {str(e)}")
+        console.print(f"[red]Error creating folders in {base_path}:[/red] {str(e)}")
         raise
 
-def process_code_structure(code_structure: str, base_path: str = ".") -> None:
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def load_manifest(base_path: str) -> Dict[str, str]:
+    """Load the path -> content hash manifest of files written into a project."""
+    manifest_path = os.path.join(base_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {str(e)}")
+        return {}
+
+def file_mode(full_path: str) -> int:
+    """Permissions for (re)writing a file: those of the file it replaces, or what a plain `open`
+    would create. A file hardlinked to the blob store gets the latter rather than the blob's."""
+    try:
+        info = os.stat(full_path)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+    if info.st_nlink > 1:
+        return 0o666 & ~_UMASK
+    return stat.S_IMODE(info.st_mode)
+
+def atomic_write(full_path: str, content: str) -> None:
+    """Write a file through a temporary file and rename, so readers never see partial content."""
+    directory, name = os.path.split(full_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp creates the file 0600
+        os.chmod(tmp_path, file_mode(full_path))
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_files(files: Dict[str, str], base_path: str = ".", quiet: bool = False) -> None:
+    """Write the provided files with their content, skipping files unchanged since the last write.
+
+    `quiet` leaves out the summary line (streamed files are written a few at a time).
+    """
+    output = get_output(base_path)
+    if output is not None and output.backend == OutputBackend.ARCHIVE:
+        write_archive_files(files, output.archive, base_path, quiet)
+        return
+    with trace_span("write_files", files=len(files)) as span:
+        with _manifest_locks.setdefault(os.path.abspath(base_path), threading.Lock()):
+            manifest = load_manifest(base_path)
+
+            pending = {}
+            for file_path, content in files.items():
+                digest = content_hash(content)
+                full_path = os.path.join(base_path, file_path)
+                if manifest.get(file_path) == digest and os.path.exists(full_path):
+                    continue
+                pending[file_path] = (full_path, content, digest)
+
+            skipped = len(files) - len(pending)
+            if span is not None:
+                span.attributes.update(written=len(pending), unchanged=skipped)
+            if not pending:
+                if not quiet:
+                    console.print(f"[green]All {skipped} files unchanged in[/green] {base_path}")
+                return
+
+            errors = []
+            try:
+                make_directories(os.path.dirname(full_path) for full_path, _, _ in pending.values())
+                with ThreadPoolExecutor(max_workers=get_settings().file_writer_workers) as executor:
+                    futures = {
+                        executor.submit(atomic_write, full_path, content): file_path
+                        for file_path, (full_path, content, _) in pending.items()
+                    }
+                    for future in as_completed(futures):
+                        file_path = futures[future]
+                        if future.exception() is not None:
+                            errors.append((file_path, future.exception()))
+                        else:
+                            manifest[file_path] = pending[file_path][2]
+            finally:
+                atomic_write(os.path.join(base_path, MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True))
+
+            for file_path, error in errors:
+                console.print(f"[red]Error creating file {os.path.join(base_path, file_path)}:[/red] {str(error)}")
+            if errors:
+                raise errors[0][1]
+
+            if quiet:
+                return
+            console.print(
+                f"[green]Wrote {len(pending)} files to[/green] {base_path}"
+                + (f" ({skipped} unchanged)" if skipped else "")
+            )
+
+def write_archive_files(files: Dict[str, str], archive: ProjectArchive, base_path: str, quiet: bool = False) -> None:
+    """Append the provided files to a project's streamed archive."""
+    with trace_span("write_files", files=len(files)) as span:
+        written = sum(archive.add_file(path, content, content_hash(content)) for path, content in files.items())
+        if span is not None:
+            span.attributes.update(written=written, unchanged=len(files) - written)
+    if not quiet:
+        console.print(f"[green]Archived {written} files for[/green] {base_path}")
+
+def remove_files(paths: Iterable[str], base_path: str = ".") -> int:
+    """Delete generated files and their manifest entries, refusing paths outside `base_path`."""
+    output = get_output(base_path)
+    if output is not None and output.backend == OutputBackend.ARCHIVE:
+        raise ValueError("Files cannot be removed from a streamed project archive")
+    root = os.path.abspath(base_path)
+    removed = 0
+    with _manifest_locks.setdefault(root, threading.Lock()):
+        manifest = load_manifest(base_path)
+        for file_path in paths:
+            full_path = os.path.abspath(os.path.join(base_path, file_path))
+            if not full_path.startswith(root + os.sep):
+                console.print(f"[yellow]Refusing to delete a file outside the project:[/yellow] {file_path}")
+                continue
+            manifest.pop(file_path, None)
+            if os.path.isfile(full_path):
+                os.remove(full_path)
+                removed += 1
+        atomic_write(os.path.join(base_path, MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True))
+    if removed:
+        console.print(f"[green]Removed {removed} files from[/green] {base_path}")
+    return removed
+
+def run_commands(commands: List[str], working_dir: str = ".") -> None:
+    """Run the provided shell commands."""
+    CommandRunner(working_dir).run(commands)
+
+def parse_code_structure(code_structure: str) -> Dict:
+    """Extract and parse the JSON code structure from an LLM response."""
+    with trace_span("parse_json", response_chars=len(code_structure)):
+        return extract_json(code_structure)
+
+def apply_code_structure(structure: Dict, base_path: str = ".", command_runner: Optional[CommandRunner] = None) -> None:
+    """Run the commands and create the folders and files of a parsed code structure."""
+    commands = structure.get("commands", [])
+    files = structure.get("files", {})
+    output = get_output(base_path)
+    runner = None
+    if commands and output is not None and output.backend == OutputBackend.ARCHIVE:
+        # Archived projects have no tree to run commands in; they go into its setup script
+        output.archive.record_commands(commands)
+        commands = []
+    elif commands:
+        runner = command_runner or CommandRunner(base_path)
+    # A bare install of a package.json written here runs once that file is on disk
+    installs = [command for command in commands if install_manifest(command) in files]
+    commands = [command for command in commands if command not in installs]
+    if commands:
+        runner.run(commands, files)
+    
+    folders = structure.get("folders", [])
+    if folders:
+        create_folder_structure(folders, base_path)
+    
+    if files:
+        write_files(files, base_path)
+
+    if installs:
+        runner.run(installs, files)
+
+def process_code_structure(
+    code_structure: str,
+    base_path: str = ".",
+    command_runner: Optional[CommandRunner] = None
+) -> None:
     """Process the code structure JSON and create files/folders."""
     try:
-        # Extract and parse JSON
-        json_str = ""
-        if "```json" in code_structure:
-            start_idx = code_structure.find("```json") + 7
-            end_idx = code_structure.find("```", start_idx)
-            json_str = code_structure[start_idx:end_idx].strip()
-        else:
-            start_idx = code_structure.find("{")
-            end_idx = code_structure.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = code_structure[start_idx:end_idx]
-        
-        if not json_str:
-            raise ValueError("No valid JSON structure found in the response")
-            
-        # Parse the JSON
-        try:
-            structure = json.loads(json_str)
-        except json.JSONDecodeError:
-            cleaned_json = clean_json_string(json_str)
-            structure = json.loads(cleaned_json)
-        
-        # Process the structure
-        commands = structure.get("commands", [])
-        if commands:
-            run_commands(commands, base_path)
-        
-        folders = structure.get("folders", [])
-        if folders:
-            create_folder_structure(folders, base_path)
-        
-        files = structure.get("files", {})
-        if files:
-            write_files(files, base_path)
-        
+        apply_code_structure(parse_code_structure(code_structure), base_path, command_runner)
     except Exception as e:
         console.print(f"[red]Error processing code structure:[/red] {str(e)}")
-        raise 
\ No newline at end of file
+        raise
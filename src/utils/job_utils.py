@@ -0,0 +1,147 @@
+import asyncio
+import itertools
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+# Job options that select a generator configuration; jobs with the same ones share warm generators
+GENERATOR_OPTIONS = ("model", "cache_mode", "streaming", "phase_mode", "validate", "output", "use_scaffold", "reuse_requirements")
+
+@dataclass
+class Job:
+    """A generation request submitted to `codegen serve`, with the events it has produced."""
+    user_input: str
+    mode: str = "full"
+    priority: int = 0
+    options: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    project_dir: Optional[str] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    # Set when a running job is cancelled before its task exists (while its generator is built)
+    cancel_requested: bool = False
+    _updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def generator_key(self) -> tuple:
+        return tuple(self.options.get(name) for name in GENERATOR_OPTIONS)
+
+    def add_event(self, event: str, **details: Any) -> None:
+        """Record a progress event and wake every stream following this job."""
+        self.events.append({"seq": len(self.events), "time": round(time.time(), 3), "event": event, **details})
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    def set_status(self, status: JobStatus, **details: Any) -> None:
+        self.status = status
+        if status == JobStatus.RUNNING:
+            self.started_at = time.time()
+        elif status in FINISHED_STATUSES:
+            self.finished_at = time.time()
+        self.add_event(status.value, **details)
+
+    async def follow(self, start: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's events from `start`, then new ones as they happen, until it finishes."""
+        index = start
+        while True:
+            updated = self._updated
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                return
+            await updated.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "user_input": self.user_input,
+            "mode": self.mode,
+            "priority": self.priority,
+            "options": self.options,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "project_dir": self.project_dir,
+            "error": self.error,
+            "events": len(self.events)
+        }
+
+class JobQueue:
+    """Priority queue of jobs (higher priority first, then submission order) that also keeps the
+    most recent `history` finished jobs for status queries."""
+
+    def __init__(self, history: int = 1000):
+        self.history = history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+
+    def submit(self, job: Job) -> Job:
+        self.jobs[job.id] = job
+        self._queue.put_nowait((-job.priority, next(self._order), job))
+        job.add_event(JobStatus.QUEUED.value, position=self.queued())
+        self._evict()
+        return job
+
+    async def next(self) -> Job:
+        """Wait for the most urgent job still queued (cancelled jobs are skipped)."""
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status == JobStatus.QUEUED:
+                return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def queued(self) -> int:
+        return sum(job.status == JobStatus.QUEUED for job in self.jobs.values())
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self.jobs.values():
+            counts[job.status.value] += 1
+        return counts
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job, or interrupt a running one (its checkpoints can be resumed)."""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == JobStatus.QUEUED:
+            job.set_status(JobStatus.CANCELLED)
+        elif job.task is not None:
+            job.task.cancel()
+        else:
+            # The worker checks this before it starts the job's task
+            job.cancel_requested = True
+        return job
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
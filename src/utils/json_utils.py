@@ -0,0 +1,163 @@
+import json
+import re
+from typing import Any, List, Optional
+
+# Characters that end a run of plain string content
+_DOUBLE_QUOTED_SPECIAL = re.compile(r'["\\\n\r\t]')
+_SINGLE_QUOTED_SPECIAL = re.compile(r'[\'"\\\n\r\t]')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$\-.]*')
+_RAW_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+def find_json_start(text: str) -> Optional[int]:
+    """Return the index of the opening brace of the JSON payload, preferring a ```json fence."""
+    fence = text.find("```json")
+    if fence != -1:
+        start = text.find("{", fence + 7)
+        if start != -1:
+            return start
+    start = text.find("{")
+    return start if start != -1 else None
+
+def repair_json(text: str, start: int = 0) -> str:
+    """Copy the JSON value starting at `start` in one pass, repairing common LLM mistakes.
+
+    Handles // and /* */ comments, trailing commas, unquoted keys, single-quoted strings and
+    raw newlines/tabs inside strings. Scanning stops once the outermost value closes, so any
+    trailing prose or closing fence is ignored.
+    """
+    out: List[str] = []
+    # One entry per open container: True for objects that are waiting for a key
+    expect_key: List[bool] = []
+    containers: List[str] = []
+    pending_comma = False
+    i = start
+    length = len(text)
+
+    while i < length:
+        char = text[i]
+
+        if char in " \n\r\t":
+            i += 1
+            continue
+
+        if char == "/" and i + 1 < length and text[i + 1] in "/*":
+            if text[i + 1] == "/":
+                end = text.find("\n", i + 2)
+                i = length if end == -1 else end + 1
+            else:
+                end = text.find("*/", i + 2)
+                i = length if end == -1 else end + 2
+            continue
+
+        if char in "}]":
+            # Dropping the pending comma here is what removes trailing commas
+            pending_comma = False
+            out.append(char)
+            if containers:
+                containers.pop()
+                expect_key.pop()
+            i += 1
+            if not containers:
+                break
+            continue
+
+        if pending_comma:
+            out.append(",")
+            pending_comma = False
+
+        if char == ",":
+            pending_comma = True
+            if containers and containers[-1] == "{":
+                expect_key[-1] = True
+            i += 1
+            continue
+
+        if char in "{[":
+            out.append(char)
+            containers.append(char)
+            expect_key.append(char == "{")
+            i += 1
+            continue
+
+        if char == ":":
+            out.append(char)
+            if expect_key:
+                expect_key[-1] = False
+            i += 1
+            continue
+
+        if char in "\"'":
+            i = _copy_string(text, i, out)
+        elif expect_key and expect_key[-1]:
+            match = _IDENTIFIER.match(text, i)
+            if match is None:
+                raise json.JSONDecodeError("Unexpected character in object key", text, i)
+            out.append(json.dumps(match.group()))
+            i = match.end()
+        else:
+            # Numbers, true/false/null and anything else are copied up to the next delimiter
+            end = i
+            while end < length and text[end] not in ",:{}[]\"' \n\r\t/":
+                end += 1
+            if end == i:
+                end += 1
+            out.append(text[i:end])
+            i = end
+
+        if expect_key and expect_key[-1]:
+            expect_key[-1] = False
+
+    return "".join(out)
+
+def _copy_string(text: str, i: int, out: List[str]) -> int:
+    """Copy a quoted string starting at `i` to `out` as a valid JSON string; return the index after it."""
+    quote = text[i]
+    special = _DOUBLE_QUOTED_SPECIAL if quote == '"' else _SINGLE_QUOTED_SPECIAL
+    out.append('"')
+    i += 1
+    length = len(text)
+
+    while i < length:
+        match = special.search(text, i)
+        if match is None:
+            out.append(text[i:])
+            break
+        out.append(text[i:match.start()])
+        char = match.group()
+        i = match.end()
+
+        if char == quote:
+            out.append('"')
+            return i
+        if char == "\\":
+            if i < length:
+                escaped = text[i]
+                # \' is not a valid JSON escape
+                out.append("'" if escaped == "'" else "\\" + escaped)
+                i += 1
+        elif char == '"':
+            # Only reachable inside single-quoted strings
+            out.append('\\"')
+        else:
+            out.append(_RAW_ESCAPES[char])
+
+    # Unterminated string: close it so the caller gets a parse error at the real problem
+    out.append('"')
+    return length
+
+# Raw newlines and tabs inside strings are accepted, as models often emit them
+_DECODER = json.JSONDecoder(strict=False)
+
+def extract_json(text: str) -> Any:
+    """Find the JSON payload in an LLM response, fenced or bare, and parse it tolerantly.
+
+    Valid JSON is decoded directly (trailing prose or a closing fence is ignored); the slower
+    `repair_json` scan only runs when that fails.
+    """
+    start = find_json_start(text)
+    if start is None:
+        raise ValueError("No valid JSON structure found in the response")
+    try:
+        return _DECODER.raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text, start), strict=False)
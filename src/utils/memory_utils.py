@@ -1,8 +1,109 @@
-from langchain.memory import ConversationBufferMemory
+import threading
+from typing import Any, Dict, List, Tuple
+import pydantic
+from langchain_core.memory import BaseMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from src.utils.json_utils import extract_json
+from src.utils.token_utils import estimate_tokens
 
-def create_memory(input_key="input", output_key="output"):
-    return ConversationBufferMemory(
+# BaseMemory is a pydantic v1 model before langchain-core 0.3 and a v2 model from 0.3 on
+if issubclass(BaseMemory, pydantic.BaseModel):
+    from pydantic import PrivateAttr
+else:
+    from pydantic.v1 import PrivateAttr
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly `max_tokens` tokens, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(max_tokens, 0) * 4] + "\n...[truncated]"
+
+def code_structure_manifest(text: str) -> str:
+    """Reduce a JSON code structure response to its file list and commands."""
+    try:
+        structure = extract_json(text)
+    except ValueError:
+        return text
+    if not isinstance(structure, dict) or "files" not in structure:
+        return text
+
+    lines = ["Generated files:"]
+    for path, content in structure.get("files", {}).items():
+        lines.append(f"- {path} ({str(content).count(chr(10)) + 1} lines)")
+    commands = structure.get("commands", [])
+    if commands:
+        lines.append("Commands: " + "; ".join(str(command) for command in commands))
+    return "\n".join(lines)
+
+class BudgetedMemory(BaseMemory):
+    """Conversation memory held under a hard token budget, dropping the oldest turns beyond it.
+
+    No prompt template reads the history (each call carries the documents it needs), so trimming
+    is kept to cutting and dropping text; a template with a `history` variable gets the kept turns.
+    """
+
+    input_key: str = "input"
+    output_key: str = "output"
+    memory_key: str = "history"
+    max_tokens: int = 2000
+    return_messages: bool = True
+
+    _turns: List[Tuple[str, str]] = PrivateAttr(default_factory=list)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    @property
+    def token_count(self) -> int:
+        return sum(estimate_tokens(text) for _, text in self._turns)
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            messages: List[BaseMessage] = [
+                HumanMessage(content=text) if role == "human" else AIMessage(content=text)
+                for role, text in self._turns
+            ]
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: "\n".join(f"{m.type}: {m.content}" for m in messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        human = str(inputs.get(self.input_key, ""))
+        ai = str(outputs.get(self.output_key, ""))
+
+        # A single turn may never take more than the whole budget
+        half = self.max_tokens // 2
+        with self._lock:
+            self._turns.append(("human", truncate_to_tokens(human, half)))
+            self._turns.append(("ai", truncate_to_tokens(ai, self.max_tokens - half)))
+            self._enforce_budget()
+
+    def _enforce_budget(self) -> None:
+        while self._turns and self.token_count > self.max_tokens:
+            self._turns.pop(0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+
+def create_memory(
+    input_key: str = "input",
+    output_key: str = "output",
+    max_tokens: int = 2000
+) -> BudgetedMemory:
+    return BudgetedMemory(
         input_key=input_key,
         output_key=output_key,
+        max_tokens=max_tokens,
         return_messages=True
-    ) 
\ No newline at end of file
+    )
+
+def reset_memory(*chains) -> None:
+    """Clear the memory of each chain (and of the sub-chains of sequential chains)."""
+    for chain in chains:
+        for sub_chain in getattr(chain, "chains", []):
+            reset_memory(sub_chain)
+        if getattr(chain, "memory", None) is not None:
+            chain.memory.clear()
@@ -0,0 +1,284 @@
+import os
+import io
+import gzip
+import time
+import stat
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import threading
+import logging
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class OutputBackend(str, Enum):
+    FILES = "files"
+    STORE = "store"
+    ARCHIVE = "archive"
+
+# Top-level entries of a project that are never deduplicated into the blob store (checkpoints,
+# run state and the written-files manifest are unique to the project and rewritten often)
+_PRIVATE_NAMES = {".codegen", ".codegen_manifest.json"}
+
+# Files package managers rewrite in place (manifests, lockfiles and install state). They are never
+# hardlinked to shared content, so an install in one project cannot write through to the others
+PACKAGE_METADATA_FILES = {
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    ".package-lock.json", ".yarn-integrity", ".modules.yaml"
+}
+
+def is_package_metadata(path: str) -> bool:
+    """Whether a file is package-manager metadata: a manifest, lockfile or `.bin` entry."""
+    directory, name = os.path.split(path)
+    return name in PACKAGE_METADATA_FILES or os.path.basename(directory) == ".bin"
+
+# Blob files are read-only so that writing through any project's link fails instead of changing
+# the content of every project that shares it
+_BLOB_MODE = 0o444
+_EXECUTABLE_BLOB_MODE = 0o555
+
+class BlobStore:
+    """Content-addressed store of file blobs that project files are hardlinked to.
+
+    A blob is named by the SHA-256 of its content (plus `.x` if executable, since permissions
+    belong to the inode), under `objects/<first two hex digits>/`. A blob whose link count has
+    dropped to one is referenced by no project and can be collected.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+
+    def blob_path(self, digest: str, executable: bool = False) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + (".x" if executable else ""))
+
+    def put(self, data: bytes, executable: bool = False, digest: Optional[str] = None) -> str:
+        """Store a blob unless it already exists; return its path."""
+        path = self.blob_path(digest or hashlib.sha256(data).hexdigest(), executable)
+        if os.path.exists(path):
+            return path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".blob.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, _EXECUTABLE_BLOB_MODE if executable else _BLOB_MODE)
+            try:
+                # Linking (unlike renaming) never replaces a blob another writer stored first
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(tmp_path)
+        return path
+
+    def link(self, blob: str, destination: str) -> bool:
+        """Atomically replace `destination` with a hardlink to a blob.
+
+        Returns False, leaving `destination` untouched, if the filesystem refuses the link (another
+        device, or the blob reached the maximum link count).
+        """
+        directory, name = os.path.split(destination)
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.link")
+        try:
+            os.link(blob, tmp_path)
+        except FileExistsError:
+            os.remove(tmp_path)
+            os.link(blob, tmp_path)
+        except OSError as e:
+            if isinstance(e, FileNotFoundError) and not os.path.exists(blob):
+                raise
+            logger.debug(f"Cannot link {blob} to {destination}: {str(e)}")
+            return False
+        os.replace(tmp_path, destination)
+        return True
+
+    def ingest(self, path: str) -> Optional[int]:
+        """Replace a regular file with a link to its blob; return the bytes saved, or None if the
+        file was left as it is (already linked, or the link was refused)."""
+        info = os.lstat(path)
+        if not stat.S_ISREG(info.st_mode) or info.st_nlink > 1:
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        executable = bool(info.st_mode & stat.S_IXUSR)
+        blob = self.blob_path(hashlib.sha256(data).hexdigest(), executable)
+        shared = os.path.exists(blob)
+        try:
+            if not self.link(self.put(data, executable), path):
+                return None
+        except FileNotFoundError:
+            return None
+        return info.st_size if shared else 0
+
+    def deduplicate_tree(self, directory: str) -> Dict[str, int]:
+        """Link every regular file of a project (dependencies included) to the store, except
+        package-manager metadata."""
+        counts = {"files": 0, "linked": 0, "bytes_saved": 0}
+        for root, directories, names in os.walk(directory):
+            if root == directory:
+                directories[:] = [name for name in directories if name not in _PRIVATE_NAMES]
+                names = [name for name in names if name not in _PRIVATE_NAMES]
+            for name in names:
+                counts["files"] += 1
+                path = os.path.join(root, name)
+                if is_package_metadata(path):
+                    continue
+                saved = self.ingest(path)
+                if saved is not None:
+                    counts["linked"] += 1
+                    counts["bytes_saved"] += saved
+        return counts
+
+    def _blobs(self) -> Iterable[os.DirEntry]:
+        if not os.path.isdir(self.objects_dir):
+            return
+        for prefix in os.scandir(self.objects_dir):
+            if prefix.is_dir(follow_symlinks=False):
+                for entry in os.scandir(prefix.path):
+                    if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."):
+                        yield entry
+
+    def stats(self) -> Dict[str, int]:
+        """Blob count and size, and how many project files link to them."""
+        counts = {"blobs": 0, "bytes": 0, "links": 0, "unreferenced": 0}
+        for entry in self._blobs():
+            info = entry.stat(follow_symlinks=False)
+            counts["blobs"] += 1
+            counts["bytes"] += info.st_size
+            counts["links"] += info.st_nlink - 1
+            if info.st_nlink == 1:
+                counts["unreferenced"] += 1
+        return counts
+
+    def collect(self, min_age: float = 60.0) -> Dict[str, int]:
+        """Delete blobs no project links to any more (e.g. after projects were deleted).
+
+        Blobs younger than `min_age` seconds are kept, since a writer may be about to link them.
+        """
+        counts = {"blobs": 0, "bytes": 0}
+        cutoff = time.time() - min_age
+        for entry in self._blobs():
+            info = entry.stat(follow_symlinks=False)
+            if info.st_nlink == 1 and info.st_mtime < cutoff:
+                os.remove(entry.path)
+                counts["blobs"] += 1
+                counts["bytes"] += info.st_size
+        return counts
+
+def detach_tree(directory: str) -> int:
+    """Turn every hardlinked file of a project into an ordinary writable copy; return the count."""
+    detached = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            info = os.lstat(path)
+            if not stat.S_ISREG(info.st_mode) or info.st_nlink == 1:
+                continue
+            directory_name, file_name = os.path.split(path)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{file_name}.", suffix=".tmp", dir=directory_name)
+            os.close(fd)
+            try:
+                shutil.copyfile(path, tmp_path)
+                os.chmod(tmp_path, stat.S_IMODE(info.st_mode) | stat.S_IWUSR)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            detached += 1
+    return detached
+
+# Written into archives in place of running the setup commands
+SETUP_SCRIPT = "codegen_setup.sh"
+
+class ProjectArchive:
+    """A project streamed straight into a compressed tarball instead of a directory tree.
+
+    Entries are appended as files are generated. Setup commands cannot run without a tree, so
+    they are collected into a setup script added when the archive is closed. The archive is
+    written to `<path>.partial` and only replaces `path` once the run completes.
+    """
+
+    def __init__(self, path: str, prefix: str, compresslevel: int = 6):
+        self.path = path
+        self.prefix = prefix
+        self.partial_path = f"{path}.partial"
+        self.digests: Dict[str, str] = {}
+        self.commands: List[str] = []
+        self._lock = threading.Lock()
+        self._file = open(self.partial_path, 'wb')
+        # mtime=0 keeps the gzip header, and so identical projects' archives, reproducible
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=compresslevel, mtime=0)
+        self._tar = tarfile.open(fileobj=self._gzip, mode='w|', format=tarfile.PAX_FORMAT)
+
+    def _member(self, path: str, kind: bytes, size: int = 0, mode: int = 0o644) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(f"{self.prefix}/{os.path.normpath(path)}".rstrip("/"))
+        info.type = kind
+        info.size = size
+        info.mode = mode
+        info.mtime = int(time.time())
+        return info
+
+    def add_file(self, path: str, content: str, digest: str, mode: int = 0o644) -> bool:
+        """Append a file; return False if the same content was already written at that path.
+
+        A path written again is appended again; extraction keeps the last copy.
+        """
+        data = content.encode("utf-8")
+        with self._lock:
+            if self.digests.get(path) == digest:
+                return False
+            self._tar.addfile(self._member(path, tarfile.REGTYPE, len(data), mode), io.BytesIO(data))
+            self.digests[path] = digest
+            return True
+
+    def add_directories(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            for path in paths:
+                self._tar.addfile(self._member(path, tarfile.DIRTYPE, mode=0o755))
+
+    def record_commands(self, commands: List[str]) -> None:
+        with self._lock:
+            self.commands.extend(commands)
+
+    def close(self, complete: bool = True) -> str:
+        """Finish the stream; return the path of the archive (still `.partial` if incomplete)."""
+        if self.commands:
+            script = "#!/bin/sh\n# Setup commands of the generated project, in order\nset -e\n"
+            script += "".join(f"(cd \"$(dirname \"$0\")\" && {command})\n" for command in self.commands)
+            self.add_file(SETUP_SCRIPT, script, hashlib.sha256(script.encode("utf-8")).hexdigest(), mode=0o755)
+        with self._lock:
+            self._tar.close()
+            self._gzip.close()
+            self._file.close()
+        if not complete:
+            return self.partial_path
+        os.replace(self.partial_path, self.path)
+        return self.path
+
+class ProjectOutput:
+    """Where the files of one project go: its directory (deduplicated into a blob store once the
+    run has finished) or a streamed archive."""
+
+    def __init__(self, backend: OutputBackend, store: Optional[BlobStore] = None, archive: Optional[ProjectArchive] = None):
+        self.backend = backend
+        self.store = store
+        self.archive = archive
+
+_outputs: Dict[str, ProjectOutput] = {}
+
+def attach_output(base_path: str, output: ProjectOutput) -> None:
+    """Route the files written into `base_path` to an output backend."""
+    _outputs[os.path.abspath(base_path)] = output
+
+def detach_output(base_path: str) -> Optional[ProjectOutput]:
+    return _outputs.pop(os.path.abspath(base_path), None)
+
+def get_output(base_path: str) -> Optional[ProjectOutput]:
+    """The backend attached to a project directory, if any (plain files otherwise)."""
+    return _outputs.get(os.path.abspath(base_path))
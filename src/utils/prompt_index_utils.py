@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about what is being built
+_STOP_WORDS = {
+    "a", "an", "and", "the", "of", "for", "to", "with", "in", "on", "that", "which", "is", "are",
+    "be", "it", "its", "my", "our", "me", "we", "i", "please", "can", "you", "will", "should"
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS prompts (
+        id INTEGER PRIMARY KEY,
+        input_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        template TEXT NOT NULL,
+        user_input TEXT NOT NULL,
+        shingle_count INTEGER NOT NULL,
+        functional_requirements TEXT NOT NULL,
+        project_dir TEXT,
+        created_at REAL NOT NULL,
+        UNIQUE (input_hash, model, template)
+    )""",
+    # Inverted index: the prompts each shingle occurs in
+    """CREATE TABLE IF NOT EXISTS shingles (
+        shingle INTEGER NOT NULL,
+        prompt_id INTEGER NOT NULL REFERENCES prompts (id) ON DELETE CASCADE,
+        PRIMARY KEY (shingle, prompt_id)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_shingles_prompt ON shingles (prompt_id)",
+)
+
+def shingles(text: str) -> Set[int]:
+    """Hashed word unigrams and bigrams of a user input, ignoring case, punctuation and stop words."""
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOP_WORDS]
+    terms = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return {
+        int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+        for term in terms
+    }
+
+@dataclass
+class PromptMatch:
+    """A stored user input similar to a new one, with the requirements generated for it."""
+    user_input: str
+    similarity: float
+    functional_requirements: str
+    project_dir: Optional[str]
+    created_at: float
+
+class PromptIndex:
+    """Local similarity index of past user inputs and the functional requirements generated for them.
+
+    Inputs are compared by the Jaccard similarity of their word shingles, counted in SQLite
+    through an inverted index, so a lookup touches only prompts sharing at least one shingle. Only
+    requirements from the same model and functional prompt template (`template`) are matched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def add(self, user_input: str, functional_requirements: str, model: str, template: str, project_dir: Optional[str] = None) -> None:
+        """Index a user input with its requirements, replacing an earlier entry for the same input."""
+        terms = shingles(user_input)
+        if not terms:
+            return
+        input_hash = hashlib.sha256(" ".join(_WORD.findall(user_input.lower())).encode("utf-8")).hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM prompts WHERE input_hash = ? AND model = ? AND template = ?",
+                (input_hash, model, template)
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO prompts (input_hash, model, template, user_input, shingle_count, "
+                "functional_requirements, project_dir, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (input_hash, model, template, user_input, len(terms), functional_requirements, project_dir, time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO shingles (shingle, prompt_id) VALUES (?, ?)",
+                [(term, cursor.lastrowid) for term in terms]
+            )
+
+    def search(self, user_input: str, model: Optional[str] = None, template: Optional[str] = None, limit: int = 5) -> List[PromptMatch]:
+        """The stored inputs most similar to `user_input`, best first."""
+        terms = shingles(user_input)
+        if not terms:
+            return []
+        clauses, parameters = [], []
+        for name, value in (("model", model), ("template", template)):
+            if value is not None:
+                clauses.append(f"prompts.{name} = ?")
+                parameters.append(value)
+        scope = (" AND " + " AND ".join(clauses)) if clauses else ""
+        # Shared shingles per candidate; Jaccard = shared / (|A| + |B| - shared)
+        sql = (
+            "SELECT prompts.user_input, prompts.functional_requirements, prompts.project_dir, prompts.created_at, "
+            "CAST(overlap.shared AS REAL) / (? + prompts.shingle_count - overlap.shared) AS similarity "
+            "FROM (SELECT prompt_id, COUNT(*) AS shared FROM shingles "
+            "WHERE shingle IN (SELECT value FROM json_each(?)) GROUP BY prompt_id) AS overlap "
+            f"JOIN prompts ON prompts.id = overlap.prompt_id{scope} "
+            "ORDER BY similarity DESC, prompts.created_at DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, [len(terms), json.dumps(sorted(terms)), *parameters, limit]).fetchall()
+        return [
+            PromptMatch(
+                user_input=row[0],
+                functional_requirements=row[1],
+                project_dir=row[2],
+                created_at=row[3],
+                similarity=row[4]
+            )
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            prompts, shingle_rows = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM prompts), (SELECT COUNT(*) FROM shingles)"
+            ).fetchone()
+        return {"prompts": prompts, "shingles": shingle_rows}
+
+    def clear(self) -> int:
+        """Delete every entry; return how many there were."""
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM prompts").rowcount
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_indexes: Dict[str, PromptIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_prompt_index(path: Optional[str] = None) -> PromptIndex:
+    """The index at `path` (PROMPT_INDEX_PATH by default), opened once per process."""
+    from src.config.settings import get_settings
+
+    path = os.path.abspath(path or get_settings().prompt_index_path)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = PromptIndex(path)
+        return _indexes[path]
@@ -0,0 +1,71 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Tuple
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Sliding-window limiter for requests per minute and tokens per minute."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, window: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        # (timestamp, tokens, counts_as_request)
+        self._events: Deque[Tuple[float, int, bool]] = deque()
+        self._requests_in_window = 0
+        self._tokens_in_window = 0
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens, is_request = self._events.popleft()
+            self._tokens_in_window -= tokens
+            self._requests_in_window -= int(is_request)
+
+    def _has_capacity(self, tokens: int) -> bool:
+        if not self._events:
+            # Always admit a request into an empty window, even if it alone exceeds the token budget
+            return True
+        return (
+            self._requests_in_window < self.requests_per_minute
+            and self._tokens_in_window + tokens <= self.tokens_per_minute
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request consuming `tokens` fits in the current window."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if self._has_capacity(tokens):
+                    self._events.append((now, tokens, True))
+                    self._requests_in_window += 1
+                    self._tokens_in_window += tokens
+                    return
+                delay = self.window - (now - self._events[0][0])
+                logger.debug(f"Rate limit reached, waiting {delay:.2f}s")
+                await asyncio.sleep(max(delay, 0.01))
+
+    def record(self, tokens: int) -> None:
+        """Account for tokens that were only known after the request finished (e.g. completion tokens)."""
+        if tokens <= 0:
+            return
+        self._events.append((time.monotonic(), tokens, False))
+        self._tokens_in_window += tokens
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Return the process-wide rate limiter for a model provider."""
+    provider = getattr(provider, "value", provider)
+    if provider not in _limiters:
+        settings = get_settings()
+        _limiters[provider] = RateLimiter(
+            requests_per_minute=getattr(settings, f"{provider}_requests_per_minute"),
+            tokens_per_minute=getattr(settings, f"{provider}_tokens_per_minute")
+        )
+    return _limiters[provider]
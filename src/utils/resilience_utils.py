@@ -0,0 +1,188 @@
+import asyncio
+import random
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limits, overload and transient server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Provider SDK errors that carry no status code but are transient
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "OverloadedError"}
+
+class AttemptTimeout(Exception):
+    """A single LLM attempt exceeded its timeout; retried like a transient error."""
+
+@dataclass
+class CallPolicy:
+    """Retry, hedging and failover settings for LLM calls."""
+    attempt_timeout: Optional[float] = None
+    max_retries: int = 3
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = 20
+    failover_provider: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls) -> "CallPolicy":
+        settings = get_settings()
+        return cls(
+            attempt_timeout=settings.llm_attempt_timeout,
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_backoff_base,
+            backoff_max=settings.llm_backoff_max,
+            hedge_percentile=settings.llm_hedge_percentile,
+            hedge_min_samples=settings.llm_hedge_min_samples,
+            failover_provider=settings.llm_failover_provider
+        )
+
+def status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM call error is transient (rate limit, overload, timeout, connection)."""
+    if isinstance(error, AttemptTimeout):
+        return True
+    if status_code(error) in RETRYABLE_STATUSES:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from a Retry-After header."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, policy: CallPolicy, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-provided Retry-After."""
+    delay = random.uniform(0, min(policy.backoff_max, policy.backoff_base * (2 ** attempt)))
+    requested = retry_after(error) if error is not None else None
+    if requested is not None:
+        delay = max(delay, min(requested, policy.backoff_max))
+    return delay
+
+class LatencyTracker:
+    """Recent successful call latencies per key, for choosing when to hedge."""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.size)).append(seconds)
+
+    def percentile(self, key: str, percentile: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(int(percentile * len(samples)), len(samples) - 1)
+        return samples[index]
+
+_latency_tracker = LatencyTracker()
+
+def get_latency_tracker() -> LatencyTracker:
+    return _latency_tracker
+
+async def _with_timeout(call: Callable[[], Awaitable[T]], timeout: Optional[float]) -> T:
+    try:
+        return await asyncio.wait_for(call(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise AttemptTimeout(f"attempt timed out after {timeout:g}s") from None
+
+async def hedged(call: Callable[[], Awaitable[T]], threshold: Optional[float], on_hedge: Optional[Callable[[], None]] = None) -> T:
+    """Run `call`; if it is still running after `threshold` seconds, start a second copy and
+    return whichever finishes successfully first, cancelling the other."""
+    first = asyncio.ensure_future(call())
+    tasks = {first}
+    try:
+        if threshold is None:
+            return await first
+        done, _ = await asyncio.wait(tasks, timeout=threshold)
+        if not done:
+            if on_hedge is not None:
+                on_hedge()
+            tasks.add(asyncio.ensure_future(call()))
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def call_with_resilience(
+    attempt: Callable[[str], Awaitable[T]],
+    providers: List[str],
+    key: str,
+    policy: CallPolicy,
+    tracker: Optional[LatencyTracker] = None,
+    can_hedge: bool = True,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> T:
+    """Call `attempt(provider)` with per-attempt timeouts, jittered backoff on transient errors,
+    optional hedging, and failover to the next provider once retries are exhausted.
+
+    `key` groups calls with similar latency (e.g. a pipeline stage) for the hedging threshold.
+    `on_event(name, details)` reports "retry", "hedge" and "failover" events.
+    """
+    tracker = tracker or get_latency_tracker()
+    loop = asyncio.get_running_loop()
+    emit = on_event or (lambda name, details: None)
+    last_error: Optional[BaseException] = None
+
+    for index, provider in enumerate(providers):
+        provider_name = getattr(provider, "value", provider)
+        if index > 0:
+            logger.warning(f"Failing over to {provider_name} after: {last_error}")
+            emit("failover", {"provider": provider_name, "error": str(last_error)})
+        tracker_key = f"{provider_name}:{key}"
+
+        for attempt_number in range(policy.max_retries + 1):
+            threshold = None
+            if can_hedge and policy.hedge_percentile is not None:
+                threshold = tracker.percentile(tracker_key, policy.hedge_percentile, policy.hedge_min_samples)
+            start = loop.time()
+            try:
+                result = await hedged(
+                    lambda: _with_timeout(lambda: attempt(provider), policy.attempt_timeout),
+                    threshold,
+                    on_hedge=lambda: emit("hedge", {"provider": provider_name, "after_s": threshold})
+                )
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                if attempt_number == policy.max_retries:
+                    break
+                delay = backoff_delay(attempt_number, policy, e)
+                logger.info(f"Retrying {key} on {provider_name} in {delay:.1f}s after: {e}")
+                emit("retry", {"provider": provider_name, "attempt": attempt_number + 1, "delay_s": delay, "error": str(e)})
+                await asyncio.sleep(delay)
+                continue
+            tracker.record(tracker_key, loop.time() - start)
+            return result
+
+    raise last_error
@@ -0,0 +1,227 @@
+import os
+import json
+import shutil
+import shlex
+import uuid
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from rich.console import Console
+from src.config.settings import get_settings
+from src.scaffolds import react_node_sqlite as scaffold
+from src.utils.command_utils import CommandRunner, split_directory
+from src.utils.file_utils import atomic_write, make_directories
+from src.utils.output_utils import is_package_metadata
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+# Written last when a scaffold is built, so a store without it is incomplete
+SCAFFOLD_MARKER = "scaffold.json"
+
+# Linux FICLONE ioctl: copy-on-write clone on btrfs, XFS and other reflink-capable filesystems
+_FICLONE = 0x40049409
+
+def scaffold_path(store_dir: Optional[str] = None) -> str:
+    """Directory of the current scaffold version in the store."""
+    return os.path.join(store_dir or get_settings().scaffold_store_dir, scaffold.SCAFFOLD_VERSION)
+
+def is_scaffold_built(path: str) -> bool:
+    return os.path.exists(os.path.join(path, SCAFFOLD_MARKER))
+
+def build_scaffold(store_dir: Optional[str] = None, force: bool = False) -> str:
+    """Write the scaffold files into the store and install their dependencies once."""
+    target = scaffold_path(store_dir)
+    if is_scaffold_built(target) and not force:
+        console.print(f"[green]Scaffold {scaffold.SCAFFOLD_VERSION} already built at[/green] {target}")
+        return target
+
+    # Build next to the target and swap it in, so a failed build never leaves a usable-looking store
+    staging = f"{target}.building-{uuid.uuid4().hex[:8]}"
+    try:
+        make_directories(os.path.dirname(os.path.join(staging, path)) for path in scaffold.FILES)
+        for path, content in scaffold.FILES.items():
+            atomic_write(os.path.join(staging, path), content)
+        CommandRunner(staging).run([f"cd {directory} && npm install" for directory in scaffold.INSTALL_DIRS])
+        atomic_write(os.path.join(staging, SCAFFOLD_MARKER), json.dumps({
+            "version": scaffold.SCAFFOLD_VERSION,
+            "files": sorted(scaffold.FILES),
+            "built_at": datetime.now().isoformat(timespec="seconds")
+        }, indent=2))
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except Exception as e:
+        console.print(f"[red]Error building scaffold:[/red] {str(e)}")
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    console.print(f"[green]Built scaffold {scaffold.SCAFFOLD_VERSION} at[/green] {target}")
+    return target
+
+def _reflink(source: str, destination: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        shutil.copystat(source, destination)
+        return True
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+
+def _clear(path: str) -> None:
+    # Never write through an existing entry: it may be a hardlink into the store
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+def clone_file(source: str, destination: str, allow_hardlink: bool) -> str:
+    """Materialize one file by reflink, hardlink or copy, cheapest first; return the method used."""
+    _clear(destination)
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), destination)
+        return "symlink"
+    if _reflink(source, destination):
+        return "reflink"
+    if allow_hardlink:
+        try:
+            os.link(source, destination)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(source, destination)
+    return "copy"
+
+def materialize_scaffold(source: str, project_dir: str) -> Dict[str, int]:
+    """Populate a project directory from a built scaffold; return file counts per method.
+
+    Installed package files under node_modules may be hardlinked to the store: installs replace
+    package directories rather than edit their files. Package-manager metadata (manifests,
+    lockfiles, `node_modules/.package-lock.json`, `.bin` entries) is rewritten in place, so, like
+    source files, it is reflinked or copied and editing it in the project can never change the store.
+    """
+    link_mode = get_settings().scaffold_link_mode
+    counts: Dict[str, int] = {}
+    for root, directories, files in os.walk(source):
+        relative = os.path.relpath(root, source)
+        target_root = os.path.normpath(os.path.join(project_dir, relative))
+        os.makedirs(target_root, exist_ok=True)
+        in_dependencies = "node_modules" in relative.split(os.sep)
+        for name in files:
+            if relative == "." and name == SCAFFOLD_MARKER:
+                continue
+            method = clone_file(
+                os.path.join(root, name),
+                os.path.join(target_root, name),
+                allow_hardlink=in_dependencies and link_mode == "auto" and not is_package_metadata(os.path.join(root, name))
+            )
+            counts[method] = counts.get(method, 0) + 1
+        # Symlinked directories (e.g. node_modules/.bin entries) are recreated as links
+        for name in list(directories):
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                destination = os.path.join(target_root, name)
+                _clear(destination)
+                os.symlink(os.readlink(path), destination)
+                directories.remove(name)
+    return counts
+
+def installed_dependencies() -> Dict[str, Set[str]]:
+    """Package names installed by the scaffold, per directory."""
+    dependencies = {}
+    for directory in scaffold.INSTALL_DIRS:
+        package = json.loads(scaffold.FILES[f"{directory}/package.json"])
+        dependencies[directory] = set(package.get("dependencies", {})) | set(package.get("devDependencies", {}))
+    return dependencies
+
+def _package_name(spec: str) -> str:
+    # "express@4", "@mui/material@^5" -> "express", "@mui/material"
+    at = spec.find("@", 1)
+    return spec if at == -1 else spec[:at]
+
+def _dependency_versions(package_json: str) -> Optional[Dict[str, Dict[str, str]]]:
+    try:
+        package = json.loads(package_json)
+    except ValueError:
+        return None
+    if not isinstance(package, dict):
+        return None
+    return {key: package.get(key) or {} for key in ("dependencies", "devDependencies")}
+
+def _matches_scaffold_package(directory: str, files: Dict[str, str], project_dir: str) -> bool:
+    """Whether the directory's package.json (as the phase leaves it) declares the scaffold's dependencies."""
+    path = f"{directory}/package.json"
+    content = files.get(path)
+    if content is None:
+        try:
+            with open(os.path.join(project_dir, path), encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            return False
+    expected = _dependency_versions(scaffold.FILES[path])
+    return expected is not None and _dependency_versions(content) == expected
+
+def _created_app(words: List[str]) -> Optional[str]:
+    """Directory a create-react-app / create vite command creates, relative to where it runs."""
+    for index, word in enumerate(words):
+        name = _package_name(word)
+        if name in ("create-react-app", "create-vite"):
+            arguments = words[index + 1:]
+        elif name in ("create", "init") and index + 1 < len(words) and _package_name(words[index + 1]) in ("react-app", "vite"):
+            arguments = words[index + 2:]
+        else:
+            continue
+        return next((argument for argument in arguments if not argument.startswith("-")), ".")
+    return None
+
+def is_redundant_command(command: str, files: Optional[Dict[str, str]] = None, project_dir: str = ".") -> bool:
+    """Whether a setup command only recreates or reinstalls what the scaffold already provides.
+
+    `files` are the files written alongside the command; a bare install is only redundant while
+    the package.json it installs from still declares exactly the scaffold's dependencies.
+    """
+    directory, rest = split_directory(command)
+    dependencies = installed_dependencies()
+    try:
+        words = shlex.split(rest)
+    except ValueError:
+        return False
+
+    # Creating an app over the project root or a scaffold directory would clobber it
+    created = _created_app(words)
+    if created is not None:
+        target = os.path.normpath(os.path.join(directory, created))
+        return target == "." or target.split(os.sep)[0] in dependencies
+
+    if directory not in dependencies:
+        return False
+    if words[:2] in (["npm", "init"], ["yarn", "init"]):
+        return True
+    installs = (["npm", "install"], ["npm", "i"], ["npm", "ci"], ["npm", "add"], ["yarn", "add"], ["yarn", "install"])
+    if words[:2] in installs or words == ["yarn"]:
+        packages = [_package_name(word) for word in words[2:] if not word.startswith("-")]
+        if not packages:
+            return _matches_scaffold_package(directory, files or {}, project_dir)
+        return all(package in dependencies[directory] for package in packages)
+    return False
+
+def scaffold_instructions() -> str:
+    """Prompt section telling the model which files already exist in the project."""
+    dependencies = installed_dependencies()
+    lines = [
+        f"Prebuilt Scaffold ({scaffold.SCAFFOLD_VERSION}):",
+        "The project directory already contains these files. Do not generate them again:",
+    ]
+    lines += [f"- {path}" for path in scaffold.FILES]
+    lines.append("Installed dependencies (do not add install commands for them):")
+    lines += [f"- {directory}: {', '.join(sorted(names))}" for directory, names in dependencies.items()]
+    lines.append("Generate only the app-specific files, including:")
+    lines += [f"- {path}" for path in scaffold.APP_SPECIFIC_FILES]
+    lines.append("Only add commands for dependencies that are not installed yet.")
+    return "\n".join(lines)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.utils.checkpoint_utils import CheckpointStore, hash_value
+from src.utils.trace_utils import trace_span
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Stage:
+    """A pipeline stage; `run` receives the results of the stages it depends on.
+
+    `fingerprint` captures everything besides its dependencies' results that the output depends
+    on (user input, prompt, model, ...), so a checkpoint is reused only when it would not change.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: List[str] = field(default_factory=list)
+    fingerprint: Any = None
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """Order stages so that every stage comes after its dependencies."""
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+
+    ordered: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage) -> None:
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Dependency cycle detected at stage: {stage.name}")
+        state[stage.name] = "visiting"
+        for dependency in stage.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage: {dependency}")
+            visit(by_name[dependency])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+async def run_stages(
+    stages: List[Stage],
+    checkpoints: Optional[CheckpointStore] = None,
+    on_restore: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Any]:
+    """Run each stage as soon as its dependencies finish, cancelling the rest on the first failure.
+
+    With a checkpoint store, each stage output is saved on success, and a stage whose saved
+    output came from the same fingerprint and dependency outputs is restored instead of run.
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+    output_hashes: Dict[str, str] = {}
+
+    async def run_stage(stage: Stage) -> Any:
+        inputs = {name: await tasks[name] for name in stage.depends_on}
+        with trace_span(stage.name) as span:
+            if checkpoints is None:
+                logger.debug(f"Starting stage: {stage.name}")
+                return await stage.run(inputs)
+
+            input_hash = hash_value({
+                "stage": stage.name,
+                "fingerprint": stage.fingerprint,
+                "inputs": {name: output_hashes[name] for name in stage.depends_on}
+            })
+            checkpoint = await asyncio.to_thread(checkpoints.load, stage.name, input_hash)
+            if checkpoint is not None:
+                logger.debug(f"Restored stage from checkpoint: {stage.name}")
+                if span is not None:
+                    span.attributes["restored"] = True
+                if on_restore is not None:
+                    on_restore(stage.name, checkpoint.output)
+                output_hashes[stage.name] = checkpoint.output_hash
+                return checkpoint.output
+
+            logger.debug(f"Starting stage: {stage.name}")
+            output = await stage.run(inputs)
+            output_hashes[stage.name] = await asyncio.to_thread(checkpoints.save, stage.name, input_hash, output)
+            return output
+
+    for stage in topological_order(stages):
+        tasks[stage.name] = asyncio.create_task(run_stage(stage), name=stage.name)
+
+    try:
+        done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        # Let cancelled stages unwind before returning control to the caller
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    return {name: task.result() for name, task in tasks.items()}
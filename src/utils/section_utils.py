@@ -0,0 +1,55 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# A top-level numbered heading such as "2. User Stories:", "## 2. User Stories" or "**2. User Stories**"
+_HEADING = re.compile(r'^\s*(?P<markup>#{1,6}\s*|\*\*)?(?P<number>\d+)\.\s+(?P<title>[^\n]+?)\s*$')
+
+@dataclass
+class Section:
+    number: int
+    title: str
+    text: str
+
+def parse_sections(document: str) -> List[Section]:
+    """Split a requirements document into its top-level numbered sections.
+
+    Headings must be numbered consecutively from 1 and either end with a colon or use markdown
+    heading/bold markup, so numbered lists inside a section are not mistaken for sections. Text
+    before the first heading is not part of any section.
+    """
+    sections: List[Section] = []
+    lines = document.splitlines(keepends=True)
+    start = None
+    for index, line in enumerate(lines):
+        match = _HEADING.match(line)
+        if match is None or int(match.group("number")) != len(sections) + 1:
+            continue
+        title = match.group("title").strip("*: ").strip()
+        if not (match.group("markup") or match.group("title").rstrip("*").endswith(":")):
+            continue
+        if sections:
+            sections[-1].text = "".join(lines[start:index]).rstrip()
+        sections.append(Section(int(match.group("number")), title, ""))
+        start = index
+    if sections:
+        sections[-1].text = "".join(lines[start:]).rstrip()
+    return sections
+
+def find_section(sections: List[Section], name: str) -> Optional[Section]:
+    """Return the first section whose title contains `name`, ignoring case."""
+    name = name.lower()
+    return next((section for section in sections if name in section.title.lower()), None)
+
+def select_sections(document: str, names: List[str]) -> str:
+    """Build a document from only the named sections, in document order.
+
+    Falls back to the whole document when it has no recognizable sections or any named section
+    is missing, so a phase never loses context it declared.
+    """
+    sections = parse_sections(document)
+    selected = [find_section(sections, name) for name in names]
+    if not sections or any(section is None for section in selected):
+        return document
+    unique = {section.number: section for section in selected}
+    return "\n\n".join(unique[number].text for number in sorted(unique))
@@ -0,0 +1,218 @@
+import json
+import re
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# Sections of the code structure whose entries are collected while streaming
+COLLECTED_KEYS = ("folders", "files", "commands")
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+class _Frame:
+    __slots__ = ("is_object", "role", "key", "expect_key")
+
+    def __init__(self, is_object: bool, role: str):
+        self.is_object = is_object
+        self.role = role
+        self.key: Optional[str] = None
+        self.expect_key = is_object
+
+class IncrementalFilesParser:
+    """Incrementally parses a streamed {folders, files, commands} JSON response.
+
+    Each entry of "files" is returned from `feed` as soon as its string value closes and kept
+    in `files`, so the files of a truncated response survive. Text before the first `{` (such as
+    a ```json fence), `//` and `/* */` comments and trailing commas are tolerated.
+    """
+
+    def __init__(self):
+        self.folders: List[str] = []
+        self.commands: List[str] = []
+        self.files: Dict[str, str] = {}
+        self.started = False
+        self.complete = False
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_parts: List[str] = []
+        self._comment: Optional[str] = None
+        self._pending_slash = False
+        self._pending_star = False
+
+    def structure(self) -> Dict:
+        """Return what has been parsed so far."""
+        return {"folders": list(self.folders), "files": dict(self.files), "commands": list(self.commands)}
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk of the response and return the files it completed."""
+        completed: List[Tuple[str, str]] = []
+        i = 0
+        length = len(chunk)
+        while i < length and not self.complete:
+            if self._in_string:
+                i = self._consume_string(chunk, i, completed)
+                continue
+
+            char = chunk[i]
+            i += 1
+
+            if self._comment == "line":
+                if char == "\n":
+                    self._comment = None
+                continue
+            if self._comment == "block":
+                if self._pending_star and char == "/":
+                    self._comment = None
+                self._pending_star = char == "*"
+                continue
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._stack.append(_Frame(True, "root"))
+                continue
+
+            if self._pending_slash:
+                self._pending_slash = False
+                if char == "/":
+                    self._comment = "line"
+                    continue
+                if char == "*":
+                    self._comment = "block"
+                    self._pending_star = False
+                    continue
+
+            if char == '"':
+                self._in_string = True
+                self._escaped = False
+                self._string_parts = []
+            elif char == "/":
+                self._pending_slash = True
+            elif char in "{[":
+                self._stack.append(_Frame(char == "{", self._child_role()))
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.is_object:
+                    frame.expect_key = True
+                    frame.key = None
+        return completed
+
+    def _child_role(self) -> str:
+        parent = self._stack[-1]
+        if parent.role == "root" and parent.key in COLLECTED_KEYS:
+            return parent.key
+        return "other"
+
+    def _consume_string(self, chunk: str, i: int, completed: List[Tuple[str, str]]) -> int:
+        length = len(chunk)
+        while i < length:
+            if self._escaped:
+                self._string_parts.append(chunk[i])
+                self._escaped = False
+                i += 1
+                continue
+            match = _STRING_SPECIAL.search(chunk, i)
+            if match is None:
+                self._string_parts.append(chunk[i:])
+                return length
+            end = match.start()
+            self._string_parts.append(chunk[i:end])
+            if match.group() == "\\":
+                self._string_parts.append("\\")
+                self._escaped = True
+                i = end + 1
+                continue
+            self._in_string = False
+            self._string_closed(completed)
+            return end + 1
+        return i
+
+    def _string_closed(self, completed: List[Tuple[str, str]]) -> None:
+        raw = "".join(self._string_parts)
+        self._string_parts = []
+        frame = self._stack[-1]
+
+        if frame.is_object and frame.expect_key:
+            frame.key = json.loads(f'"{raw}"', strict=False)
+            frame.expect_key = False
+            return
+
+        if frame.role == "files" and frame.is_object:
+            content = json.loads(f'"{raw}"', strict=False)
+            self.files[frame.key] = content
+            completed.append((frame.key, content))
+        elif frame.role in ("folders", "commands") and not frame.is_object:
+            getattr(self, frame.role).append(json.loads(f'"{raw}"', strict=False))
+
+class StreamingFilesHandler(AsyncCallbackHandler):
+    """Feeds streamed LLM tokens into an IncrementalFilesParser and hands each file to `on_file`
+    as soon as it completes."""
+
+    raise_error = True
+
+    def __init__(self, parser: IncrementalFilesParser, on_file: Optional[Callable[[str, str], None]] = None):
+        self.parser = parser
+        self.on_file = on_file
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        completed = self.parser.feed(token)
+        if self.on_file is not None:
+            for path, content in completed:
+                self.on_file(path, content)
+
+class StreamedFilesWriter:
+    """Writes streamed files in batches, off the event loop, once `gate` is set.
+
+    Files added before then are held until it opens (a phase's files wait for the previous
+    phase to be applied); `close` marks the end of the stream and `wait` returns once every
+    added file has been written.
+    """
+
+    def __init__(self, write: Callable[[Dict[str, str]], None], gate: asyncio.Event):
+        self.write = write
+        self.gate = gate
+        self.written = 0
+        self._pending: Dict[str, str] = {}
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._drain())
+
+    def add(self, path: str, content: str) -> None:
+        self._pending[path] = content
+        self._wake.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+
+    def cancel(self) -> None:
+        """Stop writing at the end of a run; files not written by then are left to apply."""
+        if not self._task.done():
+            self._task.cancel()
+        elif not self._task.cancelled():
+            # Failures are reported by the apply stage; a run that ended before it has its own error
+            self._task.exception()
+
+    async def wait(self) -> None:
+        await self._task
+
+    async def _drain(self) -> None:
+        await self.gate.wait()
+        while True:
+            if self._pending:
+                batch, self._pending = self._pending, {}
+                await asyncio.to_thread(self.write, batch)
+                self.written += len(batch)
+            elif self._closed:
+                return
+            else:
+                self._wake.clear()
+                await self._wake.wait()
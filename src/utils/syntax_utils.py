@@ -0,0 +1,339 @@
+import os
+import re
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Syntax checkers for generated files. They run in validation worker processes, so this module
+# only imports the standard library.
+
+@dataclass
+class Diagnostic:
+    """A syntax problem found in a generated file."""
+    path: str
+    line: int
+    column: int
+    message: str
+    checker: str
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.column}: {self.message} ({self.checker})"
+
+class SourceError(Exception):
+    def __init__(self, index: int, message: str):
+        super().__init__(message)
+        self.index = index
+        self.message = message
+
+def _position(text: str, index: int) -> Tuple[int, int]:
+    line = text.count("\n", 0, index) + 1
+    return line, index - (text.rfind("\n", 0, index) + 1) + 1
+
+def check_json(path: str, content: str) -> List[Diagnostic]:
+    try:
+        json.loads(content)
+    except json.JSONDecodeError as e:
+        return [Diagnostic(path, e.lineno, e.colno, e.msg, "json")]
+    return []
+
+# After these words a "/" starts a regular expression and a "<" a JSX element
+_EXPRESSION_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw",
+    "instanceof", "yield", "await", "default", "extends"
+}
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_WORD = re.compile(r"[\w$]+")
+_SPACE = re.compile(r"\s+")
+_JSX_NAME = re.compile(r"[A-Za-z_$][\w$.:-]*")
+_STRING_END = {quote: re.compile(r"[%s\\\n]" % quote) for quote in "'\""}
+_TEMPLATE_SPECIAL = re.compile(r"[`\\$]")
+_JSX_CHILD_SPECIAL = re.compile(r"[{<]")
+
+class JavaScriptChecker:
+    """Single-pass structural syntax check for JavaScript, JSX and TypeScript.
+
+    Not a full parser: it tracks strings, template literals, comments, regular expressions and
+    JSX elements well enough to report unbalanced delimiters, unterminated literals and
+    mismatched JSX tags, which is what truncated or sloppy generated code typically breaks.
+    """
+
+    def __init__(self, text: str, jsx: bool = True):
+        self.text = text
+        self.jsx = jsx
+        self.i = 0
+        # Whether a "/" or "<" at this point starts a regex or JSX rather than an operator
+        self.expression_start = True
+
+    def check(self) -> None:
+        if self.text.startswith("#!"):
+            self.i = self.text.find("\n") if "\n" in self.text else len(self.text)
+        self.scan_code()
+
+    def scan_code(self, closer: Optional[str] = None, opened_at: int = 0) -> None:
+        """Scan code up to the `closer` of an already consumed opener (or to the end of text)."""
+        text = self.text
+        length = len(text)
+        stack: List[Tuple[str, int]] = []
+        while self.i < length:
+            char = text[self.i]
+            if char.isspace():
+                self.i = _SPACE.match(text, self.i).end()
+            elif char.isalnum() or char in "_$":
+                match = _WORD.match(text, self.i)
+                self.i = match.end()
+                self.expression_start = match.group() in _EXPRESSION_KEYWORDS
+            elif char in "'\"":
+                self.scan_string(char)
+                self.expression_start = False
+            elif char == "`":
+                self.scan_template()
+                self.expression_start = False
+            elif char == "/" and text.startswith("//", self.i):
+                end = text.find("\n", self.i)
+                self.i = length if end == -1 else end
+            elif char == "/" and text.startswith("/*", self.i):
+                end = text.find("*/", self.i + 2)
+                if end == -1:
+                    raise SourceError(self.i, "unterminated comment")
+                self.i = end + 2
+            elif char == "/" and self.expression_start:
+                self.scan_regex()
+            elif char in _OPENERS:
+                stack.append((_OPENERS[char], self.i))
+                self.i += 1
+                self.expression_start = True
+            elif char in ")]}":
+                if stack:
+                    expected, start = stack.pop()
+                    if char != expected:
+                        line, _ = _position(text, start)
+                        raise SourceError(self.i, f"'{char}' does not match '{text[start]}' opened on line {line}")
+                elif char == closer:
+                    self.i += 1
+                    return
+                else:
+                    raise SourceError(self.i, f"unmatched '{char}'")
+                self.i += 1
+                self.expression_start = char == "}"
+            elif char == "<" and self.jsx and self.expression_start and self._starts_jsx():
+                self.scan_jsx()
+                self.expression_start = False
+            else:
+                self.i += 1
+                self.expression_start = True
+
+        if stack:
+            raise SourceError(stack[-1][1], f"'{text[stack[-1][1]]}' is never closed")
+        if closer is not None:
+            raise SourceError(opened_at, f"'{text[opened_at]}' is never closed")
+
+    def _starts_jsx(self) -> bool:
+        following = self.text[self.i + 1:self.i + 2]
+        return following == ">" or following.isalpha() or following == "_"
+
+    def scan_string(self, quote: str) -> None:
+        start = self.i
+        self.i += 1
+        while True:
+            match = _STRING_END[quote].search(self.text, self.i)
+            if match is None or match.group() == "\n":
+                raise SourceError(start, "unterminated string")
+            if match.group() == "\\":
+                self.i = match.end() + 1
+                continue
+            self.i = match.end()
+            return
+
+    def scan_template(self) -> None:
+        start = self.i
+        self.i += 1
+        while True:
+            match = _TEMPLATE_SPECIAL.search(self.text, self.i)
+            if match is None:
+                raise SourceError(start, "unterminated template literal")
+            char = match.group()
+            if char == "\\":
+                self.i = match.end() + 1
+            elif char == "`":
+                self.i = match.end()
+                return
+            elif self.text.startswith("${", match.start()):
+                self.i = match.end() + 1
+                self.expression_start = True
+                self.scan_code("}", match.start() + 1)
+            else:
+                self.i = match.end()
+
+    def scan_regex(self) -> None:
+        text = self.text
+        start = self.i
+        self.i += 1
+        in_class = False
+        while self.i < len(text):
+            char = text[self.i]
+            if char == "\\":
+                self.i += 2
+                continue
+            if char == "\n":
+                break
+            if char == "[":
+                in_class = True
+            elif char == "]":
+                in_class = False
+            elif char == "/" and not in_class:
+                match = _WORD.match(text, self.i + 1)
+                self.i = match.end() if match else self.i + 1
+                self.expression_start = False
+                return
+            self.i += 1
+        # No closing slash on the line: it was a division after all
+        self.i = start + 1
+        self.expression_start = True
+
+    def scan_jsx(self) -> None:
+        """Scan a JSX element or fragment starting at "<", including its children."""
+        text = self.text
+        start = self.i
+        self.i += 1
+        name_match = _JSX_NAME.match(text, self.i)
+        name = name_match.group() if name_match else ""
+        if name_match:
+            self.i = name_match.end()
+
+        # Attributes
+        while True:
+            if self.i >= len(text):
+                raise SourceError(start, f"<{name}> tag is never closed")
+            char = text[self.i]
+            if char.isspace():
+                self.i += 1
+            elif text.startswith("/>", self.i):
+                self.i += 2
+                return
+            elif char == ">":
+                self.i += 1
+                break
+            elif char == "{":
+                self.i += 1
+                self.expression_start = True
+                self.scan_code("}", self.i - 1)
+            elif char in "'\"":
+                end = text.find(char, self.i + 1)
+                if end == -1:
+                    raise SourceError(self.i, "unterminated attribute string")
+                self.i = end + 1
+            elif char == "=" or char.isalnum() or char in "_$:.-":
+                self.i += 1
+            else:
+                raise SourceError(self.i, f"unexpected '{char}' in <{name}> tag")
+
+        # Children up to the matching closing tag
+        while True:
+            match = _JSX_CHILD_SPECIAL.search(text, self.i)
+            if match is None:
+                raise SourceError(start, f"<{name}> is never closed")
+            self.i = match.start()
+            if match.group() == "{":
+                self.i += 1
+                self.expression_start = True
+                self.scan_code("}", match.start())
+            elif text.startswith("</", self.i):
+                closing_start = self.i
+                self.i += 2
+                closing_match = _JSX_NAME.match(text, self.i)
+                closing = closing_match.group() if closing_match else ""
+                if closing_match:
+                    self.i = closing_match.end()
+                space = _SPACE.match(text, self.i)
+                if space:
+                    self.i = space.end()
+                if not text.startswith(">", self.i):
+                    raise SourceError(closing_start, f"malformed closing tag </{closing}")
+                if closing != name:
+                    line, _ = _position(text, start)
+                    raise SourceError(closing_start, f"</{closing}> does not match <{name}> opened on line {line}")
+                self.i += 1
+                return
+            else:
+                self.scan_jsx()
+
+def check_javascript(path: str, content: str) -> List[Diagnostic]:
+    # Angle-bracket type assertions make JSX ambiguous in plain .ts files
+    checker = JavaScriptChecker(content, jsx=not path.endswith((".ts", ".mts", ".cts")))
+    try:
+        checker.check()
+    except SourceError as e:
+        line, column = _position(content, e.index)
+        return [Diagnostic(path, line, column, e.message, "javascript")]
+    return []
+
+# SQLite errors that mean the statement itself is malformed (not e.g. a missing table)
+_SQL_SYNTAX_ERRORS = ("syntax error", "incomplete input", "unrecognized token")
+
+def check_sql(path: str, content: str) -> List[Diagnostic]:
+    """Compile each statement with EXPLAIN against an in-memory database.
+
+    Schema statements are also executed, so later statements can refer to the tables they create.
+    """
+    diagnostics = []
+    connection = sqlite3.connect(":memory:")
+    try:
+        statement, statement_line = "", 1
+        lines = content.splitlines(keepends=True)
+        for number, line in enumerate(lines, start=1):
+            if not statement.strip():
+                statement, statement_line = "", number
+            statement += line
+            if not sqlite3.complete_statement(statement) and number < len(lines):
+                continue
+            if not _strip_sql_comments(statement).strip():
+                continue
+            try:
+                connection.execute(f"EXPLAIN {statement}")
+                if re.match(r"\s*(CREATE|ALTER|DROP)\b", _strip_sql_comments(statement), re.IGNORECASE):
+                    connection.executescript(statement)
+            except sqlite3.Error as e:
+                if any(error in str(e) for error in _SQL_SYNTAX_ERRORS):
+                    diagnostics.append(Diagnostic(path, statement_line, 1, str(e), "sqlite"))
+            statement = ""
+    finally:
+        connection.close()
+    return diagnostics
+
+def _strip_sql_comments(statement: str) -> str:
+    return re.sub(r"--[^\n]*|/\*.*?\*/", "", statement, flags=re.DOTALL)
+
+CHECKERS = {
+    ".json": check_json,
+    ".js": check_javascript,
+    ".jsx": check_javascript,
+    ".mjs": check_javascript,
+    ".cjs": check_javascript,
+    ".ts": check_javascript,
+    ".tsx": check_javascript,
+    ".mts": check_javascript,
+    ".cts": check_javascript,
+    ".sql": check_sql,
+}
+
+# JSON-with-comments configuration files that strict JSON parsing would wrongly reject
+_JSONC_FILE = re.compile(r"^(tsconfig|jsconfig)(\..*)?\.json$|^\.eslintrc\.json$")
+
+def checker_for(path: str):
+    if _JSONC_FILE.match(os.path.basename(path)):
+        return None
+    return CHECKERS.get(os.path.splitext(path)[1].lower())
+
+def check_batch(files: List[Tuple[str, str]]) -> List[Diagnostic]:
+    """Check a batch of (path, content) pairs; runs in a worker process."""
+    diagnostics = []
+    for path, content in files:
+        try:
+            diagnostics.extend(checker_for(path)(path, content))
+        except Exception as e:
+            diagnostics.append(Diagnostic(path, 1, 1, f"checker failed: {e}", "internal"))
+    return diagnostics
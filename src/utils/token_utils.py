@@ -0,0 +1,5 @@
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a text (about 4 characters per token)."""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
@@ -0,0 +1,228 @@
+import json
+import os
+import time
+import uuid
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackHandler
+from src.utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens, used to estimate the cost of each LLM span
+MODEL_PRICES = {
+    "gpt-4-0125-preview": (10.0, 30.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (5.0, 15.0),
+    "claude-3-opus-20240229": (15.0, 75.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+}
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    tracer: Optional["Tracer"] = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def increment(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OpenTelemetry-style span record."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class Tracer:
+    """Collects spans for pipeline stages and exports them as JSONL or a Chrome trace."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attributes) -> Iterator[Span]:
+        """Record a span around a block; nested spans become children of the enclosing one."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            category=category,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+            tracer=self
+        )
+        with self._lock:
+            self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+
+    def export_jsonl(self, path: str) -> None:
+        """Write one JSON span record per line."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in self.spans:
+                f.write(json.dumps(span.to_dict()) + "\n")
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write spans in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        if not self.spans:
+            events = []
+        else:
+            origin = min(span.start_ns for span in self.spans)
+            by_id = {span.span_id: span for span in self.spans}
+            process_ids: Dict[str, int] = {}
+            events = []
+            for span in self.spans:
+                if span.end_ns is None:
+                    continue
+                pid = process_ids.setdefault(span.trace_id, len(process_ids) + 1)
+                events.append({
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start_ns - origin) / 1000,
+                    "dur": (span.end_ns - span.start_ns) / 1000,
+                    "pid": pid,
+                    # Concurrent stages overlap, so each top-level stage gets its own track
+                    "tid": _lane(span, by_id),
+                    "args": span.attributes,
+                })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def totals(self) -> Dict[str, float]:
+        """Sum token counts, cost and cache hits over all spans."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            for key in ("prompt_tokens", "completion_tokens", "cost_usd", "cache_hits", "cached_tokens", "retries"):
+                if key in span.attributes:
+                    totals[key] = totals.get(key, 0) + span.attributes[key]
+        return totals
+
+    def export(self, path: str) -> List[str]:
+        """Export a Chrome trace to `path` and JSONL spans next to it; return the written paths."""
+        jsonl_path = os.path.splitext(path)[0] + ".jsonl"
+        self.export_chrome_trace(path)
+        self.export_jsonl(jsonl_path)
+        return [path, jsonl_path]
+
+def _lane(span: Span, by_id: Dict[str, Span]) -> str:
+    # Walk up to the child of the root span; its name identifies the track
+    lane = span
+    while lane.parent_id in by_id and by_id[lane.parent_id].parent_id is not None:
+        lane = by_id[lane.parent_id]
+    return lane.name
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def trace_span(name: str, category: str = "stage", **attributes) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span; does nothing when no trace is active."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with parent.tracer.span(name, category, **attributes) as span:
+        yield span
+
+class LLMSpanHandler(AsyncCallbackHandler):
+    """Records time to first token, token usage and retries of an LLM call on a span."""
+
+    def __init__(self, span: Span):
+        self.span = span
+        self._start: Optional[float] = None
+        # The LLM cache counts its hits on the span between the start and end of a call
+        self._cache_hits = 0
+
+    def _record_model(self, kwargs) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model")
+        if model:
+            self.span.attributes["model"] = model
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self._start = time.perf_counter()
+        self._cache_hits = self.span.attributes.get("cache_hits", 0)
+        self._record_model(kwargs)
+        self.span.attributes["prompt_chars"] = sum(len(str(m.content)) for batch in messages for m in batch)
+
+    async def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self._start = time.perf_counter()
+        self._cache_hits = self.span.attributes.get("cache_hits", 0)
+        self._record_model(kwargs)
+        self.span.attributes["prompt_chars"] = sum(len(p) for p in prompts)
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if "time_to_first_token_ms" not in self.span.attributes and self._start is not None:
+            self.span.attributes["time_to_first_token_ms"] = (time.perf_counter() - self._start) * 1000
+
+    async def on_retry(self, retry_state, **kwargs) -> None:
+        self.span.increment("retries")
+
+    async def on_llm_end(self, response, **kwargs) -> None:
+        if self._start is not None:
+            self.span.attributes.setdefault("time_to_first_token_ms", (time.perf_counter() - self._start) * 1000)
+
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+        completion_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+
+        if prompt_tokens is None or completion_tokens is None:
+            # Streaming responses and cache hits carry no usage, so fall back to an estimate
+            text = "".join(g.text for generations in response.generations for g in generations)
+            prompt_tokens = self.span.attributes.get("prompt_chars", 0) // 4
+            completion_tokens = estimate_tokens(text)
+            self.span.attributes["tokens_estimated"] = True
+            if self.span.attributes.get("cache_hits", 0) > self._cache_hits:
+                # Served from the LLM cache: nothing was billed, so the tokens are kept apart
+                self.span.increment("cached_tokens", int(prompt_tokens) + int(completion_tokens))
+                return
+
+        self.span.increment("prompt_tokens", int(prompt_tokens))
+        self.span.increment("completion_tokens", int(completion_tokens))
+
+        prices = MODEL_PRICES.get(self.span.attributes.get("model"))
+        if prices is not None:
+            cost = (int(prompt_tokens) * prices[0] + int(completion_tokens) * prices[1]) / 1e6
+            self.span.attributes["cost_usd"] = round(self.span.attributes.get("cost_usd", 0.0) + cost, 6)
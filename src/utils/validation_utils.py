@@ -0,0 +1,65 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from src.config.settings import get_settings
+from src.utils.syntax_utils import Diagnostic, check_batch, checker_for
+from src.utils.trace_utils import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Directories never checked when validating a project on disk
+SKIPPED_DIRECTORIES = {"node_modules", ".git", ".codegen", "build", "dist", "coverage"}
+
+def collect_project_files(project_dir: str) -> Dict[str, str]:
+    """Read every file of a project that has a checker, keyed by its relative path."""
+    files = {}
+    for root, directories, names in os.walk(project_dir):
+        directories[:] = [name for name in directories if name not in SKIPPED_DIRECTORIES]
+        for name in names:
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, project_dir)
+            if checker_for(path) is None:
+                continue
+            with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                files[path] = f.read()
+    return files
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_validation_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all validations in this process, started on first use."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = get_settings().validation_workers or os.cpu_count() or 1
+            # Spawned workers do not inherit the event loop, HTTP clients or locks of this process
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def validate_files(files: Dict[str, str]) -> Dict[str, List[Diagnostic]]:
+    """Check the syntax of every file with a known type in the process pool.
+
+    Returns the diagnostics of each failing file; files without a checker are skipped.
+    """
+    checkable = [(path, content) for path, content in files.items() if checker_for(path) is not None]
+    with trace_span("validate", files=len(checkable)) as span:
+        if not checkable:
+            return {}
+        pool = get_validation_pool()
+        # Largest files first, dealt round-robin, so batches take similar time
+        checkable.sort(key=lambda item: len(item[1]), reverse=True)
+        batch_count = min(len(checkable), _pool_workers * 4)
+        batches = [checkable[index::batch_count] for index in range(batch_count)]
+
+        results: Dict[str, List[Diagnostic]] = {}
+        for diagnostics in pool.map(check_batch, batches):
+            for diagnostic in diagnostics:
+                results.setdefault(diagnostic.path, []).append(diagnostic)
+        if span is not None:
+            span.attributes["failing"] = len(results)
+        return results
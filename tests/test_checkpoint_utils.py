@@ -0,0 +1,64 @@
+import json
+import os
+
+from src.utils.checkpoint_utils import BODY_MIN_CHARS, CheckpointStore
+from src.utils.output_utils import BlobStore
+
+BODY = "console.log('hello');\n" * 50
+OUTPUT = {"files": {"src/app.js": BODY, "small.txt": "hi"}, "commands": ["npm install"]}
+
+
+def saved_json(checkpoints, stage):
+    with open(checkpoints.path(stage), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_inline_by_default(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path))
+    checkpoints.save("generate:Phase 1", "in", OUTPUT)
+
+    assert saved_json(checkpoints, "generate:Phase 1")["output"] == OUTPUT
+    assert checkpoints.load("generate:Phase 1", "in").output == OUTPUT
+    assert checkpoints.load("generate:Phase 1", "other") is None
+
+
+def test_compressed_body_without_store(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path), external_bodies=True)
+    output_hash = checkpoints.save("generate:Phase 1", "in", OUTPUT)
+    checkpoints.save("technical_requirements", "in", "short")
+
+    saved = saved_json(checkpoints, "generate:Phase 1")
+    assert saved["output"]["$json"] is True
+    assert saved["output_hash"] == output_hash
+    assert os.path.exists(checkpoints.body_path(saved["output"]["$blob"]) + ".gz")
+    assert saved_json(checkpoints, "technical_requirements")["output"] == "short"
+    # Any store reads it back
+    assert CheckpointStore(str(tmp_path)).load_latest("generate:Phase 1").output == OUTPUT
+
+
+def test_bodies_share_blob_store_files(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    project = tmp_path / "project"
+    os.makedirs(project / "src")
+    (project / "src/app.js").write_text(BODY)
+    store.ingest(str(project / "src/app.js"))
+
+    checkpoints = CheckpointStore(str(project), external_bodies=True, store=store)
+    checkpoints.save("generate:Phase 1", "in", OUTPUT)
+
+    files = saved_json(checkpoints, "generate:Phase 1")["output"]["files"]
+    assert files["small.txt"] == "hi"
+    assert len(BODY) >= BODY_MIN_CHARS
+    body = checkpoints.body_path(files["src/app.js"]["$blob"])
+    assert os.path.samefile(body, project / "src/app.js")
+    assert os.stat(body).st_nlink == 3
+    assert checkpoints.load_latest("generate:Phase 1").output == OUTPUT
+
+
+def test_missing_body_invalidates_checkpoint(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path), external_bodies=True)
+    checkpoints.save("generate:Phase 1", "in", OUTPUT)
+    digest = saved_json(checkpoints, "generate:Phase 1")["output"]["$blob"]
+    os.remove(checkpoints.body_path(digest) + ".gz")
+
+    assert checkpoints.load_latest("generate:Phase 1") is None
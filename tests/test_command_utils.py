@@ -0,0 +1,95 @@
+import subprocess
+import pytest
+from src.utils.command_utils import (
+    ROOT,
+    CommandRunner,
+    command_directory,
+    install_manifest,
+    normalize_command,
+    plan_command_waves,
+    split_directory
+)
+
+def test_split_directory_follows_nested_cd_hops():
+    assert split_directory("cd frontend && cd src && npm test") == ("frontend/src", "npm test")
+    assert split_directory("cd 'my app' && ls") == ("my app", "ls")
+    assert split_directory("npm install") == (".", "npm install")
+
+def test_command_directory_is_the_top_level_folder():
+    assert command_directory("cd frontend/src && npm test") == "frontend"
+    assert command_directory("cd ../elsewhere && ls") == ROOT
+    assert command_directory("mkdir backend") == ROOT
+
+def test_normalize_command():
+    assert normalize_command("  cd backend &&   npm install ; ") == "cd backend && npm install"
+
+def test_directories_run_concurrently_within_a_wave():
+    waves = plan_command_waves([
+        "cd backend && npm init -y",
+        "cd frontend && npm init -y",
+        "cd backend && npm install express",
+    ])
+    assert [dict(wave) for wave in waves] == [{
+        "backend": ["cd backend && npm init -y", "cd backend && npm install express"],
+        "frontend": ["cd frontend && npm init -y"],
+    }]
+
+def test_root_commands_split_waves_and_keep_order():
+    waves = plan_command_waves([
+        "cd backend && npm init -y",
+        "npx create-react-app frontend",
+        "cd frontend && npm install axios",
+        "cd backend && npm install",
+    ])
+    assert [dict(wave) for wave in waves] == [
+        {"backend": ["cd backend && npm init -y"]},
+        {ROOT: ["npx create-react-app frontend"]},
+        {"frontend": ["cd frontend && npm install axios"], "backend": ["cd backend && npm install"]},
+    ]
+
+def test_no_commands():
+    assert plan_command_waves([]) == []
+
+def test_runner_deduplicates_and_skips(tmp_path):
+    runner = CommandRunner(str(tmp_path), max_jobs=2, cache_dir=str(tmp_path / "cache"), skip=lambda c, files: "skip" in c)
+    runner.run(["echo a >> log", "echo  a >> log ;", "echo skip >> log"])
+    runner.run(["echo a >> log"])
+    assert (tmp_path / "log").read_text() == "a\n"
+    assert runner.completed == ["echo a >> log"]
+
+def test_failed_command_can_run_again(tmp_path):
+    runner = CommandRunner(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.run(["test -f marker"])
+    (tmp_path / "marker").write_text("")
+    runner.run(["test -f marker"])
+    assert runner.completed == ["test -f marker"]
+
+def test_commands_run_as_generated(tmp_path):
+    runner = CommandRunner(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    runner.run(['printf "%s" "a    b" > out.txt;'])
+    assert (tmp_path / "out.txt").read_text() == "a    b"
+    # Still deduplicated by the normalized form
+    runner.run(['printf  "%s" "a    b" > out.txt'])
+    assert len(runner.completed) == 1
+
+def test_install_manifest_only_for_bare_installs():
+    assert install_manifest("cd frontend && npm install") == "frontend/package.json"
+    assert install_manifest("npm ci --silent") == "package.json"
+    assert install_manifest("cd backend && yarn") == "backend/package.json"
+    assert install_manifest("cd backend && npm install express") is None
+    assert install_manifest("npm run build") is None
+
+def test_bare_install_runs_again_after_package_json_changes(tmp_path):
+    runner = CommandRunner(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    executed = []
+    runner._execute = executed.append
+    (tmp_path / "backend").mkdir()
+    (tmp_path / "backend/package.json").write_text('{"dependencies": {}}')
+
+    runner.run(["cd backend && npm install"])
+    runner.run(["cd backend && npm install"])
+    runner.run(["cd backend && npm install"], {"backend/package.json": '{"dependencies": {"cors": "^2"}}'})
+    runner.run(["cd backend && npm install express", "cd backend && npm install express"])
+
+    assert executed == ["cd backend && npm install", "cd backend && npm install", "cd backend && npm install express"]
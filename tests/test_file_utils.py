@@ -0,0 +1,39 @@
+import os
+import stat
+
+from src.utils.command_utils import CommandRunner
+from src.utils.file_utils import apply_code_structure, atomic_write
+
+
+def test_bare_install_of_written_package_json_runs_after_the_files(tmp_path):
+    runner = CommandRunner(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    seen = []
+    runner._execute = lambda command: seen.append((command, os.path.exists(tmp_path / "backend/package.json")))
+
+    apply_code_structure({
+        "commands": ["mkdir -p backend", "cd backend && npm install", "cd frontend && npm install"],
+        "folders": ["backend"],
+        "files": {"backend/package.json": "{}", "backend/server.js": "// server\n"}
+    }, str(tmp_path), runner)
+
+    assert seen == [
+        ("mkdir -p backend", False),
+        ("cd frontend && npm install", False),
+        ("cd backend && npm install", True),
+    ]
+    assert (tmp_path / "backend/server.js").read_text() == "// server\n"
+
+
+def test_atomic_write_uses_default_or_existing_permissions(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+
+    atomic_write(str(tmp_path / "new.txt"), "new")
+    assert stat.S_IMODE(os.stat(tmp_path / "new.txt").st_mode) == 0o666 & ~umask
+
+    script = tmp_path / "run.sh"
+    script.write_text("#!/bin/sh\n")
+    os.chmod(script, 0o750)
+    atomic_write(str(script), "#!/bin/sh\necho hi\n")
+    assert stat.S_IMODE(os.stat(script).st_mode) == 0o750
+    assert script.read_text() == "#!/bin/sh\necho hi\n"
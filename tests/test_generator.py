@@ -0,0 +1,31 @@
+import json
+
+from src.generator import apply_repairs
+
+
+def test_apply_repairs_without_repairs_keeps_output():
+    generated = '{"files": {"a.js": "x"}}'
+    assert apply_repairs(generated, None) is generated
+    assert apply_repairs(generated, {"repaired": {}, "diagnostics": {"a.js": []}}) is generated
+
+
+def test_apply_repairs_merges_into_raw_and_parsed_output():
+    validated = {"repaired": {"a.js": "fixed"}, "diagnostics": {}}
+    raw = json.dumps({"files": {"a.js": "broken", "b.js": "ok"}, "commands": ["npm install"]})
+
+    merged = apply_repairs(raw, validated)
+    assert merged["files"] == {"a.js": "fixed", "b.js": "ok"}
+    assert merged["commands"] == ["npm install"]
+
+    parsed = {"files": {"a.js": "broken"}}
+    assert apply_repairs(parsed, validated)["files"] == {"a.js": "fixed"}
+    assert parsed["files"] == {"a.js": "broken"}
+
+
+def test_apply_repairs_updates_the_changes_to_apply():
+    generated = {"files": {"a.js": "broken", "b.js": "ok"}, "update": {"files": {"a.js": "broken"}, "delete": []}}
+    merged = apply_repairs(generated, {"repaired": {"a.js": "fixed"}})
+
+    assert merged["update"]["files"] == {"a.js": "fixed"}
+    assert merged["files"]["a.js"] == "fixed"
+    assert generated["update"]["files"] == {"a.js": "broken"}
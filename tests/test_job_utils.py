@@ -0,0 +1,82 @@
+import asyncio
+
+from src.utils.job_utils import Job, JobQueue, JobStatus
+
+
+def test_next_returns_highest_priority_then_oldest():
+    async def scenario():
+        queue = JobQueue()
+        low = queue.submit(Job("low"))
+        high = queue.submit(Job("high", priority=5))
+        low_again = queue.submit(Job("low again"))
+        return [await queue.next() for _ in range(3)], [high, low, low_again]
+
+    order, expected = asyncio.run(scenario())
+    assert order == expected
+
+
+def test_cancelled_queued_job_is_skipped():
+    async def scenario():
+        queue = JobQueue()
+        first = queue.submit(Job("first"))
+        second = queue.submit(Job("second"))
+        queue.cancel(first.id)
+        return first, second, await queue.next(), queue.counts()
+
+    first, second, taken, counts = asyncio.run(scenario())
+    assert first.status == JobStatus.CANCELLED
+    assert taken is second
+    assert counts["cancelled"] == 1 and counts["queued"] == 1
+
+
+def test_cancel_running_job_before_its_task_exists():
+    queue = JobQueue()
+    job = queue.submit(Job("build"))
+    job.set_status(JobStatus.RUNNING)
+
+    assert queue.cancel(job.id) is job
+    assert job.cancel_requested
+    assert job.status == JobStatus.RUNNING
+
+
+def test_cancel_running_job_cancels_its_task():
+    async def scenario():
+        queue = JobQueue()
+        job = queue.submit(Job("build"))
+        job.set_status(JobStatus.RUNNING)
+        job.task = asyncio.create_task(asyncio.sleep(10))
+        queue.cancel(job.id)
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.task.cancelled()
+    assert not job.cancel_requested
+
+
+def test_finished_jobs_beyond_history_are_evicted():
+    queue = JobQueue(history=2)
+    jobs = [queue.submit(Job(f"job {index}")) for index in range(4)]
+    for job in jobs[:3]:
+        job.set_status(JobStatus.SUCCEEDED)
+    queue.submit(Job("new"))
+
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[1].id) is jobs[1]
+    assert queue.get(jobs[3].id) is jobs[3]
+
+
+def test_follow_yields_events_until_finished():
+    async def scenario():
+        job = Job("follow")
+        job.add_event("queued")
+
+        async def finish():
+            await asyncio.sleep(0)
+            job.add_event("stage_started", stage="functional_requirements")
+            job.set_status(JobStatus.SUCCEEDED)
+
+        asyncio.create_task(finish())
+        return [event["event"] async for event in job.follow()]
+
+    assert asyncio.run(scenario()) == ["queued", "stage_started", "succeeded"]
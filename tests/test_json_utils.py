@@ -0,0 +1,45 @@
+import json
+import pytest
+from src.utils.json_utils import extract_json, find_json_start, repair_json
+
+def test_valid_fenced_json_with_trailing_prose():
+    text = 'Sure:\n```json\n{"files": {"a.js": "const a = {b: 1};"}}\n```\nLet me know.'
+    assert extract_json(text) == {"files": {"a.js": "const a = {b: 1};"}}
+
+def test_prefers_fenced_payload_over_earlier_braces():
+    text = 'Use {braces} carefully.\n```json\n{"commands": []}\n```'
+    assert find_json_start(text) == text.index('{"commands"')
+    assert extract_json(text) == {"commands": []}
+
+def test_raw_newlines_and_tabs_in_strings():
+    assert extract_json('{"a.py": "def f():\n\treturn 1\n"}') == {"a.py": "def f():\n\treturn 1\n"}
+
+def test_repairs_comments_trailing_commas_and_unquoted_keys():
+    text = """{
+      // generated files
+      folders: ['src', 'src/api',],
+      /* the entry point */
+      "files": {'src/index.js': 'console.log("hi: there")',},
+    }"""
+    assert extract_json(text) == {
+        "folders": ["src", "src/api"],
+        "files": {"src/index.js": 'console.log("hi: there")'}
+    }
+
+def test_repair_keeps_comment_markers_inside_strings():
+    text = '{"a.js": "// not a comment /* nor this */", "url": "http://x",}'
+    assert json.loads(repair_json(text)) == {"a.js": "// not a comment /* nor this */", "url": "http://x"}
+
+def test_repair_stops_at_the_closing_brace():
+    assert repair_json('{"a": [1, 2,],} trailing {"b": 2}') == '{"a":[1,2]}'
+
+def test_escaped_single_quote_in_single_quoted_string():
+    assert extract_json("{'a': 'it\\'s'}") == {"a": "it's"}
+
+def test_no_payload():
+    with pytest.raises(ValueError):
+        extract_json("No JSON here")
+
+def test_unrepairable_payload_raises_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        extract_json('{"files": {"a.js": ')
@@ -0,0 +1,36 @@
+from src.utils.memory_utils import code_structure_manifest, create_memory, truncate_to_tokens
+
+
+def test_memory_drops_oldest_turns_over_budget():
+    memory = create_memory(input_key="phase", output_key="code", max_tokens=100)
+    for index in range(10):
+        memory.save_context({"phase": f"phase {index} " + "x" * 80}, {"code": "y" * 80})
+
+    assert memory.token_count <= 100
+    messages = memory.load_memory_variables({})["history"]
+    assert messages[-2].content.startswith("phase 9")
+    assert not any(message.content.startswith("phase 0") for message in messages)
+
+
+def test_single_turn_is_cut_to_budget():
+    memory = create_memory(max_tokens=40)
+    memory.save_context({"input": "a" * 1000}, {"output": "b" * 1000})
+
+    assert memory.token_count <= 40 + 10
+    assert memory.load_memory_variables({})["history"][0].content.endswith("[truncated]")
+
+
+def test_clear_empties_history():
+    memory = create_memory()
+    memory.save_context({"input": "hi"}, {"output": "hello"})
+    memory.clear()
+
+    assert memory.load_memory_variables({})["history"] == []
+
+
+def test_truncate_and_manifest():
+    assert truncate_to_tokens("short", 10) == "short"
+    manifest = code_structure_manifest('{"files": {"a.js": "1\\n2"}, "commands": ["npm install"]}')
+    assert "- a.js (2 lines)" in manifest
+    assert "npm install" in manifest
+    assert code_structure_manifest("not json") == "not json"
@@ -0,0 +1,47 @@
+import os
+
+from src.utils.output_utils import BlobStore, is_package_metadata
+
+
+def make_project(path):
+    files = {
+        "backend/server.js": "const express = require('express');\n",
+        "backend/package.json": '{"dependencies": {"express": "^4.18.2"}}',
+        "backend/package-lock.json": "{}",
+        "backend/node_modules/.package-lock.json": "{}",
+        "backend/node_modules/express/index.js": "module.exports = {};\n",
+        "backend/node_modules/.bin/shim": "#!/bin/sh\n",
+        ".codegen/run.json": "{}",
+    }
+    for relative, content in files.items():
+        os.makedirs(path / os.path.dirname(relative), exist_ok=True)
+        (path / relative).write_text(content)
+    return path
+
+
+def test_is_package_metadata():
+    assert is_package_metadata("frontend/package.json")
+    assert is_package_metadata("frontend/node_modules/.package-lock.json")
+    assert is_package_metadata("frontend/node_modules/.bin/react-scripts")
+    assert not is_package_metadata("frontend/src/App.js")
+
+
+def test_deduplicate_tree_skips_package_metadata_and_state(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    first = make_project(tmp_path / "first")
+    second = make_project(tmp_path / "second")
+
+    counts = store.deduplicate_tree(str(first))
+    assert counts["linked"] == 2
+    store.deduplicate_tree(str(second))
+
+    assert os.path.samefile(first / "backend/server.js", second / "backend/server.js")
+    assert os.path.samefile(first / "backend/node_modules/express/index.js", second / "backend/node_modules/express/index.js")
+    for relative in ("backend/package.json", "backend/package-lock.json", "backend/node_modules/.package-lock.json",
+                     "backend/node_modules/.bin/shim", ".codegen/run.json"):
+        assert os.stat(first / relative).st_nlink == 1
+
+    # An install rewriting a manifest in place changes only its own project
+    with open(first / "backend/package.json", "w") as f:
+        f.write('{"dependencies": {"express": "^4.18.2", "cors": "^2.8.5"}}')
+    assert "cors" not in (second / "backend/package.json").read_text()
@@ -0,0 +1,60 @@
+import pytest
+
+from src.utils.prompt_index_utils import PromptIndex, shingles
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PromptIndex(str(tmp_path / "index.sqlite"))
+    yield index
+    index.close()
+
+
+def test_shingles_ignore_case_punctuation_and_stop_words():
+    assert shingles("Create a TODO app!") == shingles("create todo app")
+    assert shingles("the of and") == set()
+
+
+def test_search_ranks_by_similarity(index):
+    index.add("todo app with user accounts", "todo requirements", model="m", template="t")
+    index.add("recipe sharing site with comments", "recipe requirements", model="m", template="t")
+    index.add("todo app with tags", "tags requirements", model="m", template="t")
+
+    matches = index.search("todo app with user accounts", model="m", template="t")
+
+    assert [match.functional_requirements for match in matches] == ["todo requirements", "tags requirements"]
+    assert matches[0].similarity == pytest.approx(1.0)
+    assert 0 < matches[1].similarity < 1
+
+
+def test_search_is_scoped_to_model_and_template(index):
+    index.add("todo app", "from m1", model="m1", template="t")
+    index.add("todo app", "from m2", model="m2", template="t")
+    index.add("todo app", "other template", model="m1", template="t2")
+
+    assert [m.functional_requirements for m in index.search("todo app", model="m1", template="t")] == ["from m1"]
+    assert len(index.search("todo app")) == 3
+
+
+def test_same_input_replaces_earlier_entry(index):
+    index.add("Todo app", "first", model="m", template="t")
+    index.add("todo app.", "second", model="m", template="t")
+
+    assert [m.functional_requirements for m in index.search("todo app")] == ["second"]
+    assert index.stats()["prompts"] == 1
+
+
+def test_unrelated_or_empty_input_finds_nothing(index):
+    index.add("todo app", "todo", model="m", template="t")
+
+    assert index.search("weather dashboard") == []
+    assert index.search("the and") == []
+
+
+def test_limit_and_clear(index):
+    for number in range(5):
+        index.add(f"todo app variant {number}", f"req {number}", model="m", template="t")
+
+    assert len(index.search("todo app", limit=2)) == 2
+    assert index.clear() == 5
+    assert index.stats() == {"prompts": 0, "shingles": 0}
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from src.scaffolds import react_node_sqlite as scaffold
+from src.utils.scaffold_utils import SCAFFOLD_MARKER, is_redundant_command, materialize_scaffold
+
+
+@pytest.fixture
+def project(tmp_path):
+    for path in ("backend/package.json", "frontend/package.json"):
+        os.makedirs(tmp_path / os.path.dirname(path), exist_ok=True)
+        (tmp_path / path).write_text(scaffold.FILES[path])
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("command", [
+    "npx create-react-app frontend",
+    "cd frontend && npx create-react-app .",
+    "cd frontend && npx --yes create-react-app@latest .",
+    "npm create vite@latest frontend -- --template react",
+    "cd frontend && npm create vite@latest . -- --template react",
+    "cd backend && npm init -y",
+])
+def test_app_creation_over_scaffold_is_redundant(command, project):
+    assert is_redundant_command(command, {}, project)
+
+
+def test_app_creation_elsewhere_runs(project):
+    assert not is_redundant_command("npx create-react-app admin", {}, project)
+    assert not is_redundant_command("cd tools && npm create vite@latest . -- --template react", {}, project)
+
+
+def test_install_of_scaffold_packages_is_redundant(project):
+    assert is_redundant_command("cd backend && npm install express cors", {}, project)
+    assert not is_redundant_command("cd backend && npm install express bcrypt", {}, project)
+
+
+def test_bare_install_depends_on_package_json(project):
+    assert is_redundant_command("cd backend && npm install", {}, project)
+
+    # The phase rewrites package.json with a new dependency right after its commands
+    package = json.loads(scaffold.FILES["backend/package.json"])
+    package["dependencies"]["bcrypt"] = "^5.1.1"
+    files = {"backend/package.json": json.dumps(package)}
+    assert not is_redundant_command("cd backend && npm install", files, project)
+
+    # Or it already did so in an earlier phase
+    with open(os.path.join(project, "backend/package.json"), "w") as f:
+        f.write(json.dumps(package))
+    assert not is_redundant_command("cd backend && npm ci", {}, project)
+
+
+def test_bare_install_without_package_json_runs(tmp_path):
+    assert not is_redundant_command("cd frontend && npm install", {}, str(tmp_path))
+
+
+def test_materialize_over_existing_project(tmp_path):
+    source = tmp_path / "store"
+    (source / "frontend/node_modules/pkg").mkdir(parents=True)
+    (source / "frontend/node_modules/pkg/index.js").write_text("module.exports = 1\n")
+    (source / "frontend/node_modules/.bin").mkdir()
+    os.symlink("../pkg/index.js", source / "frontend/node_modules/.bin/pkg")
+    os.symlink("pkg", source / "frontend/node_modules/alias")
+    (source / "frontend/package.json").write_text("{}")
+    (source / SCAFFOLD_MARKER).write_text("{}")
+    project = tmp_path / "project"
+
+    materialize_scaffold(str(source), str(project))
+    # A second pass (e.g. over a partially materialized project) replaces what is there
+    (project / "frontend/package.json").write_text("edited")
+    counts = materialize_scaffold(str(source), str(project))
+
+    assert counts["symlink"] == 1
+    assert os.readlink(project / "frontend/node_modules/alias") == "pkg"
+    assert (project / "frontend/package.json").read_text() == "{}"
+    assert (source / "frontend/package.json").read_text() == "{}"
+    assert not (project / SCAFFOLD_MARKER).exists()
+
+
+def _pack(directory, name):
+    os.makedirs(directory / name)
+    (directory / name / "package.json").write_text(json.dumps({"name": name, "version": "1.0.0", "bin": {name: "cli.js"}}))
+    (directory / name / "cli.js").write_text("#!/usr/bin/env node\nmodule.exports = 1\n")
+    subprocess.run(["npm", "pack", "--silent"], cwd=directory / name, check=True, capture_output=True)
+    return str(directory / name / f"{name}-1.0.0.tgz")
+
+
+def _npm_install(directory, package):
+    subprocess.run(
+        ["npm", "install", "--offline", "--no-audit", "--no-fund", package],
+        cwd=directory, check=True, capture_output=True, timeout=120
+    )
+
+
+@pytest.mark.skipif(shutil.which("npm") is None, reason="npm is not installed")
+def test_install_in_materialized_project_leaves_store_intact(tmp_path):
+    source = tmp_path / "store"
+    os.makedirs(source / "frontend")
+    (source / "frontend/package.json").write_text(json.dumps({"name": "frontend", "version": "0.1.0"}))
+    _npm_install(source / "frontend", _pack(tmp_path, "first"))
+    (source / SCAFFOLD_MARKER).write_text("{}")
+    before = {
+        path: (source / path).read_text()
+        for path in ("frontend/package.json", "frontend/package-lock.json", "frontend/node_modules/.package-lock.json")
+    }
+
+    project = tmp_path / "project"
+    materialize_scaffold(str(source), str(project))
+    assert os.stat(project / "frontend/node_modules/first/cli.js").st_nlink == 2
+    assert os.stat(project / "frontend/node_modules/.package-lock.json").st_nlink == 1
+
+    _npm_install(project / "frontend", _pack(tmp_path, "second"))
+
+    assert "second" in (project / "frontend/node_modules/.package-lock.json").read_text()
+    for path, content in before.items():
+        assert (source / path).read_text() == content
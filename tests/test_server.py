@@ -0,0 +1,40 @@
+import asyncio
+
+from src.server import GenerationServer
+from src.utils.job_utils import Job, JobStatus
+
+
+class SlowPool:
+    """Generator pool whose generators take until `ready` is set to build."""
+
+    def __init__(self):
+        self.ready = asyncio.Event()
+        self.released = []
+
+    async def acquire(self, options):
+        await self.ready.wait()
+        return object()
+
+    def release(self, options, generator):
+        self.released.append(generator)
+
+
+def test_job_cancelled_while_its_generator_is_built_never_starts():
+    async def scenario():
+        server = GenerationServer(workers=1, history=10)
+        server.pool = SlowPool()
+        server.start()
+        job = server.queue.submit(Job("todo"))
+        while job.status != JobStatus.RUNNING:
+            await asyncio.sleep(0)
+        server.queue.cancel(job.id)
+        server.pool.ready.set()
+        while not job.finished:
+            await asyncio.sleep(0)
+        await server.stop()
+        return job, server.pool
+
+    job, pool = asyncio.run(scenario())
+    assert job.status == JobStatus.CANCELLED
+    assert job.task is None
+    assert len(pool.released) == 1
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from src.utils.stream_utils import IncrementalFilesParser, StreamedFilesWriter, StreamingFilesHandler
+
+RESPONSE = """Here is the code:
+```json
+{
+  // Phase 1 setup
+  "folders": ["backend", "backend/src",],
+  "files": {
+    "backend/package.json": "{\\n  \\"name\\": \\"api\\"\\n}",
+    "backend/src/index.js": "console.log('a \\\\ b');\\n"
+  },
+  "commands": ["cd backend && npm install"]
+}
+```
+"""
+
+def feed_in_chunks(text, size):
+    parser = IncrementalFilesParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return parser, completed
+
+def test_files_complete_in_any_chunking():
+    for size in (1, 2, 3, 7, 64, len(RESPONSE)):
+        parser, completed = feed_in_chunks(RESPONSE, size)
+        assert parser.complete
+        assert [path for path, _ in completed] == ["backend/package.json", "backend/src/index.js"]
+        assert parser.files["backend/package.json"] == '{\n  "name": "api"\n}'
+        assert parser.files["backend/src/index.js"] == "console.log('a \\ b');\n"
+        assert parser.structure() == {
+            "folders": ["backend", "backend/src"],
+            "files": parser.files,
+            "commands": ["cd backend && npm install"]
+        }
+
+def test_truncated_response_keeps_completed_files():
+    cut = RESPONSE.index("console.log")
+    parser, completed = feed_in_chunks(RESPONSE[:cut], 5)
+    assert not parser.complete
+    assert list(parser.files) == ["backend/package.json"]
+    assert [path for path, _ in completed] == ["backend/package.json"]
+
+def test_unknown_keys_collect_nothing():
+    # The generator falls back to parsing the full response in this case
+    response = json.dumps({"project": {"files": {"a.js": "x"}}})
+    parser, completed = feed_in_chunks(response, 4)
+    assert parser.complete
+    assert parser.files == {}
+    assert completed == []
+
+def test_handler_reports_each_completed_file():
+    parser = IncrementalFilesParser()
+    files = []
+    handler = StreamingFilesHandler(parser, lambda path, content: files.append(path))
+
+    async def stream():
+        for start in range(0, len(RESPONSE), 10):
+            await handler.on_llm_new_token(RESPONSE[start:start + 10])
+
+    asyncio.run(stream())
+    assert files == ["backend/package.json", "backend/src/index.js"]
+    assert parser.structure() == json.loads(RESPONSE[RESPONSE.index("{"):RESPONSE.rindex("}") + 1].replace("// Phase 1 setup", "").replace(",]", "]"))
+
+def test_writer_holds_files_until_the_gate_opens():
+    async def scenario():
+        batches = []
+        gate = asyncio.Event()
+        writer = StreamedFilesWriter(lambda files: batches.append(dict(files)), gate)
+        writer.add("a.js", "a")
+        writer.add("b.js", "b")
+        await asyncio.sleep(0.01)
+        held = list(batches)
+
+        gate.set()
+        writer.add("c.js", "c")
+        writer.close()
+        await writer.wait()
+        return held, batches, writer.written
+
+    held, batches, written = asyncio.run(scenario())
+    assert held == []
+    assert {path for batch in batches for path in batch} == {"a.js", "b.js", "c.js"}
+    assert written == 3
+
+def test_writer_writes_as_files_arrive_once_open():
+    async def scenario():
+        batches = []
+        gate = asyncio.Event()
+        gate.set()
+        writer = StreamedFilesWriter(lambda files: batches.append(sorted(files)), gate)
+        writer.add("a.js", "a")
+        while not batches:
+            await asyncio.sleep(0.001)
+        first = list(batches)
+        writer.add("b.js", "b")
+        writer.close()
+        await writer.wait()
+        return first, batches
+
+    first, batches = asyncio.run(scenario())
+    assert first == [["a.js"]]
+    assert batches == [["a.js"], ["b.js"]]
+
+def test_cancelled_writer_stops_waiting_for_its_gate():
+    async def scenario():
+        writer = StreamedFilesWriter(lambda files: None, asyncio.Event())
+        writer.add("a.js", "a")
+        writer.cancel()
+        await asyncio.sleep(0)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.written == 0
@@ -0,0 +1,32 @@
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from src.utils.cache_utils import SQLiteLLMCache
+from src.utils.trace_utils import LLMSpanHandler, Tracer
+
+def call_twice(tmp_path):
+    tracer = Tracer()
+    model = FakeListChatModel(responses=["hello world"] * 2, cache=SQLiteLLMCache(str(tmp_path / "llm.sqlite")))
+    spans = []
+    for name in ("first", "second"):
+        with tracer.span(name, category="llm", model="gpt-4o") as span:
+            asyncio.run(model.ainvoke("Say hello", config={"callbacks": [LLMSpanHandler(span)]}))
+        spans.append(span)
+    return tracer, spans
+
+def test_uncached_call_records_tokens_and_cost(tmp_path):
+    _, (first, _) = call_twice(tmp_path)
+    assert "cache_hits" not in first.attributes
+    assert first.attributes["prompt_tokens"] > 0 and first.attributes["completion_tokens"] > 0
+    assert first.attributes["cost_usd"] > 0
+    assert "cached_tokens" not in first.attributes
+
+def test_cache_hit_counts_tokens_as_cached_without_cost(tmp_path):
+    tracer, (first, second) = call_twice(tmp_path)
+    assert second.attributes["cache_hits"] == 1
+    assert second.attributes["cached_tokens"] == first.attributes["prompt_tokens"] + first.attributes["completion_tokens"]
+    for key in ("prompt_tokens", "completion_tokens", "cost_usd"):
+        assert key not in second.attributes
+
+    totals = tracer.totals()
+    assert totals["cost_usd"] == first.attributes["cost_usd"]
+    assert totals["cached_tokens"] == second.attributes["cached_tokens"]